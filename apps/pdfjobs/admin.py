@@ -0,0 +1,37 @@
+from django.contrib import admin
+
+from .models import PDFRenderJob
+
+
+@admin.register(PDFRenderJob)
+class PDFRenderJobAdmin(admin.ModelAdmin):
+    list_display = [
+        "kind",
+        "object_id",
+        "status",
+        "attempts",
+        "requested_by",
+        "created_at",
+        "finished_at",
+    ]
+    list_filter = ["status", "kind"]
+    search_fields = ["object_id", "input_hash"]
+    readonly_fields = [
+        "kind",
+        "object_id",
+        "input_hash",
+        "attempts",
+        "error",
+        "requested_by",
+        "created_at",
+        "started_at",
+        "finished_at",
+    ]
+    actions = ["requeue_jobs"]
+
+    @admin.action(description="Re-queue selected jobs")
+    def requeue_jobs(self, request, queryset):
+        updated = queryset.exclude(status=PDFRenderJob.Status.RUNNING).update(
+            status=PDFRenderJob.Status.QUEUED, error=""
+        )
+        self.message_user(request, f"{updated} job(s) re-queued.")
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class PDFJobsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.pdfjobs"
+    verbose_name = "PDF Render Queue"
@@ -0,0 +1,73 @@
+"""
+Render queued PDFs for every registered job kind (time & effort weekly/final
+reports, reimbursement packets).
+
+WeasyPrint runs in a bounded pool of worker processes so renders don't hold
+the GIL or a database connection in the web process. Jobs survive restarts:
+anything left RUNNING by a dead worker is picked up again after a timeout.
+If a render process is killed, its jobs are re-queued and the pool is
+replaced.
+
+Usage:
+    python manage.py process_pdf_jobs              # run forever, polling
+    python manage.py process_pdf_jobs --once       # drain the queue and exit
+    python manage.py process_pdf_jobs --workers 4 --batch 50
+
+Set PDF_RENDER_WORKER=1 for the web processes while this is running so they
+queue renders instead of running them inline.
+"""
+
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.pdfjobs.services import claim_pdf_jobs, pdf_render_executor, render_pdf_jobs
+
+
+class Command(BaseCommand):
+    help = "Render queued PDF jobs in a pool of worker processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.PDF_RENDER_WORKER_PROCESSES,
+            help=f"Render processes (default: {settings.PDF_RENDER_WORKER_PROCESSES})",
+        )
+        parser.add_argument("--batch", type=int, default=20, help="Jobs claimed per batch (default: 20)")
+        parser.add_argument("--poll", type=float, default=5.0, help="Seconds to wait when the queue is empty (default: 5)")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty")
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        self.stdout.write(f"PDF worker started with {workers} process(es).")
+
+        executor = pdf_render_executor(workers)
+        try:
+            while True:
+                jobs = claim_pdf_jobs(options["batch"])
+                if not jobs:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll"])
+                    continue
+
+                try:
+                    completed = render_pdf_jobs(jobs, executor)
+                except BrokenProcessPool as exc:
+                    self.stdout.write(self.style.WARNING(f"{exc} Restarting the render processes."))
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = pdf_render_executor(workers)
+                    continue
+                failed = len(jobs) - completed
+                message = f"Rendered {completed} PDF(s)"
+                if failed:
+                    self.stdout.write(self.style.WARNING(f"{message}, {failed} failed."))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"{message}."))
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping PDF worker.")
+        finally:
+            executor.shutdown()
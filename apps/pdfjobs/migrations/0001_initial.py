@@ -0,0 +1,92 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+import apps.pdfjobs.models
+
+
+def move_content_type(apps, schema_editor):
+    # Keep the admin log entries and permissions that point at the old model.
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    if not ContentType.objects.filter(app_label="pdfjobs", model="pdfrenderjob").exists():
+        ContentType.objects.filter(app_label="timeeffort", model="pdfrenderjob").update(app_label="pdfjobs")
+
+
+def restore_content_type(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    if not ContentType.objects.filter(app_label="timeeffort", model="pdfrenderjob").exists():
+        ContentType.objects.filter(app_label="pdfjobs", model="pdfrenderjob").update(app_label="timeeffort")
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("timeeffort", "0017_granteffortmonth"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # The model moves out of timeeffort with its table, rows and index
+        # names unchanged (timeeffort 0019 drops it from that app's state).
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="PDFRenderJob",
+                    fields=[
+                        ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                        ("kind", models.CharField(choices=apps.pdfjobs.models.registered_kinds, max_length=12)),
+                        ("object_id", models.PositiveIntegerField()),
+                        ("input_hash", models.CharField(help_text="SHA-256 of the render inputs.", max_length=64)),
+                        (
+                            "status",
+                            models.CharField(
+                                choices=[
+                                    ("QUEUED", "Queued"),
+                                    ("RUNNING", "Running"),
+                                    ("DONE", "Done"),
+                                    ("FAILED", "Failed"),
+                                ],
+                                default="QUEUED",
+                                max_length=7,
+                            ),
+                        ),
+                        ("attempts", models.PositiveSmallIntegerField(default=0)),
+                        ("error", models.TextField(blank=True)),
+                        ("created_at", models.DateTimeField(auto_now_add=True)),
+                        ("started_at", models.DateTimeField(blank=True, null=True)),
+                        ("finished_at", models.DateTimeField(blank=True, null=True)),
+                        (
+                            "requested_by",
+                            models.ForeignKey(
+                                blank=True,
+                                null=True,
+                                on_delete=django.db.models.deletion.SET_NULL,
+                                related_name="pdf_render_jobs",
+                                to=settings.AUTH_USER_MODEL,
+                            ),
+                        ),
+                    ],
+                    options={
+                        "verbose_name": "PDF Render Job",
+                        "verbose_name_plural": "PDF Render Jobs",
+                        "db_table": "timeeffort_pdfrenderjob",
+                        "ordering": ["-created_at"],
+                        "indexes": [
+                            models.Index(fields=["status", "created_at"], name="timeeffort__status_2a4bf1_idx"),
+                            models.Index(fields=["kind", "object_id"], name="timeeffort__kind_cf46e4_idx"),
+                        ],
+                        "constraints": [
+                            models.UniqueConstraint(
+                                fields=("kind", "object_id", "input_hash"),
+                                name="unique_pdf_render_job_inputs",
+                            ),
+                        ],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(move_content_type, restore_content_type),
+    ]
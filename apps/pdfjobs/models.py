@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.db import models
+
+
+def registered_kinds():
+    """(kind, label) choices for every handler registered with the queue."""
+    from .services import pdf_job_kinds
+
+    return pdf_job_kinds()
+
+
+class PDFRenderJob(models.Model):
+    """
+    A queued PDF render, processed by `manage.py process_pdf_jobs`.
+
+    Jobs are deduplicated per (kind, object_id, input_hash): requesting the
+    same PDF again with unchanged inputs returns the existing job instead of
+    rendering twice. Each kind belongs to the app that registered its
+    handler (see services.register_pdf_job); object_id is a pk of that
+    handler's model.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "QUEUED", "Queued"
+        RUNNING = "RUNNING", "Running"
+        DONE = "DONE", "Done"
+        FAILED = "FAILED", "Failed"
+
+    kind = models.CharField(max_length=12, choices=registered_kinds)
+    object_id = models.PositiveIntegerField()
+    input_hash = models.CharField(max_length=64, help_text="SHA-256 of the render inputs.")
+    status = models.CharField(max_length=7, choices=Status.choices, default=Status.QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="pdf_render_jobs",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # Created by the time & effort app before the queue was shared
+        db_table = "timeeffort_pdfrenderjob"
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "object_id", "input_hash"],
+                name="unique_pdf_render_job_inputs",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["kind", "object_id"]),
+        ]
+        verbose_name = "PDF Render Job"
+        verbose_name_plural = "PDF Render Jobs"
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id} — {self.get_status_display()}"
+
+    @property
+    def is_pending(self):
+        return self.status in (self.Status.QUEUED, self.Status.RUNNING)
@@ -0,0 +1,376 @@
+"""
+PDF Render Queue — Service Layer
+
+Apps plug their PDFs into the queue with a PDFJobHandler registered from
+their AppConfig.ready(); everything here is kind-agnostic. Renders run
+inline for a web request (no worker configured), or in a bounded pool of
+WeasyPrint processes driven by `manage.py process_pdf_jobs`.
+"""
+
+import hashlib
+import json
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.template.loader import get_template, render_to_string
+from django.utils import timezone
+
+from utils.pdf_rendering import extract_stylesheets, html_to_pdf, warm_up as warm_up_pdf_renderer
+
+from .models import PDFRenderJob
+
+
+# A RUNNING job older than this is assumed to belong to a dead worker.
+PDF_JOB_STALE_AFTER = timedelta(minutes=15)
+
+# A job whose worker died this many times is treated as poison and failed.
+PDF_JOB_MAX_ATTEMPTS = 3
+
+
+# =============================================================================
+# HANDLERS
+# =============================================================================
+
+
+class PDFJobHandler(ABC):
+    """
+    How one PDFRenderJob kind is loaded, fingerprinted, rendered and stored.
+
+    inputs() must return a JSON-serialisable snapshot of everything the PDF
+    depends on; its hash is the job's dedup key and, with the template, the
+    render-cache key. `templates` lists every template the handler can
+    render, so worker processes can pre-parse their stylesheets.
+    """
+
+    kind = None  # PDFRenderJob.kind, at most 12 characters
+    label = ""
+    model = None
+    templates = ()
+
+    def load(self, object_id):
+        return self.model.objects.get(pk=object_id)
+
+    @abstractmethod
+    def inputs(self, obj):
+        """JSON-serialisable snapshot of everything obj's PDF depends on."""
+
+    @abstractmethod
+    def template_name(self, obj):
+        """Template the PDF for obj is rendered from."""
+
+    @abstractmethod
+    def context(self, obj):
+        """Template context for obj's PDF."""
+
+    @abstractmethod
+    def save(self, obj, pdf_bytes, generated_by=None, render_job=None, render_key=""):
+        """Store the rendered PDF and return the stored output."""
+
+    @abstractmethod
+    def has_output(self, obj, job):
+        """Whether the job's rendered output still exists (it may have been invalidated)."""
+
+    def cached(self, obj, render_key, render_job=None):
+        """Stored output already rendered from render_key, or None to render."""
+        return None
+
+
+_PDF_JOB_HANDLERS = {}
+
+
+def register_pdf_job(handler):
+    """Route jobs of handler.kind to handler. Call from the owning app's AppConfig.ready()."""
+    registered = _PDF_JOB_HANDLERS.get(handler.kind)
+    if registered is not None and type(registered) is not type(handler):
+        raise ImproperlyConfigured(
+            f"PDF job kind {handler.kind!r} is already registered to {type(registered).__name__}."
+        )
+    _PDF_JOB_HANDLERS[handler.kind] = handler
+    return handler
+
+
+def pdf_job_handler(kind):
+    return _PDF_JOB_HANDLERS[kind]
+
+
+def pdf_job_kinds():
+    return [(kind, handler.label) for kind, handler in _PDF_JOB_HANDLERS.items()]
+
+
+# =============================================================================
+# RENDER CACHE
+# =============================================================================
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _template_digest(template_name):
+    """SHA-256 of the template source (the PDF templates extend/include nothing)."""
+    return _sha256(get_template(template_name).template.source.encode())
+
+
+def pdf_render_key(template_name, inputs):
+    """
+    Render-cache key: SHA-256 of the template name, the template source and
+    the data the context is built from. Editing the template or any input
+    produces a new key; everything else reuses the stored PDF. Every host
+    computes the same key for the same object.
+    """
+    payload = json.dumps(
+        [template_name, _template_digest(template_name), inputs], sort_keys=True, default=str
+    )
+    return _sha256(payload.encode())
+
+
+def pdf_input_hash(kind, obj):
+    """SHA-256 over everything the PDF for obj depends on."""
+    payload = json.dumps(pdf_job_handler(kind).inputs(obj), sort_keys=True, default=str)
+    return _sha256(f"{kind}:{obj.pk}:{payload}".encode())
+
+
+def _handler_render_key(handler, obj):
+    return pdf_render_key(handler.template_name(obj), handler.inputs(obj))
+
+
+def render_pdf(handler, obj, generated_by=None, render_job=None):
+    """
+    Render and store obj's PDF in this process, unless the render cache
+    already holds a PDF for the same template and inputs.
+    """
+    render_key = _handler_render_key(handler, obj)
+    cached = handler.cached(obj, render_key, render_job)
+    if cached is not None:
+        return cached
+    pdf_bytes = html_to_pdf(render_to_string(handler.template_name(obj), handler.context(obj)))
+    return handler.save(obj, pdf_bytes, generated_by, render_job, render_key)
+
+
+# =============================================================================
+# QUEUE
+# =============================================================================
+
+
+def enqueue_pdf_render(kind, obj, requested_by=None):
+    """
+    Return the render job for obj's current inputs, creating it if needed.
+
+    An existing job with the same input hash is reused; it is re-queued only
+    if it failed or its output has since been deleted.
+    """
+    job, created = PDFRenderJob.objects.get_or_create(
+        kind=kind,
+        object_id=obj.pk,
+        input_hash=pdf_input_hash(kind, obj),
+        defaults={"requested_by": requested_by},
+    )
+    if not created and (
+        job.status == PDFRenderJob.Status.FAILED
+        or (job.status == PDFRenderJob.Status.DONE and not pdf_job_handler(kind).has_output(obj, job))
+    ):
+        job.status = PDFRenderJob.Status.QUEUED
+        job.error = ""
+        job.save(update_fields=["status", "error"])
+    return job
+
+
+def request_pdf_render(kind, obj, requested_by=None):
+    """
+    Enqueue a render for a web request. Unless settings.PDF_RENDER_WORKER says
+    a process_pdf_jobs worker is running, the job is rendered inline so the
+    caller can serve the result straight away.
+    """
+    job = enqueue_pdf_render(kind, obj, requested_by)
+    if job.status == PDFRenderJob.Status.QUEUED and not settings.PDF_RENDER_WORKER:
+        if claim_pdf_job(job):
+            run_claimed_pdf_job(job)
+    return job
+
+
+def claim_pdf_job(job):
+    """Atomically move one QUEUED job to RUNNING. False if someone else got it first."""
+    now = timezone.now()
+    claimed = PDFRenderJob.objects.filter(pk=job.pk, status=PDFRenderJob.Status.QUEUED).update(
+        status=PDFRenderJob.Status.RUNNING, started_at=now, attempts=F("attempts") + 1
+    )
+    if claimed:
+        job.status = PDFRenderJob.Status.RUNNING
+        job.started_at = now
+        job.attempts += 1
+    return bool(claimed)
+
+
+def _gave_up_error(attempts):
+    return f"Gave up after {attempts} attempts: the render worker died each time."
+
+
+def claim_pdf_jobs(limit, stale_after=PDF_JOB_STALE_AFTER, max_attempts=PDF_JOB_MAX_ATTEMPTS):
+    """
+    Claim up to `limit` queued jobs (oldest first) for a worker. Jobs left
+    RUNNING by a worker that died are reclaimed after `stale_after`, unless
+    they have already had `max_attempts`; those are marked FAILED.
+    """
+    now = timezone.now()
+    stale = Q(status=PDFRenderJob.Status.RUNNING, started_at__lt=now - stale_after)
+    with transaction.atomic():
+        PDFRenderJob.objects.filter(stale, attempts__gte=max_attempts).update(
+            status=PDFRenderJob.Status.FAILED, error=_gave_up_error(max_attempts), finished_at=now
+        )
+        jobs = list(
+            PDFRenderJob.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=PDFRenderJob.Status.QUEUED) | stale)
+            .order_by("created_at")[:limit]
+        )
+        PDFRenderJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=PDFRenderJob.Status.RUNNING, started_at=now, attempts=F("attempts") + 1
+        )
+    for job in jobs:
+        job.status = PDFRenderJob.Status.RUNNING
+        job.started_at = now
+        job.attempts += 1
+    return jobs
+
+
+def release_pdf_jobs(jobs, max_attempts=PDF_JOB_MAX_ATTEMPTS):
+    """
+    Put claimed jobs back in the queue (their render was cut short, not
+    failed). Jobs that have already had `max_attempts` are marked FAILED.
+    """
+    now = timezone.now()
+    gave_up = [job for job in jobs if job.attempts >= max_attempts]
+    requeued = [job for job in jobs if job.attempts < max_attempts]
+    PDFRenderJob.objects.filter(
+        pk__in=[job.pk for job in gave_up], status=PDFRenderJob.Status.RUNNING
+    ).update(status=PDFRenderJob.Status.FAILED, error=_gave_up_error(max_attempts), finished_at=now)
+    PDFRenderJob.objects.filter(
+        pk__in=[job.pk for job in requeued], status=PDFRenderJob.Status.RUNNING
+    ).update(status=PDFRenderJob.Status.QUEUED, started_at=None)
+    for job in gave_up:
+        job.status = PDFRenderJob.Status.FAILED
+        job.error = _gave_up_error(max_attempts)
+        job.finished_at = now
+    for job in requeued:
+        job.status = PDFRenderJob.Status.QUEUED
+        job.started_at = None
+
+
+def complete_pdf_job(job):
+    job.status = PDFRenderJob.Status.DONE
+    job.error = ""
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "finished_at"])
+
+
+def fail_pdf_job(job, exc):
+    job.status = PDFRenderJob.Status.FAILED
+    job.error = f"{type(exc).__name__}: {exc}"
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "error", "finished_at"])
+
+
+# =============================================================================
+# WORKERS
+# =============================================================================
+
+
+def pdf_template_stylesheets():
+    """Inline CSS of every registered PDF template, for pre-parsing in render workers."""
+    template_names = sorted({name for handler in _PDF_JOB_HANDLERS.values() for name in handler.templates})
+    stylesheets = []
+    for template_name in template_names:
+        stylesheets += extract_stylesheets(get_template(template_name).template.source)
+    return stylesheets
+
+
+def pdf_render_executor(workers=None):
+    """
+    Bounded process pool for WeasyPrint renders. Each worker builds its
+    renderer (fonts, parsed template CSS) once, before its first job.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max(1, workers or settings.PDF_RENDER_WORKER_PROCESSES),
+        initializer=warm_up_pdf_renderer,
+        initargs=(pdf_template_stylesheets(),),
+    )
+
+
+def render_pdf_jobs(jobs, executor):
+    """
+    Render claimed jobs with WeasyPrint in `executor` (normally a bounded
+    ProcessPoolExecutor). Cache lookups, templates and storage happen in this
+    process; only HTML strings and PDF bytes cross the process boundary.
+    Returns the number of jobs completed.
+
+    If a render process dies (OOM, segfault) the pool is unusable: the jobs
+    it was holding are re-queued and BrokenProcessPool is raised so the
+    caller can start a new executor.
+    """
+    completed = 0
+    prepared = []
+    for job in jobs:
+        try:
+            handler = pdf_job_handler(job.kind)
+            obj = handler.load(job.object_id)
+            render_key = _handler_render_key(handler, obj)
+            if handler.cached(obj, render_key, job) is not None:
+                complete_pdf_job(job)
+                completed += 1
+                continue
+            html_string = render_to_string(handler.template_name(obj), handler.context(obj))
+            prepared.append((job, handler, obj, render_key, html_string))
+        except Exception as exc:
+            fail_pdf_job(job, exc)
+
+    # Don't let worker processes forked on submit inherit our DB sockets;
+    # Django reconnects on the next query. (Closing inside a transaction
+    # would roll it back, so skip it there.)
+    if not transaction.get_connection().in_atomic_block:
+        connections.close_all()
+
+    futures = {}
+    interrupted = []
+    for job, handler, obj, render_key, html_string in prepared:
+        try:
+            futures[executor.submit(html_to_pdf, html_string)] = (job, handler, obj, render_key)
+        except BrokenProcessPool:
+            interrupted.append(job)
+    for future in as_completed(futures):
+        job, handler, obj, render_key = futures[future]
+        try:
+            pdf_bytes = future.result()
+        except BrokenProcessPool:
+            interrupted.append(job)
+            continue
+        except Exception as exc:
+            fail_pdf_job(job, exc)
+            continue
+        try:
+            handler.save(obj, pdf_bytes, job.requested_by, job, render_key)
+            complete_pdf_job(job)
+            completed += 1
+        except Exception as exc:
+            fail_pdf_job(job, exc)
+
+    if interrupted:
+        release_pdf_jobs(interrupted)
+        raise BrokenProcessPool(f"A PDF render process died; {len(interrupted)} job(s) re-queued.")
+    return completed
+
+
+def run_claimed_pdf_job(job):
+    """Render a claimed job in this process. Failures are recorded on the job."""
+    try:
+        handler = pdf_job_handler(job.kind)
+        result = render_pdf(handler, handler.load(job.object_id), job.requested_by, job)
+    except Exception as exc:
+        fail_pdf_job(job, exc)
+        return None
+    complete_pdf_job(job)
+    return result
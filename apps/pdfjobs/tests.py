@@ -0,0 +1,129 @@
+"""
+PDF render queue tests.
+
+Coverage:
+- Handler registration (per-app kinds, conflicting registrations)
+- PDFJobHandler is abstract
+- Jobs of an unregistered kind fail instead of crashing the worker
+- Jobs whose worker keeps dying are failed after PDF_JOB_MAX_ATTEMPTS
+
+The queue itself (dedup, inline fallback, worker claim/render) is exercised
+through real handlers in apps.timeeffort.tests and apps.reimbursements.tests.
+"""
+
+from datetime import timedelta
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.reimbursements.services import PACKET_PDF_JOB, PacketPDFJob
+from apps.timeeffort.models import FINAL_PDF_JOB, WEEKLY_PDF_JOB
+from apps.timeeffort.services import WeeklyPDFJob
+
+from .models import PDFRenderJob
+from .services import (
+    PDF_JOB_MAX_ATTEMPTS,
+    PDFJobHandler,
+    claim_pdf_jobs,
+    pdf_job_handler,
+    register_pdf_job,
+    release_pdf_jobs,
+    render_pdf_jobs,
+    run_claimed_pdf_job,
+)
+
+
+class HandlerRegistryTests(TestCase):
+    def test_apps_register_their_kinds(self):
+        self.assertIsInstance(pdf_job_handler(WEEKLY_PDF_JOB), WeeklyPDFJob)
+        self.assertIsInstance(pdf_job_handler(PACKET_PDF_JOB), PacketPDFJob)
+        self.assertEqual(
+            {kind for kind, label in PDFRenderJob._meta.get_field("kind").choices},
+            {WEEKLY_PDF_JOB, FINAL_PDF_JOB, PACKET_PDF_JOB},
+        )
+
+    def test_reregistering_same_handler_is_allowed(self):
+        register_pdf_job(WeeklyPDFJob())
+
+    def test_kind_taken_by_another_handler_is_rejected(self):
+        class Impostor(WeeklyPDFJob):
+            pass
+
+        with self.assertRaises(ImproperlyConfigured):
+            register_pdf_job(Impostor())
+        self.assertIsInstance(pdf_job_handler(WEEKLY_PDF_JOB), WeeklyPDFJob)
+
+    def test_handler_must_implement_abstract_methods(self):
+        class Incomplete(PDFJobHandler):
+            kind = "INCOMPLETE"
+
+            def inputs(self, obj):
+                return {}
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+class UnknownKindTests(TestCase):
+    def setUp(self):
+        self.job = PDFRenderJob.objects.create(kind="RETIRED", object_id=1, input_hash="x")
+
+    def test_inline_run_marks_job_failed(self):
+        self.assertEqual(len(claim_pdf_jobs(limit=5)), 1)
+        self.job.refresh_from_db()
+
+        self.assertIsNone(run_claimed_pdf_job(self.job))
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, PDFRenderJob.Status.FAILED)
+        self.assertIn("KeyError", self.job.error)
+
+    def test_worker_batch_marks_job_failed(self):
+        jobs = claim_pdf_jobs(limit=5)
+
+        self.assertEqual(render_pdf_jobs(jobs, executor=None), 0)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, PDFRenderJob.Status.FAILED)
+
+
+class MaxAttemptsTests(TestCase):
+    def make_stale_job(self, attempts):
+        return PDFRenderJob.objects.create(
+            kind=WEEKLY_PDF_JOB,
+            object_id=attempts,
+            input_hash=f"stale-{attempts}",
+            status=PDFRenderJob.Status.RUNNING,
+            started_at=timezone.now() - timedelta(hours=1),
+            attempts=attempts,
+        )
+
+    def test_stale_job_is_reclaimed_below_the_limit(self):
+        job = self.make_stale_job(PDF_JOB_MAX_ATTEMPTS - 1)
+
+        self.assertEqual(claim_pdf_jobs(limit=5), [job])
+        job.refresh_from_db()
+        self.assertEqual(job.status, PDFRenderJob.Status.RUNNING)
+        self.assertEqual(job.attempts, PDF_JOB_MAX_ATTEMPTS)
+
+    def test_stale_job_at_the_limit_is_failed(self):
+        job = self.make_stale_job(PDF_JOB_MAX_ATTEMPTS)
+
+        self.assertEqual(claim_pdf_jobs(limit=5), [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, PDFRenderJob.Status.FAILED)
+        self.assertIn(f"{PDF_JOB_MAX_ATTEMPTS} attempts", job.error)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(job.attempts, PDF_JOB_MAX_ATTEMPTS)
+
+    def test_released_job_at_the_limit_is_failed(self):
+        retry = self.make_stale_job(PDF_JOB_MAX_ATTEMPTS - 2)
+        poison = self.make_stale_job(PDF_JOB_MAX_ATTEMPTS - 1)
+        claimed = claim_pdf_jobs(limit=5)
+
+        release_pdf_jobs(claimed)
+
+        retry.refresh_from_db()
+        poison.refresh_from_db()
+        self.assertEqual(retry.status, PDFRenderJob.Status.QUEUED)
+        self.assertEqual(poison.status, PDFRenderJob.Status.FAILED)
+        self.assertEqual(claim_pdf_jobs(limit=5), [retry])
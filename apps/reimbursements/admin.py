@@ -40,17 +40,35 @@ class ReceiptInline(admin.TabularInline):
 
     model = Receipt
     extra = 1
-    readonly_fields = ["file_preview", "file_size", "created_at"]
-    fields = ["file_preview", "file", "original_filename", "file_size", "created_at"]
+    readonly_fields = ["file_preview", "file_size", "processing_status", "created_at"]
+    fields = ["file_preview", "file", "original_filename", "file_size", "processing_status", "created_at"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_duplicate_count()
 
     def file_preview(self, obj):
-        """Show link to view/download the receipt."""
-        if obj.file:
-            return format_html(
+        """Show the thumbnail (or a link), opening the original upload."""
+        if obj.thumbnail:
+            preview = format_html(
+                '<a href="{}" target="_blank"><img src="{}" alt="{}" style="max-height: 80px;"></a>',
+                obj.file.url,
+                obj.thumbnail.url,
+                obj.original_filename,
+            )
+        elif obj.file:
+            preview = format_html(
                 '<a href="{}" target="_blank">View Receipt</a>',
                 obj.file.url
             )
-        return "-"
+        else:
+            return "-"
+        if getattr(obj, "duplicate_count", 0):
+            preview = format_html(
+                '{}<br><span style="color: #dc3545;">(duplicate of {} receipt(s) on other requests)</span>',
+                preview,
+                obj.duplicate_count,
+            )
+        return preview
     file_preview.short_description = "Preview"
 
 
@@ -320,6 +338,24 @@ class HasForeignCurrencyFilter(admin.SimpleListFilter):
         return queryset
 
 
+class DuplicateReceiptFilter(admin.SimpleListFilter):
+    """Receipts (or requests with receipts) also submitted on another request."""
+
+    title = "duplicate receipts"
+    parameter_name = "duplicate_receipts"
+
+    def lookups(self, request, model_admin):
+        return [("yes", "Duplicated on another request")]
+
+    def queryset(self, request, queryset):
+        if self.value() != "yes":
+            return queryset
+        duplicated = Receipt.objects.duplicated()
+        if queryset.model is Receipt:
+            return queryset.filter(pk__in=duplicated.values("pk"))
+        return queryset.filter(pk__in=duplicated.values("line_item__request"))
+
+
 # =============================================================================
 # MAIN ADMIN CLASS
 # =============================================================================
@@ -355,6 +391,7 @@ class ReimbursementRequestAdmin(admin.ModelAdmin):
         NeedsActionFilter,
         "status",
         ProgramFilter,
+        DuplicateReceiptFilter,
         "payment_method",
         ("submitted_at", admin.DateFieldListFilter),
     ]
@@ -683,6 +720,21 @@ class ReimbursementRequestAdmin(admin.ModelAdmin):
 
         return mark_safe(" ".join(buttons)) if buttons else "-"
 
+    def get_search_results(self, request, queryset, search_term):
+        """Also match an exact bank account or passport number via blind index."""
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term.strip():
+            results |= queryset.paying_into(search_term) | queryset.with_passport_number(search_term)
+        return results, may_have_duplicates
+
+    def get_queryset(self, request):
+        """The change form shows the encrypted fields; load them with the row there."""
+        queryset = super().get_queryset(request)
+        match = request.resolver_match
+        if match and match.url_name == f"{self.opts.app_label}_{self.opts.model_name}_change":
+            queryset = queryset.with_secrets()
+        return queryset
+
     # -------------------------------------------------------------------------
     # CUSTOM URLS FOR WORKFLOW ACTIONS
     # -------------------------------------------------------------------------
@@ -729,9 +781,6 @@ class ReimbursementRequestAdmin(admin.ModelAdmin):
                 item.amount_approved = item.amount_requested
                 item.save()
 
-        # Recalculate total
-        obj.total_requested = obj.calculate_total_requested()
-
         obj.approved_by = request.user
         obj.approve()
         obj.save()
@@ -794,19 +843,6 @@ class ReimbursementRequestAdmin(admin.ModelAdmin):
         messages.warning(request, f"Request #{pk} has been cancelled.")
         return HttpResponseRedirect(reverse("admin:reimbursements_reimbursementrequest_changelist"))
 
-    # -------------------------------------------------------------------------
-    # SAVE HOOKS
-    # -------------------------------------------------------------------------
-
-    def save_related(self, request, form, formsets, change):
-        """Recalculate totals after saving line items."""
-        super().save_related(request, form, formsets, change)
-
-        # Recalculate total_requested from line items
-        obj = form.instance
-        obj.total_requested = obj.calculate_total_requested()
-        obj.save(update_fields=["total_requested"])
-
     # -------------------------------------------------------------------------
     # PERMISSIONS
     # -------------------------------------------------------------------------
@@ -881,10 +917,21 @@ class ExpenseLineItemAdmin(admin.ModelAdmin):
 class ReceiptAdmin(admin.ModelAdmin):
     """Admin for receipts."""
 
-    list_display = ["id", "line_item", "original_filename", "file_size_display", "created_at", "file_link"]
-    list_filter = ["created_at"]
-    search_fields = ["original_filename"]
-    readonly_fields = ["file_size", "created_at"]
+    list_display = [
+        "id", "line_item", "original_filename", "file_size_display", "duplicate_display", "created_at", "file_link",
+    ]
+    list_filter = [DuplicateReceiptFilter, "created_at"]
+    search_fields = ["original_filename", "sha256"]
+    readonly_fields = ["file_size", "sha256", "created_at"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_duplicate_count()
+
+    @admin.display(description="Duplicates", ordering="duplicate_count")
+    def duplicate_display(self, obj):
+        if obj.duplicate_count:
+            return format_html('<span style="color: #dc3545;">{}</span>', obj.duplicate_count)
+        return "-"
 
     @admin.display(description="Size")
     def file_size_display(self, obj):
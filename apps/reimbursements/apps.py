@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class ReimbursementsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.reimbursements"
+
+    def ready(self):
+        from apps.pdfjobs.services import register_pdf_job
+
+        from . import signals
+        from .services import PacketPDFJob
+
+        register_pdf_job(PacketPDFJob())
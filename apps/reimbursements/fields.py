@@ -1,27 +1,119 @@
 """
 Custom encrypted field for sensitive data.
 
-Uses Fernet symmetric encryption from the cryptography library.
+Uses Fernet symmetric encryption from the cryptography library, with
+MultiFernet so the key can be rotated without losing existing data.
+BlindIndexField stores a keyed HMAC of an encrypted field's normalized
+value so it can be matched with an indexed equality query.
 Works with Django 4.0+ (unlike the outdated django-fernet-fields package).
 """
 
+import hashlib
+import hmac
+from functools import lru_cache
+
 from django.conf import settings
+from django.core.signals import setting_changed
 from django.db import models
-from cryptography.fernet import Fernet, InvalidToken
+from django.db.models.query_utils import DeferredAttribute
+from django.dispatch import receiver
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+
 
+ENCRYPTION_SETTINGS = {'FIELD_ENCRYPTION_KEY', 'FIELD_ENCRYPTION_RETIRED_KEYS', 'FIELD_BLIND_INDEX_KEY'}
 
+
+@lru_cache(maxsize=None)
 def get_fernet():
-    """Get Fernet instance using the configured encryption key."""
+    """
+    Get the cipher for the configured encryption keys.
+
+    FIELD_ENCRYPTION_KEY encrypts new values. FIELD_ENCRYPTION_RETIRED_KEYS
+    (newest first) are still accepted for decryption, so the primary key can
+    be rotated and existing rows re-encrypted with `reencrypt_fields`.
+
+    Built once per process rather than per value; a change to either
+    setting (override_settings in tests) clears the cache.
+    """
     key = getattr(settings, 'FIELD_ENCRYPTION_KEY', None)
     if not key:
         raise ValueError(
             "FIELD_ENCRYPTION_KEY not set in settings. "
             "Generate one with: python -c 'from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())'"
         )
-    # Ensure key is bytes
-    if isinstance(key, str):
-        key = key.encode()
-    return Fernet(key)
+    retired = getattr(settings, 'FIELD_ENCRYPTION_RETIRED_KEYS', None) or ()
+    keys = [k.encode() if isinstance(k, str) else k for k in (key, *retired)]
+    if len(keys) == 1:
+        # No rotation in progress: skip MultiFernet's per-token key loop.
+        return Fernet(keys[0])
+    return MultiFernet([Fernet(k) for k in keys])
+
+
+@receiver(setting_changed)
+def _reset_fernet(*, setting, **kwargs):
+    if setting in ENCRYPTION_SETTINGS:
+        get_fernet.cache_clear()
+        _blind_index_key.cache_clear()
+
+
+def decrypt(token):
+    """Decrypt a stored token, raising ValueError if no configured key fits."""
+    try:
+        return get_fernet().decrypt(token.encode()).decode()
+    except InvalidToken:
+        raise ValueError(
+            "Failed to decrypt field value. The FIELD_ENCRYPTION_KEY may be incorrect "
+            "or the data may be corrupted. Check your encryption key configuration."
+        )
+
+
+class Ciphertext:
+    """
+    An encrypted value as loaded from the database, decrypted on first use.
+
+    Model instances never expose this: the field's descriptor swaps in the
+    plaintext the first time the attribute is read. It surfaces only from
+    values()/values_list(), where str() gives the plaintext.
+    """
+
+    __slots__ = ('token', '_plaintext')
+
+    def __init__(self, token):
+        self.token = token
+        self._plaintext = None
+
+    def decrypt(self):
+        if self._plaintext is None:
+            self._plaintext = decrypt(self.token)
+        return self._plaintext
+
+    def __str__(self):
+        return self.decrypt()
+
+    def __eq__(self, other):
+        if isinstance(other, Ciphertext):
+            other = other.decrypt()
+        return self.decrypt() == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '<Ciphertext>'
+
+
+class EncryptedAttribute(DeferredAttribute):
+    """Decrypt a loaded Ciphertext on first access and cache the plaintext."""
+
+    def __get__(self, instance, cls=None):
+        value = super().__get__(instance, cls)
+        if isinstance(value, Ciphertext):
+            value = instance.__dict__[self.field.attname] = value.decrypt()
+        return value
+
+    def __set__(self, instance, value):
+        # Defining __set__ makes this a data descriptor, so reads go through
+        # __get__ even once the value is in the instance __dict__.
+        instance.__dict__[self.field.attname] = value
 
 
 class EncryptedCharField(models.CharField):
@@ -30,10 +122,13 @@ class EncryptedCharField(models.CharField):
 
     The value is encrypted using Fernet (AES-128-CBC with HMAC).
     In the database, values are stored as base64-encoded encrypted strings.
-    In Python, values are decrypted automatically when accessed.
+    In Python, values are decrypted lazily: loading a row costs no crypto
+    work, and each value is decrypted the first time it is read. A row
+    saved without reading the value writes the stored ciphertext back as is.
     """
 
     description = "An encrypted CharField"
+    descriptor_class = EncryptedAttribute
 
     def __init__(self, *args, **kwargs):
         # Store the original max_length for deconstruct()
@@ -50,8 +145,17 @@ class EncryptedCharField(models.CharField):
         kwargs['max_length'] = self._original_max_length
         return name, path, args, kwargs
 
+    def pre_save(self, model_instance, add):
+        """Pass an unread Ciphertext through without decrypting it."""
+        value = model_instance.__dict__.get(self.attname)
+        if isinstance(value, Ciphertext):
+            return value
+        return super().pre_save(model_instance, add)
+
     def get_prep_value(self, value):
         """Encrypt value before saving to database."""
+        if isinstance(value, Ciphertext):
+            return value.token
         if value is None or value == '':
             return value
 
@@ -64,22 +168,74 @@ class EncryptedCharField(models.CharField):
         return encrypted.decode()  # Store as string in DB
 
     def from_db_value(self, value, expression, connection):
-        """Decrypt value when reading from database."""
+        """Wrap the stored token; decryption waits until the value is read."""
         if value is None or value == '':
             return value
-
-        try:
-            fernet = get_fernet()
-            decrypted = fernet.decrypt(value.encode())
-            return decrypted.decode()
-        except InvalidToken:
-            raise ValueError(
-                "Failed to decrypt field value. The FIELD_ENCRYPTION_KEY may be incorrect "
-                "or the data may be corrupted. Check your encryption key configuration."
-            )
+        return Ciphertext(value)
 
     def to_python(self, value):
         """Convert value to Python string."""
         if value is None:
             return value
         return str(value)
+
+
+# =============================================================================
+# BLIND INDEX
+# =============================================================================
+
+
+@lru_cache(maxsize=None)
+def _blind_index_key():
+    key = getattr(settings, 'FIELD_BLIND_INDEX_KEY', None)
+    if not key:
+        raise ValueError("FIELD_BLIND_INDEX_KEY not set in settings.")
+    return key.encode() if isinstance(key, str) else key
+
+
+def normalize_for_index(value):
+    """Drop whitespace and hyphens and uppercase, so formatting can't split matches."""
+    return ''.join(str(value).split()).replace('-', '').upper()
+
+
+def blind_index(value):
+    """Keyed HMAC-SHA256 of the normalized value; '' for an empty value."""
+    normalized = normalize_for_index(value or '')
+    if not normalized:
+        return ''
+    return hmac.new(_blind_index_key(), normalized.encode(), hashlib.sha256).hexdigest()
+
+
+class BlindIndexField(models.CharField):
+    """
+    An indexed HMAC digest of another (encrypted) field on the same model.
+
+    Recomputed on save from the source field's plaintext. If the source was
+    never loaded, or was loaded but not read, the stored digest is kept, so
+    saving an unrelated change costs no decryption. Values written by
+    queryset.update() bypass this; run `backfill_blind_indexes` afterwards.
+    """
+
+    description = "A blind index of an encrypted field"
+
+    def __init__(self, *args, source=None, **kwargs):
+        self.source = source
+        kwargs.setdefault('max_length', 64)
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('default', '')
+        kwargs.setdefault('editable', False)
+        kwargs.setdefault('db_index', True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['source'] = self.source
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = model_instance.__dict__.get(self.source, Ciphertext)
+        if value is Ciphertext or isinstance(value, Ciphertext):
+            return super().pre_save(model_instance, add)
+        digest = blind_index(value)
+        setattr(model_instance, self.attname, digest)
+        return digest
@@ -0,0 +1,69 @@
+"""
+Recompute every BlindIndexField from its encrypted source field.
+
+Run once after adding blind indexes, after changing FIELD_BLIND_INDEX_KEY,
+and after any queryset.update() that wrote encrypted values directly. Rows
+are walked in primary-key order in fixed-size chunks and only rows whose
+digest changed are written back, so the command is safe to re-run.
+
+Usage:
+    python manage.py backfill_blind_indexes
+    python manage.py backfill_blind_indexes --batch-size 200
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from apps.reimbursements.fields import BlindIndexField, blind_index
+
+
+def blind_indexed_models():
+    """Yield (model, {index field name: source field name}) for every model with blind indexes."""
+    for model in apps.get_models():
+        indexes = {f.name: f.source for f in model._meta.concrete_fields if isinstance(f, BlindIndexField)}
+        if indexes:
+            yield model, indexes
+
+
+class Command(BaseCommand):
+    help = "Recompute blind-index digests of encrypted fields"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows loaded per chunk (default: 500)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        for model, indexes in blind_indexed_models():
+            # _base_manager: default managers may defer the encrypted columns.
+            queryset = model._base_manager.order_by("pk").only("pk", *indexes, *indexes.values())
+
+            scanned, updated, last_pk = 0, 0, None
+            while True:
+                chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+                batch = list(chunk[:batch_size])
+                if not batch:
+                    break
+                changed = []
+                for obj in batch:
+                    dirty = False
+                    for index, source in indexes.items():
+                        digest = blind_index(getattr(obj, source))
+                        if getattr(obj, index) != digest:
+                            setattr(obj, index, digest)
+                            dirty = True
+                    if dirty:
+                        changed.append(obj)
+                if changed:
+                    model._base_manager.bulk_update(changed, list(indexes))
+                scanned += len(batch)
+                updated += len(changed)
+                last_pk = batch[-1].pk
+
+            self.stdout.write(self.style.SUCCESS(
+                f"{model._meta.label}: {updated} of {scanned} row(s) updated ({', '.join(indexes)})."
+            ))
@@ -0,0 +1,44 @@
+"""
+Optimize uploaded receipt images: downscaled, recompressed renditions and
+thumbnails for admin previews. Originals are kept untouched for audit.
+
+Usage:
+    python manage.py process_receipts              # run forever, polling
+    python manage.py process_receipts --once       # drain the queue and exit
+    python manage.py process_receipts --batch 50
+
+Set RECEIPT_IMAGE_WORKER=1 for the web processes while this is running so
+uploads are left for the worker instead of being processed after upload.
+
+Deploy step: run `process_receipts --once` after migrating to reimbursements
+0015, even without a worker. The migration marks every existing receipt
+pending and nothing else processes them.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.reimbursements.services import process_pending_receipts
+
+
+class Command(BaseCommand):
+    help = "Build optimized renditions and thumbnails for pending receipt uploads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=20, help="Receipts processed per batch (default: 20)")
+        parser.add_argument("--poll", type=float, default=5.0, help="Seconds to wait when the queue is empty (default: 5)")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty")
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                processed = process_pending_receipts(options["batch"])
+                if not processed:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll"])
+                    continue
+                self.stdout.write(self.style.SUCCESS(f"Processed {processed} receipt(s)."))
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping receipt worker.")
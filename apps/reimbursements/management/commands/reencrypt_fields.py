@@ -0,0 +1,70 @@
+"""
+Re-encrypt every EncryptedCharField value with the current primary key.
+
+Run after rotating keys: set the new FIELD_ENCRYPTION_KEY, move the old
+one into FIELD_ENCRYPTION_RETIRED_KEYS, run this command, then remove the
+retired key. Blind indexes use their own FIELD_BLIND_INDEX_KEY and stay
+valid through a rotation. Rows are walked in primary-key order in
+fixed-size chunks and written back with bulk_update, so memory stays flat
+on large tables and an interrupted run can simply be restarted.
+
+Usage:
+    python manage.py reencrypt_fields
+    python manage.py reencrypt_fields --batch-size 200
+    python manage.py reencrypt_fields --dry-run
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from apps.reimbursements.fields import EncryptedCharField
+
+
+def encrypted_models():
+    """Yield (model, [field names]) for every model with encrypted fields."""
+    for model in apps.get_models():
+        names = [f.name for f in model._meta.concrete_fields if isinstance(f, EncryptedCharField)]
+        if names:
+            yield model, names
+
+
+class Command(BaseCommand):
+    help = "Re-encrypt encrypted fields with the current FIELD_ENCRYPTION_KEY"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows loaded and written per chunk (default: 500)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count the rows that would be re-encrypted without writing",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        for model, fields in encrypted_models():
+            label = model._meta.label
+            # _base_manager: default managers may defer the encrypted columns.
+            queryset = model._base_manager.order_by("pk").only("pk", *fields)
+
+            if options["dry_run"]:
+                self.stdout.write(f"{label}: {queryset.count()} row(s) would be re-encrypted ({', '.join(fields)}).")
+                continue
+
+            total, last_pk = 0, None
+            while True:
+                chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+                batch = list(chunk[:batch_size])
+                if not batch:
+                    break
+                # bulk_update reads each value (decrypting with any configured
+                # key) and writes it back encrypted with the primary key.
+                model._base_manager.bulk_update(batch, fields)
+                total += len(batch)
+                last_pk = batch[-1].pk
+
+            self.stdout.write(self.style.SUCCESS(f"{label}: re-encrypted {total} row(s) ({', '.join(fields)})."))
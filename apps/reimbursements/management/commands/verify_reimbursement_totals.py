@@ -0,0 +1,66 @@
+"""
+Check the stored request totals against their line items, optionally repairing them.
+
+ExpenseLineItem keeps ReimbursementRequest.total_requested and
+total_approved current with in-place increments on every save and delete.
+Writes that bypass the model (queryset.update(), bulk_create(), raw SQL)
+skip those increments; this command finds the drift with one grouped
+query over all requests and, with --fix, rewrites the drifted rows from
+their line items in a single UPDATE.
+
+A NULL total_approved and a zero one both mean "nothing approved" and
+are not reported.
+
+Usage:
+    python manage.py verify_reimbursement_totals
+    python manage.py verify_reimbursement_totals --fix
+"""
+
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from apps.reimbursements.models import ReimbursementRequest
+
+ZERO = Decimal("0.00")
+
+
+class Command(BaseCommand):
+    help = "Verify (and with --fix, repair) stored reimbursement totals"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Recalculate the drifted requests from their line items",
+        )
+
+    def handle(self, *args, **options):
+        rows = (
+            ReimbursementRequest.objects.with_totals()
+            .order_by("pk")
+            .values_list("pk", "total_requested", "calculated_requested", "total_approved", "calculated_approved")
+        )
+
+        checked, drifted = 0, []
+        for pk, requested, calculated_requested, approved, calculated_approved in rows.iterator():
+            checked += 1
+            if requested == calculated_requested and (approved or ZERO) == (calculated_approved or ZERO):
+                continue
+            drifted.append(pk)
+            self.stdout.write(
+                f"Request #{pk}: requested {requested} (line items {calculated_requested}), "
+                f"approved {approved} (line items {calculated_approved})"
+            )
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS(f"All {checked} request total(s) match their line items."))
+            return
+
+        if options["fix"]:
+            ReimbursementRequest.objects.filter(pk__in=drifted).recalculate_totals()
+            self.stdout.write(self.style.SUCCESS(f"Repaired {len(drifted)} of {checked} request(s)."))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"{len(drifted)} of {checked} request(s) drifted; run with --fix to repair."
+            ))
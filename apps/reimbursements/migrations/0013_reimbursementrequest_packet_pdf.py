@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reimbursements", "0012_encrypt_passport_number"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reimbursementrequest",
+            name="packet_pdf",
+            field=models.FileField(
+                blank=True,
+                help_text="Most recently rendered packet PDF (rendered by the PDF worker).",
+                upload_to="reimbursements/packets/%Y/%m/",
+            ),
+        ),
+        migrations.AddField(
+            model_name="reimbursementrequest",
+            name="packet_generated_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+import apps.reimbursements.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reimbursements", "0013_reimbursementrequest_packet_pdf"),
+    ]
+
+    # Existing rows start with empty digests; 0018 fills them in.
+    operations = [
+        migrations.AddField(
+            model_name="reimbursementrequest",
+            name="passport_number_index",
+            field=apps.reimbursements.fields.BlindIndexField(
+                blank=True, db_index=True, default="", editable=False, max_length=64, source="passport_number"
+            ),
+        ),
+        migrations.AddField(
+            model_name="reimbursementrequest",
+            name="bank_routing_number_index",
+            field=apps.reimbursements.fields.BlindIndexField(
+                blank=True, db_index=True, default="", editable=False, max_length=64, source="bank_routing_number"
+            ),
+        ),
+        migrations.AddField(
+            model_name="reimbursementrequest",
+            name="bank_account_number_index",
+            field=apps.reimbursements.fields.BlindIndexField(
+                blank=True, db_index=True, default="", editable=False, max_length=64, source="bank_account_number"
+            ),
+        ),
+    ]
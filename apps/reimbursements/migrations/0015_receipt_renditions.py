@@ -0,0 +1,49 @@
+import apps.reimbursements.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reimbursements", "0014_reimbursementrequest_blind_indexes"),
+    ]
+
+    # Existing receipts start PENDING. Nothing on the upload path picks them
+    # up, so run `manage.py process_receipts --once` after migrating (or keep
+    # a worker running) to build their renditions.
+    operations = [
+        migrations.AddField(
+            model_name="receipt",
+            name="optimized",
+            field=models.FileField(
+                blank=True,
+                help_text="Downscaled, recompressed copy of an image receipt.",
+                upload_to=apps.reimbursements.models.receipt_rendition_path,
+            ),
+        ),
+        migrations.AddField(
+            model_name="receipt",
+            name="thumbnail",
+            field=models.FileField(blank=True, upload_to=apps.reimbursements.models.receipt_rendition_path),
+        ),
+        migrations.AddField(
+            model_name="receipt",
+            name="processing_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("done", "Done"),
+                    ("skipped", "Skipped (not an image)"),
+                    ("failed", "Failed"),
+                ],
+                db_index=True,
+                default="pending",
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="receipt",
+            name="processed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
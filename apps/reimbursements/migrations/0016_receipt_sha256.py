@@ -0,0 +1,48 @@
+import hashlib
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def backfill_sha256(apps, schema_editor):
+    # Hash stored receipts in place; existing blobs are not merged.
+    Receipt = apps.get_model("reimbursements", "Receipt")
+    batch = []
+    for receipt in Receipt.objects.exclude(file="").only("pk", "file").iterator(chunk_size=BATCH_SIZE):
+        digest = hashlib.sha256()
+        try:
+            with receipt.file.open("rb") as fh:
+                for chunk in fh.chunks():
+                    digest.update(chunk)
+        except OSError:
+            continue
+        receipt.sha256 = digest.hexdigest()
+        batch.append(receipt)
+        if len(batch) >= BATCH_SIZE:
+            Receipt.objects.bulk_update(batch, ["sha256"])
+            batch = []
+    if batch:
+        Receipt.objects.bulk_update(batch, ["sha256"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reimbursements", "0015_receipt_renditions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="receipt",
+            name="sha256",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                help_text="SHA-256 of the file content; identical uploads share one stored file.",
+                max_length=64,
+            ),
+        ),
+        migrations.RunPython(backfill_sha256, migrations.RunPython.noop),
+    ]
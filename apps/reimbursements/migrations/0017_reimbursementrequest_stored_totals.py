@@ -0,0 +1,52 @@
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def recalculate_totals(apps, schema_editor):
+    # Drafts never had total_requested set before submission; fill every
+    # request from its line items once, after which the items keep it current.
+    ReimbursementRequest = apps.get_model("reimbursements", "ReimbursementRequest")
+    ExpenseLineItem = apps.get_model("reimbursements", "ExpenseLineItem")
+    items = ExpenseLineItem.objects.filter(request=OuterRef("pk")).order_by().values("request")
+    ReimbursementRequest.objects.update(
+        total_requested=Coalesce(
+            Subquery(items.annotate(total=Sum("amount_requested")).values("total")),
+            Value(Decimal("0.00")),
+        ),
+        total_approved=Subquery(items.annotate(total=Sum("amount_approved")).values("total")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reimbursements", "0016_receipt_sha256"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="reimbursementrequest",
+            name="total_requested",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=Decimal("0.00"),
+                help_text="Sum of all requested amounts (kept current by the line items).",
+                max_digits=10,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="reimbursementrequest",
+            name="total_approved",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=2,
+                help_text="Sum of approved amounts (kept current by the line items).",
+                max_digits=10,
+                null=True,
+            ),
+        ),
+        migrations.RunPython(recalculate_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+from apps.reimbursements.fields import blind_index
+
+BATCH_SIZE = 500
+
+# Blind index field -> encrypted source field (see 0014).
+INDEXES = {
+    "passport_number_index": "passport_number",
+    "bank_routing_number_index": "bank_routing_number",
+    "bank_account_number_index": "bank_account_number",
+}
+
+
+def backfill_blind_indexes(apps, schema_editor):
+    # 0014 added the digests empty; compute them for existing rows so
+    # lookups are right as soon as the schema is. Same work as
+    # `manage.py backfill_blind_indexes`, which stays for key changes.
+    ReimbursementRequest = apps.get_model("reimbursements", "ReimbursementRequest")
+    queryset = ReimbursementRequest.objects.only("pk", *INDEXES, *INDEXES.values())
+    batch = []
+    for request in queryset.iterator(chunk_size=BATCH_SIZE):
+        for index, source in INDEXES.items():
+            setattr(request, index, blind_index(getattr(request, source)))
+        batch.append(request)
+        if len(batch) >= BATCH_SIZE:
+            ReimbursementRequest.objects.bulk_update(batch, list(INDEXES))
+            batch = []
+    if batch:
+        ReimbursementRequest.objects.bulk_update(batch, list(INDEXES))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reimbursements", "0017_reimbursementrequest_stored_totals"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_blind_indexes, migrations.RunPython.noop),
+    ]
@@ -8,16 +8,18 @@ Key entities:
 - Receipt: File attachments for expenses
 """
 
+import hashlib
 from decimal import Decimal
 from django.conf import settings
-from django.db import models
-from django.db.models import Sum
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django_fsm import FSMField, transition
 
 from people.models import People
 from enrollments.models import Enrollment
-from .fields import EncryptedCharField
+from .fields import BlindIndexField, EncryptedCharField, blind_index
 
 
 # =============================================================================
@@ -133,12 +135,81 @@ class ReimbursementRequestQuerySet(models.QuerySet):
         return self.filter(person=person)
 
     def with_totals(self):
-        """Annotate with calculated totals from line items."""
+        """Annotate with totals recomputed from line items (one grouped query)."""
         return self.annotate(
-            calculated_requested=Sum("line_items__amount_requested"),
+            calculated_requested=Coalesce(Sum("line_items__amount_requested"), Value(Decimal("0.00"))),
             calculated_approved=Sum("line_items__amount_approved"),
         )
 
+    def recalculate_totals(self):
+        """Rewrite the stored line-item totals from the line items, in one UPDATE."""
+        items = ExpenseLineItem.objects.filter(request=OuterRef("pk")).order_by().values("request")
+        return self.update(
+            total_requested=Coalesce(
+                Subquery(items.annotate(total=Sum("amount_requested")).values("total")),
+                Value(Decimal("0.00")),
+            ),
+            total_approved=Subquery(items.annotate(total=Sum("amount_approved")).values("total")),
+        )
+
+    def paying_into(self, account_number, routing_number=None):
+        """Requests paying into a bank account, matched on its blind index."""
+        digest = blind_index(account_number)
+        if not digest:
+            return self.none()
+        qs = self.filter(bank_account_number_index=digest)
+        if routing_number:
+            qs = qs.filter(bank_routing_number_index=blind_index(routing_number))
+        return qs
+
+    def with_passport_number(self, passport_number):
+        """Requests recording a passport number, matched on its blind index."""
+        digest = blind_index(passport_number)
+        if not digest:
+            return self.none()
+        return self.filter(passport_number_index=digest)
+
+    def with_secrets(self):
+        """Load the encrypted columns the default manager defers."""
+        return self.defer(None)
+
+
+# Bank and passport columns: ciphertext that lists, exports and the
+# dashboard never display, so the default manager leaves them unloaded.
+ENCRYPTED_FIELDS = ("passport_number", "bank_routing_number", "bank_account_number")
+
+# Kept current by ExpenseLineItem with in-place increments; never written
+# back from a ReimbursementRequest instance.
+LINE_ITEM_TOTAL_FIELDS = ("total_requested", "total_approved")
+
+
+class ReimbursementRequestManager(models.Manager.from_queryset(ReimbursementRequestQuerySet)):
+    """Default manager; defers ENCRYPTED_FIELDS until with_secrets() or access."""
+
+    def get_queryset(self):
+        return super().get_queryset().defer(*ENCRYPTED_FIELDS)
+
+
+class ReceiptQuerySet(models.QuerySet):
+    """Queryset for receipts, with cross-request duplicate detection."""
+
+    def with_duplicate_count(self):
+        """Annotate how many receipts on *other* requests have identical content."""
+        others = (
+            self.model.objects.filter(sha256=OuterRef("sha256"))
+            .exclude(sha256="")
+            .exclude(line_item__request=OuterRef("line_item__request"))
+            .order_by()
+            .values("sha256")
+            .annotate(n=Count("pk"))
+            .values("n")
+        )
+        return self.annotate(duplicate_count=Coalesce(Subquery(others), 0))
+
+    def duplicated(self):
+        """Receipts whose content was also submitted on another request."""
+        return self.with_duplicate_count().filter(duplicate_count__gt=0)
+
 
 # =============================================================================
 # MAIN MODELS
@@ -230,6 +301,7 @@ class ReimbursementRequest(TimestampedModel):
         blank=True,
         default="",
     )
+    passport_number_index = BlindIndexField(source="passport_number")
     passport_copy = models.FileField(
         upload_to=visa_document_upload_path,
         blank=True,
@@ -279,12 +351,14 @@ class ReimbursementRequest(TimestampedModel):
         default="",
         help_text="9-digit ABA routing number (encrypted)",
     )
+    bank_routing_number_index = BlindIndexField(source="bank_routing_number")
     bank_account_number = EncryptedCharField(
         max_length=17,
         blank=True,
         default="",
         help_text="Bank account number (encrypted)",
     )
+    bank_account_number_index = BlindIndexField(source="bank_account_number")
     bank_account_type = models.CharField(
         max_length=10,
         choices=[("checking", "Checking"), ("savings", "Savings")],
@@ -306,14 +380,14 @@ class ReimbursementRequest(TimestampedModel):
         max_digits=10,
         decimal_places=2,
         default=Decimal("0.00"),
-        help_text="Sum of all requested amounts (calculated on submit).",
+        help_text="Sum of all requested amounts (kept current by the line items).",
     )
     total_approved = models.DecimalField(
         max_digits=10,
         decimal_places=2,
         null=True,
         blank=True,
-        help_text="Sum of approved amounts (set on approval).",
+        help_text="Sum of approved amounts (kept current by the line items).",
     )
     total_paid = models.DecimalField(
         max_digits=10,
@@ -399,11 +473,22 @@ class ReimbursementRequest(TimestampedModel):
     )
     signed_at = models.DateTimeField(null=True, blank=True)
 
+    # -------------------------------------------------------------------------
+    # GENERATED PACKET PDF
+    # -------------------------------------------------------------------------
+
+    packet_pdf = models.FileField(
+        upload_to="reimbursements/packets/%Y/%m/",
+        blank=True,
+        help_text="Most recently rendered packet PDF (rendered by the PDF worker).",
+    )
+    packet_generated_at = models.DateTimeField(null=True, blank=True)
+
     # -------------------------------------------------------------------------
     # MANAGERS
     # -------------------------------------------------------------------------
 
-    objects = ReimbursementRequestQuerySet.as_manager()
+    objects = ReimbursementRequestManager()
 
     # -------------------------------------------------------------------------
     # META
@@ -435,13 +520,26 @@ class ReimbursementRequest(TimestampedModel):
     # CALCULATED PROPERTIES
     # -------------------------------------------------------------------------
 
+    def save(self, *args, **kwargs):
+        # A full save from an instance loaded before a line item changed
+        # would otherwise write its stale totals over the stored ones.
+        full_update = not (self._state.adding or args or kwargs.get("force_insert"))
+        if full_update and kwargs.get("update_fields") is None:
+            deferred = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                f.name
+                for f in self._meta.concrete_fields
+                if not f.primary_key and f.attname not in deferred and f.name not in LINE_ITEM_TOTAL_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     def calculate_total_requested(self) -> Decimal:
-        """Calculate sum of all line item requested amounts."""
+        """Sum of line item requested amounts, recomputed (total_requested stores it)."""
         total = self.line_items.aggregate(total=Sum("amount_requested"))["total"]
         return total or Decimal("0.00")
 
     def calculate_total_approved(self) -> Decimal:
-        """Calculate sum of all line item approved amounts."""
+        """Sum of line item approved amounts, recomputed (total_approved stores it)."""
         total = self.line_items.aggregate(total=Sum("amount_approved"))["total"]
         return total or Decimal("0.00")
 
@@ -490,7 +588,6 @@ class ReimbursementRequest(TimestampedModel):
     def submit(self):
         """Submit the request for review."""
         self.submitted_at = timezone.now()
-        self.total_requested = self.calculate_total_requested()
         # Freeze tax and payment info
         self._freeze_snapshots()
 
@@ -512,7 +609,6 @@ class ReimbursementRequest(TimestampedModel):
     def approve(self):
         """Approve the request for payment."""
         self.approved_at = timezone.now()
-        self.total_approved = self.calculate_total_approved()
 
     @transition(
         field=status,
@@ -567,12 +663,33 @@ class ReimbursementRequest(TimestampedModel):
         }
 
 
+def file_sha256(file):
+    """SHA-256 hex digest of a file, read chunk by chunk."""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
 def receipt_upload_path(instance, filename):
-    """Upload path for receipt files."""
+    """
+    Upload path for receipt files.
+
+    The request id in the path is the request the content was first uploaded
+    to: identical uploads on other requests reuse the stored file (see
+    Receipt._share_identical_file). Never delete or move receipts by
+    directory; go through Receipt.delete_file.
+    """
     request_id = instance.line_item.request_id
     return f"reimbursements/{request_id}/receipts/{filename}"
 
 
+def receipt_rendition_path(instance, filename):
+    """Upload path for optimized receipt images and thumbnails."""
+    request_id = instance.line_item.request_id
+    return f"reimbursements/{request_id}/receipts/renditions/{filename}"
+
+
 class ExpenseLineItem(TimestampedModel):
     """
     An individual expense within a reimbursement request.
@@ -662,14 +779,100 @@ class ExpenseLineItem(TimestampedModel):
         """True if this is a non-USD expense that hasn't had an exchange rate applied yet."""
         return self.original_currency != Currency.USD and self.exchange_rate is None
 
+    # -------------------------------------------------------------------------
+    # REQUEST TOTALS
+    # -------------------------------------------------------------------------
+
+    # What an item contributes to its request's stored totals.
+    AMOUNT_FIELDS = ("request", "amount_requested", "amount_approved")
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            before = None if self._state.adding else self._amounts_in_db()
+            super().save(*args, **kwargs)
+            after = self._amounts()
+            update_fields = kwargs.get("update_fields")
+            if before and update_fields is not None:
+                # Fields left out of update_fields kept their stored value.
+                written = {self._meta.get_field(name).name for name in update_fields}
+                after = tuple(
+                    new if name in written else old
+                    for name, new, old in zip(self.AMOUNT_FIELDS, after, before)
+                )
+            self.apply_to_request_totals(before, after)
+
+    def _amounts(self):
+        """(request id, requested, approved) as held on this instance; None if any is unloaded."""
+        values = tuple(
+            self.__dict__.get(self._meta.get_field(name).attname, models.DEFERRED)
+            for name in self.AMOUNT_FIELDS
+        )
+        return None if models.DEFERRED in values else values
+
+    def _amounts_in_db(self):
+        """
+        The amounts the stored totals currently count for this item, read from
+        the row and locked until the caller's transaction ends. The values
+        loaded on this instance may be stale: another save since then has
+        already moved the totals.
+        """
+        return (
+            ExpenseLineItem._base_manager.select_for_update()
+            .filter(pk=self.pk)
+            .values_list("request_id", "amount_requested", "amount_approved")
+            .first()
+        )
+
+    def apply_to_request_totals(self, before, after):
+        """
+        Move this item's amounts out of the totals it was counted in (before)
+        and into the ones it now counts toward (after), as F() increments on
+        the request rows. Either side is None for an insert or a delete.
+        """
+        deltas = {}
+        for sign, amounts in ((-1, before), (1, after)):
+            if amounts is None:
+                continue
+            request_id, requested, approved = amounts
+            delta = deltas.setdefault(request_id, [Decimal("0.00"), Decimal("0.00")])
+            delta[0] += sign * Decimal(requested or 0)
+            if approved is not None:
+                delta[1] += sign * Decimal(approved)
+
+        cached = ExpenseLineItem.request.field.get_cached_value(self, default=None)
+        for request_id, (requested, approved) in deltas.items():
+            changes = {}
+            if requested:
+                changes["total_requested"] = F("total_requested") + requested
+            if approved:
+                changes["total_approved"] = Coalesce(F("total_approved"), Value(Decimal("0.00"))) + approved
+            if not changes:
+                continue
+            ReimbursementRequest._base_manager.filter(pk=request_id).update(**changes)
+            if cached is not None and cached.pk == request_id:
+                # Keep the loaded request in step without re-reading it.
+                cached.total_requested = (cached.total_requested or Decimal("0.00")) + requested
+                if approved:
+                    cached.total_approved = (cached.total_approved or Decimal("0.00")) + approved
+
 
 class Receipt(TimestampedModel):
     """
     A receipt or supporting document for an expense line item.
 
     Multiple receipts can be attached to a single line item.
+
+    The uploaded file is kept as-is for audit. Image uploads are downscaled
+    and recompressed into `optimized` (plus a small `thumbnail`) after
+    upload by `process_receipts`; `rendition` is what pages and PDFs embed.
     """
 
+    class Processing(models.TextChoices):
+        PENDING = "pending", "Pending"
+        DONE = "done", "Done"
+        SKIPPED = "skipped", "Skipped (not an image)"
+        FAILED = "failed", "Failed"
+
     line_item = models.ForeignKey(
         ExpenseLineItem,
         on_delete=models.CASCADE,
@@ -687,6 +890,31 @@ class Receipt(TimestampedModel):
     file_size = models.PositiveIntegerField(
         help_text="File size in bytes.",
     )
+    sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text="SHA-256 of the file content; identical uploads share one stored file.",
+    )
+    optimized = models.FileField(
+        upload_to=receipt_rendition_path,
+        blank=True,
+        help_text="Downscaled, recompressed copy of an image receipt.",
+    )
+    thumbnail = models.FileField(
+        upload_to=receipt_rendition_path,
+        blank=True,
+    )
+    processing_status = models.CharField(
+        max_length=10,
+        choices=Processing.choices,
+        default=Processing.PENDING,
+        db_index=True,
+    )
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ReceiptQuerySet.as_manager()
 
     class Meta:
         ordering = ["created_at"]
@@ -696,11 +924,79 @@ class Receipt(TimestampedModel):
     def __str__(self):
         return self.original_filename
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_file = instance.__dict__.get("file")
+        return instance
+
+    @property
+    def rendition(self):
+        """The optimized image when there is one, else the original file."""
+        return self.optimized or self.file
+
     def save(self, *args, **kwargs):
         if self.file and not self.original_filename:
             self.original_filename = self.file.name
         if self.file and not self.file_size:
             self.file_size = self.file.size
+        stale = {}
+        if self.pk and "file" in self.__dict__ and self.file != getattr(self, "_loaded_file", self.file):
+            # A replaced file needs its renditions rebuilt.
+            stale = {"optimized": self.optimized.name, "thumbnail": self.thumbnail.name}
+            self.optimized = self.thumbnail = ""
+            self.processing_status = self.Processing.PENDING
+            self.processed_at = None
+            self.sha256 = ""
+        if self.file and not self.file._committed:
+            self._share_identical_file()
         super().save(*args, **kwargs)
+        self._loaded_file = self.file
+        # Keep any old rendition the new file inherited from an identical upload.
+        stale = {field: name for field, name in stale.items() if name != getattr(self, field).name}
+        if any(stale.values()):
+            transaction.on_commit(lambda: self._delete_unshared(**stale))
+
+    def _share_identical_file(self):
+        """
+        Point a new upload at an already-stored identical file, if any.
+
+        The shared file (and renditions, when the existing receipt has been
+        processed) stays under the first uploader's request directory, so a
+        receipt's paths need not match its own request.
+        """
+        upload = self.file.file
+        self.sha256 = self.sha256 or getattr(upload, "sha256", None) or file_sha256(self.file)
+        existing = (
+            Receipt.objects.filter(sha256=self.sha256)
+            .exclude(file="")
+            .exclude(pk=self.pk)
+            .order_by("pk")
+            .first()
+        )
+        if existing is None:
+            return
+        self.file = existing.file.name
+        if existing.processing_status != self.Processing.PENDING:
+            self.optimized = existing.optimized.name
+            self.thumbnail = existing.thumbnail.name
+            self.processing_status = existing.processing_status
+            self.processed_at = existing.processed_at
+
+    def delete_file(self):
+        """Delete the stored file and each rendition that no other receipt shares."""
+        self._delete_unshared(
+            file=self.file.name, optimized=self.optimized.name, thumbnail=self.thumbnail.name
+        )
+
+    def _delete_unshared(self, **names):
+        """
+        Delete stored files by field name -> storage name. Sharing is checked
+        per file: a duplicate uploaded before the original was processed
+        shares the upload but has renditions of its own.
+        """
+        for field_name, name in names.items():
+            if name and not Receipt.objects.filter(**{field_name: name}).exclude(pk=self.pk).exists():
+                self._meta.get_field(field_name).storage.delete(name)
 
 
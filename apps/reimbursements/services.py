@@ -6,12 +6,22 @@ Use these functions instead of manipulating models directly to ensure
 proper validation, audit trails, and state transitions.
 """
 
+import logging
 from decimal import Decimal
+from io import BytesIO
+from pathlib import Path
 from typing import Optional
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
 from django.db import transaction
 from django.utils import timezone
+from PIL import Image, ImageOps
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.errors import PdfReadError
+
+from apps.pdfjobs.services import PDFJobHandler, enqueue_pdf_render, request_pdf_render
 
 from .models import (
     ReimbursementRequest,
@@ -22,6 +32,9 @@ from .models import (
 )
 from people.models import People
 from enrollments.models import Enrollment
+from .validators import FILE_SIGNATURES
+
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
@@ -425,6 +438,17 @@ def get_pending_payment():
     )
 
 
+def find_requests_paying_into(account_number: str, routing_number: str = ""):
+    """
+    Get all requests paying into a bank account, newest first.
+
+    One indexed equality query on the blind index; nothing is decrypted.
+    """
+    return ReimbursementRequest.objects.paying_into(
+        account_number, routing_number or None
+    ).select_related("person", "enrollment__workshop")
+
+
 def get_program_summary(program):
     """
     Get reimbursement summary for a program.
@@ -435,25 +459,286 @@ def get_program_summary(program):
         - total_approved: sum of approved amounts
         - total_paid: sum of paid amounts
         - by_status: breakdown by status
+
+    Reads the stored request totals in one query grouped by status.
     """
     from django.db.models import Count, Sum
 
-    requests = ReimbursementRequest.objects.for_program(program)
-
-    totals = requests.aggregate(
-        total_requested=Sum("total_requested"),
-        total_approved=Sum("total_approved"),
-        total_paid=Sum("total_paid"),
+    rows = (
+        ReimbursementRequest.objects.for_program(program)
+        .order_by()
+        .values("status")
+        .annotate(
+            count=Count("id"),
+            requested=Sum("total_requested"),
+            approved=Sum("total_approved"),
+            paid=Sum("total_paid"),
+        )
     )
 
-    by_status = dict(
-        requests.values("status").annotate(count=Count("id")).values_list("status", "count")
+    summary = {
+        "total_requests": 0,
+        "total_requested": Decimal("0.00"),
+        "total_approved": Decimal("0.00"),
+        "total_paid": Decimal("0.00"),
+        "by_status": {},
+    }
+    for row in rows:
+        summary["total_requests"] += row["count"]
+        summary["total_requested"] += row["requested"] or Decimal("0.00")
+        summary["total_approved"] += row["approved"] or Decimal("0.00")
+        summary["total_paid"] += row["paid"] or Decimal("0.00")
+        summary["by_status"][row["status"]] = row["count"]
+    return summary
+
+
+# =============================================================================
+# RECEIPT IMAGES
+# =============================================================================
+
+# Longest edge of the optimized rendition: legible when printed full-page.
+RECEIPT_MAX_DIMENSION = 2000
+RECEIPT_THUMBNAIL_DIMENSION = 320
+RECEIPT_JPEG_QUALITY = 82
+
+
+def _image_kind(fh):
+    header = fh.read(16)
+    fh.seek(0)
+    for signature, kind in FILE_SIGNATURES.items():
+        if header.startswith(signature):
+            return kind
+    return None
+
+
+def _flatten(image):
+    """RGB copy of image, with any transparency composited onto white."""
+    background = Image.new("RGB", image.size, "white")
+    background.paste(image.convert("RGBA"), mask=image.convert("RGBA").getchannel("A"))
+    return background
+
+
+def _encode(image, kind, **options):
+    buffer = BytesIO()
+    if kind == "jpg":
+        if image.mode != "RGB":
+            image = _flatten(image)
+        image.save(buffer, "JPEG", optimize=True, **options)
+    else:
+        image.save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def optimize_receipt(receipt):
+    """
+    Build the optimized rendition and thumbnail of an image receipt.
+
+    JPEG and PNG uploads are EXIF-rotated, downscaled to RECEIPT_MAX_DIMENSION
+    and recompressed in their own format; the optimized copy is only kept
+    when it is smaller than the upload. PDFs are marked SKIPPED. The upload
+    itself is never modified.
+    """
+    try:
+        with receipt.file.open("rb") as fh:
+            kind = _image_kind(fh)
+            if kind not in ("jpg", "png"):
+                receipt.processing_status = Receipt.Processing.SKIPPED
+            else:
+                image = Image.open(fh)
+                if kind == "jpg":
+                    # Let the JPEG decoder scale down while decoding.
+                    image.draft("RGB", (RECEIPT_MAX_DIMENSION, RECEIPT_MAX_DIMENSION))
+                image = ImageOps.exif_transpose(image)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.exception("Could not read receipt %s", receipt.pk)
+        receipt.processing_status = Receipt.Processing.FAILED
+
+    if receipt.processing_status == Receipt.Processing.PENDING:
+        stem = Path(receipt.original_filename or receipt.file.name).stem
+        resized = image.copy()
+        resized.thumbnail((RECEIPT_MAX_DIMENSION, RECEIPT_MAX_DIMENSION), Image.LANCZOS)
+        optimized = _encode(resized, kind, quality=RECEIPT_JPEG_QUALITY, progressive=True)
+        if len(optimized) < receipt.file_size:
+            receipt.optimized.save(f"{stem}.{kind}", ContentFile(optimized), save=False)
+
+        image.thumbnail((RECEIPT_THUMBNAIL_DIMENSION, RECEIPT_THUMBNAIL_DIMENSION), Image.LANCZOS)
+        receipt.thumbnail.save(f"{stem}_thumb.jpg", ContentFile(_encode(image, "jpg", quality=75)), save=False)
+        receipt.processing_status = Receipt.Processing.DONE
+
+    receipt.processed_at = timezone.now()
+    # Leave updated_at alone: it is part of the packet PDF's input hash
+    receipt.save(update_fields=["optimized", "thumbnail", "processing_status", "processed_at"])
+    return receipt.processing_status
+
+
+def process_pending_receipts(limit):
+    """
+    Optimize up to `limit` PENDING receipts, oldest first. Each receipt is
+    row-locked while it is processed, so several workers can share the queue.
+    Returns the number processed.
+    """
+    pending = list(
+        Receipt.objects.filter(processing_status=Receipt.Processing.PENDING)
+        .order_by("created_at")
+        .values_list("pk", flat=True)[:limit]
     )
+    processed = 0
+    for pk in pending:
+        with transaction.atomic():
+            receipt = (
+                Receipt.objects.select_for_update(skip_locked=True)
+                .select_related("line_item")
+                .filter(pk=pk, processing_status=Receipt.Processing.PENDING)
+                .first()
+            )
+            if receipt is not None:
+                optimize_receipt(receipt)
+                processed += 1
+    return processed
 
-    return {
-        "total_requests": requests.count(),
-        "total_requested": totals["total_requested"] or Decimal("0.00"),
-        "total_approved": totals["total_approved"] or Decimal("0.00"),
-        "total_paid": totals["total_paid"] or Decimal("0.00"),
-        "by_status": by_status,
-    }
+
+# =============================================================================
+# PACKET PDF
+# =============================================================================
+
+PACKET_PDF_TEMPLATE = "reimbursements/pdf/reimbursement_packet.html"
+
+# apps.pdfjobs kind for packet renders; object_id is a ReimbursementRequest pk.
+PACKET_PDF_JOB = "REIMB_PACKET"
+
+# Requests under review: their packet is rendered in the background so
+# finance downloads the stored file.
+PACKET_PRERENDER_STATUSES = (RequestStatus.SUBMITTED, RequestStatus.APPROVED)
+
+# Image receipts are laid out at this DPI when converted to packet pages.
+RECEIPT_PDF_RESOLUTION = 150
+
+
+class PacketPDFJob(PDFJobHandler):
+    """Render-queue handler for the packet PDF (registered in ReimbursementsConfig.ready)."""
+
+    kind = PACKET_PDF_JOB
+    label = "Reimbursement Packet"
+    model = ReimbursementRequest
+    templates = (PACKET_PDF_TEMPLATE,)
+
+    def load(self, object_id):
+        return ReimbursementRequest.objects.with_secrets().select_related(
+            "person",
+            "enrollment__workshop",
+            "submitted_by",
+            "approved_by",
+            "paid_by",
+        ).prefetch_related("line_items__receipts").get(pk=object_id)
+
+    def inputs(self, reimbursement):
+        return {
+            "status": reimbursement.status,
+            "updated_at": reimbursement.updated_at,
+            "line_items": list(
+                ExpenseLineItem.objects.filter(request=reimbursement)
+                .order_by("pk")
+                .values_list("pk", "updated_at")
+            ),
+            # optimize_receipt doesn't touch updated_at, but the packet embeds
+            # the rendition, so a finished optimization must change the key.
+            "receipts": list(
+                Receipt.objects.filter(line_item__request=reimbursement)
+                .order_by("pk")
+                .values_list("pk", "updated_at", "processing_status", "optimized", "sha256")
+            ),
+        }
+
+    def template_name(self, reimbursement):
+        return PACKET_PDF_TEMPLATE
+
+    def context(self, reimbursement):
+        return {"reimbursement": reimbursement, "now": timezone.now()}
+
+    def save(self, reimbursement, pdf_bytes, generated_by=None, render_job=None, render_key=""):
+        filename = f"reimbursement_{reimbursement.pk}_{reimbursement.person.last_name}.pdf"
+        pdf_bytes = append_receipts_to_packet(pdf_bytes, reimbursement)
+        reimbursement.packet_pdf.save(filename, ContentFile(pdf_bytes), save=False)
+        reimbursement.packet_generated_at = timezone.now()
+        # Leave updated_at alone: it is part of the job's input hash
+        reimbursement.save(update_fields=["packet_pdf", "packet_generated_at"])
+        return reimbursement.packet_pdf
+
+    def has_output(self, reimbursement, job):
+        return bool(reimbursement.packet_pdf) and reimbursement.packet_generated_at >= job.created_at
+
+
+def request_packet_pdf(reimbursement, requested_by=None):
+    """Queue (or, without a worker, render inline) the packet PDF. Returns the PDFRenderJob."""
+    return request_pdf_render(PACKET_PDF_JOB, reimbursement, requested_by=requested_by)
+
+
+def queue_packet_pdf(reimbursement_id):
+    """
+    Queue a background packet render for a request under review, so finance
+    downloads the stored file instead of waiting on a render. Never renders
+    inline, and queues nothing without a worker (PDF_RENDER_WORKER unset):
+    nothing would claim the job, and the first download renders it anyway.
+    """
+    if not settings.PDF_RENDER_WORKER:
+        return None
+    reimbursement = (
+        ReimbursementRequest.objects.filter(pk=reimbursement_id, status__in=PACKET_PRERENDER_STATUSES)
+        .select_related("person")
+        .first()
+    )
+    if reimbursement is None:
+        return None
+    return enqueue_pdf_render(PACKET_PDF_JOB, reimbursement)
+
+
+def _receipt_pdf_reader(receipt):
+    """A PdfReader over the receipt: PDFs as uploaded, images as one page each."""
+    with receipt.rendition.open("rb") as fh:
+        kind = _image_kind(fh)
+        if kind == "pdf":
+            reader = PdfReader(BytesIO(fh.read()))
+            if reader.is_encrypted and not reader.decrypt(""):
+                raise PdfReadError("encrypted")
+            return reader
+        image = ImageOps.exif_transpose(Image.open(fh))
+    if image.mode != "RGB":
+        image = _flatten(image)
+    buffer = BytesIO()
+    image.save(buffer, "PDF", resolution=RECEIPT_PDF_RESOLUTION)
+    return PdfReader(buffer)
+
+
+def append_receipts_to_packet(packet_pdf, reimbursement):
+    """
+    Return the packet with every receipt appended, in line-item order.
+    Identical files are appended once; unreadable ones are skipped (and
+    logged) rather than failing the packet.
+    """
+    receipts = (
+        Receipt.objects.filter(line_item__request=reimbursement)
+        .exclude(file="")
+        .order_by("line_item__date_incurred", "line_item_id", "created_at")
+    )
+    writer, seen = None, set()
+    for receipt in receipts:
+        key = receipt.sha256 or receipt.file.name
+        if key in seen:
+            continue
+        seen.add(key)
+        try:
+            reader = _receipt_pdf_reader(receipt)
+            pages = list(reader.pages)
+        except (PdfReadError, OSError, ValueError, Image.DecompressionBombError):
+            logger.warning("Receipt %s could not be appended to packet %s", receipt.pk, reimbursement.pk, exc_info=True)
+            continue
+        if writer is None:
+            writer = PdfWriter()
+            writer.append(PdfReader(BytesIO(packet_pdf)))
+        for page in pages:
+            writer.add_page(page)
+    if writer is None:
+        return packet_pdf
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue()
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import ExpenseLineItem, Receipt, ReimbursementRequest
+from .services import PACKET_PRERENDER_STATUSES, optimize_receipt, queue_packet_pdf
+
+PACKET_OUTPUT_FIELDS = {"packet_pdf", "packet_generated_at"}
+
+
+@receiver(post_save, sender=Receipt)
+def optimize_new_receipt(sender, instance, **kwargs):
+    """
+    Without a `process_receipts` worker (RECEIPT_IMAGE_WORKER unset), build
+    the renditions once the upload commits; with one, leave it queued.
+    """
+    if instance.processing_status != Receipt.Processing.PENDING or settings.RECEIPT_IMAGE_WORKER:
+        return
+    receipt_id = instance.pk
+
+    def optimize():
+        receipt = Receipt.objects.select_related("line_item").filter(
+            pk=receipt_id, processing_status=Receipt.Processing.PENDING
+        ).first()
+        if receipt is not None:
+            optimize_receipt(receipt)
+
+    transaction.on_commit(optimize)
+
+
+@receiver(post_save, sender=ReimbursementRequest)
+def prerender_packet_under_review(sender, instance, update_fields=None, **kwargs):
+    """Queue the packet render once a request reaches review (and after edits during review)."""
+    if instance.status not in PACKET_PRERENDER_STATUSES or not settings.PDF_RENDER_WORKER:
+        return
+    if update_fields is not None and set(update_fields) <= PACKET_OUTPUT_FIELDS:
+        return  # The render itself storing its output
+    reimbursement_id = instance.pk
+    transaction.on_commit(lambda: queue_packet_pdf(reimbursement_id))
+
+
+def _deleted_with_request(origin):
+    return isinstance(origin, ReimbursementRequest) or getattr(origin, "model", None) is ReimbursementRequest
+
+
+@receiver(pre_delete, sender=ExpenseLineItem)
+def lock_line_item_amounts(sender, instance, origin=None, **kwargs):
+    """Read what the totals count for the item from its locked row (the instance may be stale)."""
+    if not _deleted_with_request(origin):
+        instance._stored_amounts = instance._amounts_in_db()
+
+
+@receiver(post_delete, sender=ExpenseLineItem)
+def remove_line_item_from_totals(sender, instance, origin=None, **kwargs):
+    """Take a deleted line item out of its request's stored totals (also for queryset deletes)."""
+    if _deleted_with_request(origin):
+        return  # The request itself is going
+    before = getattr(instance, "_stored_amounts", None) or instance._amounts()
+    instance.apply_to_request_totals(before, None)
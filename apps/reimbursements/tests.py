@@ -5,24 +5,44 @@ Coverage:
 - Model properties and FSM transitions
 - Service layer validation and state guards
 - QuerySet filters
+- Stored request totals kept current by line items, and their verify command
 - View authorization and basic flows
-- EncryptedCharField round-trip
+- EncryptedCharField round-trip, cached cipher, key rotation and lazy decryption
+- Blind-index lookups on encrypted bank and passport numbers
+- Receipt image optimization and thumbnails
+- Receipt content hashing and duplicate detection
+- Packet PDF rendering through the timeeffort render queue, with receipts appended
 """
 
+import hashlib
+import os
+import shutil
+import tempfile
 from datetime import date, timedelta
 from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest.mock import patch
 
+from cryptography.fernet import Fernet, InvalidToken
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
-from django.urls import reverse
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.urls import resolve, reverse
+from PIL import Image
+from PyPDF2 import PdfReader, PdfWriter
 
 from people.models import People
 from programs.models import Program
 from enrollments.models import Enrollment
+from apps.pdfjobs.models import PDFRenderJob
 
+from .fields import Ciphertext, blind_index, decrypt, get_fernet
 from .models import (
     ReimbursementRequest,
     ExpenseLineItem,
+    Receipt,
     RequestStatus,
     TaxStatus,
     PaymentMethod,
@@ -36,10 +56,15 @@ from .services import (
     approve_request,
     mark_as_paid,
     cancel_request,
+    find_requests_paying_into,
+    get_program_summary,
+    process_pending_receipts,
     request_changes,
     ValidationError,
     StateTransitionError,
+    PACKET_PDF_JOB,
 )
+from .validators import validate_uploaded_file
 
 User = get_user_model()
 
@@ -80,6 +105,15 @@ def make_draft(person, user, **kwargs):
     return create_reimbursement_request(person=person, submitted_by=user, **defaults)
 
 
+def make_pdf(pages=1):
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(612, 792)
+    buffer = BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
 def add_line_item(request, amount="50.00", **kwargs):
     defaults = dict(
         category=ExpenseCategory.AIRFARE,
@@ -529,6 +563,110 @@ class QuerySetTests(TestCase):
         self.assertNotIn(other_req, qs)
 
 
+# =============================================================================
+# STORED TOTALS
+# =============================================================================
+
+
+class StoredTotalsTests(TestCase):
+    def setUp(self):
+        self.person = make_person()
+        self.user = make_user()
+        self.staff = make_user("staff", is_staff=True)
+        self.draft = make_draft(self.person, self.user)
+
+    def stored(self, req):
+        return ReimbursementRequest.objects.values_list("total_requested", "total_approved").get(pk=req.pk)
+
+    def test_line_items_keep_stored_totals_current(self):
+        add_line_item(self.draft, amount="100.00")
+        item = add_line_item(self.draft, amount="50.00")
+        self.assertEqual(self.draft.total_requested, Decimal("150.00"))
+        self.assertEqual(self.stored(self.draft), (Decimal("150.00"), None))
+
+        item = ExpenseLineItem.objects.get(pk=item.pk)
+        item.amount_requested = Decimal("70.00")
+        item.amount_approved = Decimal("60.00")
+        item.save()
+        self.assertEqual(self.stored(self.draft), (Decimal("170.00"), Decimal("60.00")))
+
+        item.delete()
+        self.assertEqual(self.stored(self.draft), (Decimal("100.00"), Decimal("0.00")))
+
+    def test_queryset_delete_and_move_between_requests(self):
+        other = make_draft(self.person, make_user("u2"))
+        item = add_line_item(self.draft, amount="40.00")
+        add_line_item(self.draft, amount="10.00")
+
+        item = ExpenseLineItem.objects.get(pk=item.pk)
+        item.request = other
+        item.save()
+        self.assertEqual(self.stored(self.draft)[0], Decimal("10.00"))
+        self.assertEqual(self.stored(other)[0], Decimal("40.00"))
+
+        ExpenseLineItem.objects.filter(request=other).delete()
+        self.assertEqual(self.stored(other)[0], Decimal("0.00"))
+
+    def test_stale_request_save_keeps_stored_totals(self):
+        stale = ReimbursementRequest.objects.get(pk=self.draft.pk)
+        add_line_item(self.draft, amount="25.00")
+        stale.payment_address = "456 Elm St"
+        stale.save()
+        self.assertEqual(self.stored(self.draft)[0], Decimal("25.00"))
+
+    def test_stale_line_item_saves_apply_exact_deltas(self):
+        item = add_line_item(self.draft, amount="10.00")
+        first = ExpenseLineItem.objects.get(pk=item.pk)
+        second = ExpenseLineItem.objects.get(pk=item.pk)
+
+        first.amount_requested = Decimal("20.00")
+        first.save()
+        second.amount_requested = Decimal("30.00")
+        second.save()
+        self.assertEqual(self.stored(self.draft)[0], Decimal("30.00"))
+
+        first.delete()
+        self.assertEqual(self.stored(self.draft)[0], Decimal("0.00"))
+        out = StringIO()
+        call_command("verify_reimbursement_totals", stdout=out)
+        self.assertIn("match their line items", out.getvalue())
+
+    def test_approve_reads_stored_totals(self):
+        add_line_item(self.draft, amount="80.00")
+        req = submit_request(self.draft, "Jane Doe")
+        approve_request(req, self.staff, approved_amounts={req.line_items.get().pk: "65.00"})
+        self.assertEqual(req.total_approved, Decimal("65.00"))
+        self.assertEqual(self.stored(req), (Decimal("80.00"), Decimal("65.00")))
+
+    def test_program_summary_is_one_query(self):
+        program = make_program()
+        enrollment = Enrollment.objects.create(workshop=program, person=self.person)
+        req = make_draft(self.person, make_user("u3"), enrollment=enrollment)
+        add_line_item(req, amount="30.00")
+        submit_request(req, "Jane Doe")
+        with self.assertNumQueries(1):
+            summary = get_program_summary(program)
+        self.assertEqual(summary["total_requests"], 1)
+        self.assertEqual(summary["total_requested"], Decimal("30.00"))
+        self.assertEqual(summary["by_status"], {RequestStatus.SUBMITTED: 1})
+
+    def test_verify_command_reports_and_repairs_drift(self):
+        add_line_item(self.draft, amount="20.00")
+        ReimbursementRequest.objects.filter(pk=self.draft.pk).update(total_requested=Decimal("5.00"))
+
+        out = StringIO()
+        call_command("verify_reimbursement_totals", stdout=out)
+        self.assertIn(f"Request #{self.draft.pk}", out.getvalue())
+        self.assertEqual(self.stored(self.draft)[0], Decimal("5.00"))
+
+        call_command("verify_reimbursement_totals", "--fix", stdout=StringIO())
+        self.assertEqual(self.stored(self.draft), (Decimal("20.00"), None))
+
+        out = StringIO()
+        call_command("verify_reimbursement_totals", stdout=out)
+        self.assertIn("match their line items", out.getvalue())
+
+
 # =============================================================================
 # ENCRYPTION FIELD
 # =============================================================================
@@ -590,6 +728,154 @@ class EncryptedFieldTests(TestCase):
         # Fernet uses random IV so same plaintext → different ciphertext
         self.assertNotEqual(rows[0][0], rows[1][0])
 
+    def _raw_account_number(self, req):
+        from django.db import connection
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT bank_account_number FROM reimbursements_reimbursementrequest WHERE id = %s",
+                [req.pk]
+            )
+            return cursor.fetchone()[0]
+
+    def test_cipher_is_cached_until_key_changes(self):
+        original = get_fernet()
+        self.assertIs(get_fernet(), original)
+        with override_settings(FIELD_ENCRYPTION_KEY=Fernet.generate_key().decode()):
+            rotated = get_fernet()
+            self.assertIsNot(rotated, original)
+            self.assertIs(get_fernet(), rotated)
+        self.assertIsNot(get_fernet(), rotated)
+
+    def test_key_rotation_and_reencryption(self):
+        old_key = settings.FIELD_ENCRYPTION_KEY
+        new_key = Fernet.generate_key().decode()
+        req = self._make_ach_request()
+
+        with override_settings(FIELD_ENCRYPTION_KEY=new_key, FIELD_ENCRYPTION_RETIRED_KEYS=[old_key]):
+            fetched = ReimbursementRequest.objects.get(pk=req.pk)
+            self.assertEqual(fetched.bank_account_number, "987654321")
+
+            call_command("reencrypt_fields", batch_size=1, stdout=StringIO())
+
+            # Blind indexes are keyed separately and survive the rotation.
+            self.assertEqual(list(ReimbursementRequest.objects.paying_into("987654321")), [req])
+
+        raw = self._raw_account_number(req).encode()
+        self.assertEqual(Fernet(new_key).decrypt(raw), b"987654321")
+        with self.assertRaises(InvalidToken):
+            Fernet(old_key).decrypt(raw)
+
+    def test_list_views_do_no_crypto_work(self):
+        self._make_ach_request()
+        self.client.force_login(self.user)
+        with patch("apps.reimbursements.fields.decrypt") as decrypt:
+            response = self.client.get(reverse("reimbursements:my_reimbursements"))
+            list(ReimbursementRequest.objects.with_secrets())
+        self.assertEqual(response.status_code, 200)
+        decrypt.assert_not_called()
+
+    def test_decrypts_once_on_first_read(self):
+        req = self._make_ach_request()
+        fetched = ReimbursementRequest.objects.with_secrets().get(pk=req.pk)
+        with patch("apps.reimbursements.fields.decrypt", wraps=decrypt) as spy:
+            self.assertIs(type(fetched.bank_account_number), str)
+            self.assertEqual(fetched.bank_account_number, "987654321")
+        spy.assert_called_once()
+
+    def test_unread_value_saved_without_reencrypting(self):
+        req = self._make_ach_request()
+        raw = self._raw_account_number(req)
+        fetched = ReimbursementRequest.objects.with_secrets().get(pk=req.pk)
+        fetched.bank_name = "Second Bank"
+        fetched.save()
+        self.assertEqual(self._raw_account_number(req), raw)
+
+    def test_admin_change_view_loads_secrets_with_row(self):
+        from django.contrib.admin.sites import site
+        req = self._make_ach_request()
+        model_admin = site._registry[ReimbursementRequest]
+        factory = RequestFactory()
+        change = factory.get(reverse("admin:reimbursements_reimbursementrequest_change", args=[req.pk]))
+        change.resolver_match = resolve(change.path)
+        changelist = factory.get(reverse("admin:reimbursements_reimbursementrequest_changelist"))
+        changelist.resolver_match = resolve(changelist.path)
+
+        with self.assertNumQueries(1):
+            obj = model_admin.get_object(change, str(req.pk))
+        self.assertFalse(obj.get_deferred_fields())
+        self.assertTrue(model_admin.get_queryset(changelist).get(pk=req.pk).get_deferred_fields())
+
+    def test_values_list_yields_ciphertext_wrapper(self):
+        req = self._make_ach_request()
+        value = ReimbursementRequest.objects.filter(pk=req.pk).values_list("bank_routing_number", flat=True).get()
+        self.assertIsInstance(value, Ciphertext)
+        self.assertEqual(str(value), "021000021")
+
+
+# =============================================================================
+# BLIND INDEX
+# =============================================================================
+
+class BlindIndexTests(TestCase):
+    def setUp(self):
+        self.person = make_person()
+        self.user = make_user()
+        self.req = make_draft(
+            self.person, self.user,
+            payment_method=PaymentMethod.ACH,
+            payment_address="",
+            bank_name="First Bank",
+            bank_routing_number="021000021",
+            bank_account_number="987654321",
+            bank_account_type="checking",
+            passport_number="X1234567",
+        )
+
+    def test_digest_stored_on_save(self):
+        fetched = ReimbursementRequest.objects.get(pk=self.req.pk)
+        self.assertEqual(fetched.bank_account_number_index, blind_index("987654321"))
+        self.assertEqual(len(fetched.passport_number_index), 64)
+        self.assertNotIn("987654321", fetched.bank_account_number_index)
+
+    def test_lookup_is_one_query_and_ignores_formatting(self):
+        other = make_draft(make_person(email_address="o@example.com"), self.user)
+        with self.assertNumQueries(1):
+            found = list(ReimbursementRequest.objects.paying_into("9876 54321", routing_number="021000021"))
+        self.assertEqual(found, [self.req])
+        self.assertEqual(list(ReimbursementRequest.objects.with_passport_number("x1234567")), [self.req])
+        self.assertEqual(list(ReimbursementRequest.objects.paying_into("987654321", "111000025")), [])
+        self.assertNotIn(other, ReimbursementRequest.objects.paying_into(""))
+
+    def test_unrelated_save_keeps_digest_without_decrypting(self):
+        digest = ReimbursementRequest.objects.get(pk=self.req.pk).bank_account_number_index
+        fetched = ReimbursementRequest.objects.with_secrets().get(pk=self.req.pk)
+        with patch("apps.reimbursements.fields.decrypt") as decrypt:
+            fetched.bank_name = "Second Bank"
+            fetched.save()
+        decrypt.assert_not_called()
+        self.assertEqual(ReimbursementRequest.objects.get(pk=self.req.pk).bank_account_number_index, digest)
+
+    def test_changed_value_updates_digest(self):
+        self.req.bank_account_number = "111222333"
+        self.req.save()
+        self.assertEqual(list(find_requests_paying_into("111222333")), [self.req])
+        self.assertFalse(find_requests_paying_into("987654321").exists())
+
+    def test_backfill_command(self):
+        ReimbursementRequest.objects.update(bank_account_number_index="", passport_number_index="")
+        call_command("backfill_blind_indexes", batch_size=1, stdout=StringIO())
+        self.assertEqual(list(ReimbursementRequest.objects.paying_into("987654321")), [self.req])
+
+        out = StringIO()
+        call_command("backfill_blind_indexes", stdout=out)
+        self.assertIn("0 of 1 row(s) updated", out.getvalue())
+
+    def test_admin_search_matches_account_number(self):
+        from django.contrib.admin.sites import site
+        model_admin = site._registry[ReimbursementRequest]
+        queryset, _ = model_admin.get_search_results(None, ReimbursementRequest.objects.all(), "987654321")
+        self.assertEqual(list(queryset), [self.req])
+
 
 # =============================================================================
 # VIEWS: AUTHORIZATION
@@ -699,3 +985,330 @@ class ViewEditFlowTests(TestCase):
         pks = [r.pk for r in response.context["requests"]]
         self.assertIn(self.req.pk, pks)
         self.assertNotIn(other_req.pk, pks)
+
+
+# =============================================================================
+# VIEWS: PACKET PDF
+# =============================================================================
+
+@patch("apps.pdfjobs.services.html_to_pdf", return_value=b"%PDF-packet")
+class PacketPDFViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = make_user()
+        self.req = make_draft(make_person(), self.user)
+        add_line_item(self.req)
+        submit_request(self.req, "Jane Doe")
+        self.client.login(username="testuser", password="pass")
+
+    def _download(self):
+        return self.client.get(reverse("reimbursements:pdf", args=[self.req.pk]))
+
+    def test_packet_is_stored_and_reused(self, html_to_pdf):
+        response = self._download()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF-packet")
+        self.assertTrue(ReimbursementRequest.objects.get(pk=self.req.pk).packet_pdf)
+
+        self._download()
+        self.assertEqual(html_to_pdf.call_count, 1)
+        self.assertEqual(PDFRenderJob.objects.count(), 1)
+
+    def test_status_change_renders_new_packet(self, html_to_pdf):
+        self._download()
+        approve_request(self.req, make_user("staff", is_staff=True))
+
+        self._download()
+
+        self.assertEqual(html_to_pdf.call_count, 2)
+        self.assertEqual(PDFRenderJob.objects.count(), 2)
+
+    def _attach(self, name, content):
+        item = self.req.line_items.first()
+        return Receipt.objects.create(line_item=item, file=SimpleUploadedFile(name, content), original_filename=name)
+
+    def _page_count(self, response):
+        return len(PdfReader(BytesIO(b"".join(response.streaming_content))).pages)
+
+    def test_receipts_appended_to_packet(self, html_to_pdf):
+        html_to_pdf.return_value = make_pdf(pages=1)
+        image = BytesIO()
+        Image.new("RGBA", (400, 300), "white").save(image, "PNG")
+        self._attach("folio.pdf", make_pdf(pages=2))
+        self._attach("taxi.png", image.getvalue())
+        self._attach("taxi-again.png", image.getvalue())
+
+        self.assertEqual(self._page_count(self._download()), 4)
+
+    def test_unreadable_receipt_is_skipped(self, html_to_pdf):
+        html_to_pdf.return_value = make_pdf(pages=1)
+        self._attach("broken.pdf", b"%PDF-1.4 truncated")
+
+        with self.assertLogs("apps.reimbursements.services", "WARNING"):
+            response = self._download()
+
+        self.assertEqual(self._page_count(response), 1)
+
+    @override_settings(PDF_RENDER_WORKER=True)
+    def test_submission_queues_background_render(self, html_to_pdf):
+        req = make_draft(make_person(email_address="second@example.com"), self.user)
+        add_line_item(req)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            submit_request(req, "Jane Doe")
+
+        job = PDFRenderJob.objects.get(object_id=req.pk, kind=PACKET_PDF_JOB)
+        self.assertEqual(job.status, PDFRenderJob.Status.QUEUED)
+        html_to_pdf.assert_not_called()
+
+        with override_settings(PDF_RENDER_WORKER=False):
+            self.client.get(reverse("reimbursements:pdf", args=[req.pk]))
+        job.refresh_from_db()
+        self.assertEqual(job.status, PDFRenderJob.Status.DONE)
+        self.assertEqual(PDFRenderJob.objects.filter(object_id=req.pk).count(), 1)
+
+    def test_submission_queues_nothing_without_worker(self, html_to_pdf):
+        req = make_draft(make_person(email_address="third@example.com"), self.user)
+        add_line_item(req)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            submit_request(req, "Jane Doe")
+
+        self.assertFalse(PDFRenderJob.objects.filter(object_id=req.pk).exists())
+
+    def test_finished_receipt_optimization_invalidates_packet(self, html_to_pdf):
+        html_to_pdf.return_value = make_pdf(pages=1)
+        receipt = self._attach("scan.pdf", make_pdf(pages=1))
+        self._download()
+
+        # As optimize_receipt does: new rendition, updated_at untouched.
+        Receipt.objects.filter(pk=receipt.pk).update(processing_status=Receipt.Processing.DONE)
+        self._download()
+
+        self.assertEqual(html_to_pdf.call_count, 2)
+
+
+# =============================================================================
+# RECEIPT IMAGES
+# =============================================================================
+
+def make_image_upload(name="receipt.jpg", size=(3000, 2000), fmt="JPEG"):
+    buffer = BytesIO()
+    Image.effect_noise(size, 40).convert("RGB").save(buffer, fmt, quality=95)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+class ReceiptImageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = make_user()
+        self.req = make_draft(make_person(), self.user)
+        self.item = add_line_item(self.req)
+
+    def _receipt(self, upload):
+        return Receipt.objects.create(line_item=self.item, file=upload, original_filename=upload.name)
+
+    def test_jpeg_is_downscaled_and_thumbnailed(self):
+        receipt = self._receipt(make_image_upload())
+        original_name, original_size = receipt.file.name, receipt.file_size
+
+        self.assertEqual(process_pending_receipts(10), 1)
+
+        receipt.refresh_from_db()
+        self.assertEqual(receipt.processing_status, Receipt.Processing.DONE)
+        with Image.open(receipt.optimized.open("rb")) as optimized:
+            self.assertEqual(max(optimized.size), 2000)
+        self.assertLess(receipt.optimized.size, original_size)
+        with Image.open(receipt.thumbnail.open("rb")) as thumbnail:
+            self.assertLessEqual(max(thumbnail.size), 320)
+        self.assertEqual((receipt.file.name, receipt.file.size), (original_name, original_size))
+        self.assertEqual(receipt.rendition, receipt.optimized)
+
+    def test_pdf_is_skipped(self):
+        receipt = self._receipt(SimpleUploadedFile("receipt.pdf", b"%PDF-1.4 minimal"))
+        process_pending_receipts(10)
+        receipt.refresh_from_db()
+        self.assertEqual(receipt.processing_status, Receipt.Processing.SKIPPED)
+        self.assertEqual(receipt.rendition, receipt.file)
+
+    def test_unreadable_image_is_marked_failed(self):
+        receipt = self._receipt(SimpleUploadedFile("receipt.jpg", b"\xff\xd8\xff" + b"\x00" * 64))
+        with self.assertLogs("apps.reimbursements.services", "ERROR"):
+            process_pending_receipts(10)
+        receipt.refresh_from_db()
+        self.assertEqual(receipt.processing_status, Receipt.Processing.FAILED)
+        self.assertFalse(process_pending_receipts(10))
+
+    def test_processed_after_upload_commits_without_worker(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            receipt = self._receipt(make_image_upload(size=(400, 300), fmt="PNG", name="small.png"))
+        receipt.refresh_from_db()
+        self.assertEqual(receipt.processing_status, Receipt.Processing.DONE)
+        self.assertTrue(receipt.thumbnail)
+
+    @override_settings(RECEIPT_IMAGE_WORKER=True)
+    def test_left_queued_for_worker(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            receipt = self._receipt(make_image_upload(size=(400, 300)))
+        receipt.refresh_from_db()
+        self.assertEqual(receipt.processing_status, Receipt.Processing.PENDING)
+
+    @override_settings(RECEIPT_IMAGE_WORKER=True)
+    def test_replacing_file_requeues(self):
+        receipt = self._receipt(make_image_upload(size=(400, 300)))
+        process_pending_receipts(10)
+        receipt = Receipt.objects.get(pk=receipt.pk)
+        old_renditions = [receipt.optimized.path, receipt.thumbnail.path]
+        receipt.file = make_image_upload(name="replacement.jpg", size=(500, 300))
+        with self.captureOnCommitCallbacks(execute=True):
+            receipt.save()
+        receipt.refresh_from_db()
+        self.assertEqual(receipt.processing_status, Receipt.Processing.PENDING)
+        self.assertFalse(receipt.thumbnail)
+        self.assertFalse([path for path in old_renditions if os.path.exists(path)])
+
+    def test_protected_receipt_serves_rendition(self):
+        receipt = self._receipt(make_image_upload())
+        process_pending_receipts(10)
+        receipt.refresh_from_db()
+        self.client.force_login(self.user)
+        url = reverse("reimbursements:protected_receipt", args=[self.req.pk, self.item.pk, receipt.pk])
+
+        self.assertEqual(self.client.get(url)["Location"], receipt.optimized.url)
+        self.assertEqual(self.client.get(url, {"original": 1})["Location"], receipt.file.url)
+
+
+# =============================================================================
+# RECEIPT DEDUPLICATION
+# =============================================================================
+
+class ReceiptDeduplicationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root, RECEIPT_IMAGE_WORKER=True)
+        cls.media_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = make_user()
+        self.person = make_person()
+        self.item = add_line_item(make_draft(self.person, self.user))
+        self.other_item = add_line_item(make_draft(self.person, self.user))
+        self.content = b"%PDF-1.4 the same hotel folio"
+
+    def _upload(self, item, name="folio.pdf"):
+        upload = SimpleUploadedFile(name, self.content)
+        validate_uploaded_file(upload)
+        return Receipt.objects.create(line_item=item, file=upload, original_filename=name)
+
+    def test_digest_computed_during_validation(self):
+        upload = SimpleUploadedFile("folio.pdf", self.content)
+        self.assertEqual(validate_uploaded_file(upload), hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(upload.read(), self.content)
+
+    def test_identical_uploads_share_one_file(self):
+        first = self._upload(self.item)
+        second = self._upload(self.other_item, name="copy.pdf")
+
+        self.assertEqual(second.sha256, first.sha256)
+        self.assertEqual(second.file.name, first.file.name)
+        self.assertEqual(second.original_filename, "copy.pdf")
+        stored = [name for _dir, _subdirs, files in os.walk(self.media_root) for name in files]
+        self.assertFalse([name for name in stored if name.startswith("copy")])
+
+    def test_duplicates_flagged_across_requests_only(self):
+        first = self._upload(self.item)
+        self._upload(self.item, name="again.pdf")
+        self.assertFalse(Receipt.objects.duplicated().exists())
+
+        second = self._upload(self.other_item)
+        counts = dict(Receipt.objects.with_duplicate_count().values_list("pk", "duplicate_count"))
+        self.assertEqual(counts[first.pk], 1)
+        self.assertEqual(counts[second.pk], 2)
+
+    def test_shared_file_kept_until_last_receipt_deleted(self):
+        first = self._upload(self.item)
+        second = self._upload(self.other_item)
+        path = first.file.path
+
+        first.delete_file()
+        first.delete()
+        self.assertTrue(os.path.exists(path))
+
+        second.delete_file()
+        second.delete()
+        self.assertFalse(os.path.exists(path))
+
+    def test_own_renditions_deleted_with_shared_upload(self):
+        buffer = BytesIO()
+        Image.new("RGB", (400, 300), "white").save(buffer, "PNG")
+        self.content = buffer.getvalue()
+        first = self._upload(self.item, name="r.png")
+        # Uploaded while the original is still pending: shares only the file
+        second = self._upload(self.other_item, name="r.png")
+        process_pending_receipts(10)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(second.file.name, first.file.name)
+        self.assertNotEqual(second.thumbnail.name, first.thumbnail.name)
+        own = [second.optimized.path, second.thumbnail.path]
+
+        second.delete_file()
+        second.delete()
+        self.assertTrue(os.path.exists(first.file.path))
+        self.assertTrue(os.path.exists(first.thumbnail.path))
+        self.assertFalse([path for path in own if os.path.exists(path)])
+
+    def test_duplicate_inherits_renditions(self):
+        buffer = BytesIO()
+        Image.new("RGB", (400, 300), "white").save(buffer, "PNG")
+        self.content = buffer.getvalue()
+        first = self._upload(self.item, name="r.png")
+        process_pending_receipts(10)
+        first.refresh_from_db()
+
+        second = self._upload(self.other_item, name="r.png")
+        self.assertEqual(second.processing_status, first.processing_status)
+        self.assertEqual(second.thumbnail.name, first.thumbnail.name)
+
+    def test_upload_view_warns_about_duplicate(self):
+        self._upload(self.other_item)
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("reimbursements:receipt_upload", args=[self.item.request_id, self.item.pk]),
+            {"file": SimpleUploadedFile("folio.pdf", self.content)},
+            follow=True,
+        )
+        self.assertIn("identical to one already attached", " ".join(str(m) for m in response.context["messages"]))
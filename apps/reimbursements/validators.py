@@ -4,6 +4,8 @@ File upload validators for reimbursements.
 Security-focused validation to prevent malicious file uploads.
 """
 
+import hashlib
+
 from django.core.exceptions import ValidationError
 
 
@@ -50,11 +52,18 @@ def validate_file_content(value):
     Validate file content by checking magic bytes.
 
     This prevents attackers from uploading malicious files with fake extensions.
+    The same chunked read computes the file's SHA-256, left on the file as
+    `value.sha256` for duplicate detection.
     """
-    # Read the first 16 bytes for magic number detection
+    digest = hashlib.sha256()
+    header = b''
     value.seek(0)
-    header = value.read(16)
+    for chunk in value.chunks():
+        if len(header) < 16:
+            header += chunk[:16 - len(header)]
+        digest.update(chunk)
     value.seek(0)  # Reset for later use
+    value.sha256 = digest.hexdigest()
 
     if not header:
         raise ValidationError("File appears to be empty.")
@@ -83,6 +92,8 @@ def validate_uploaded_file(value):
     - Extension whitelist
     - Content type verification (magic bytes)
     - Extension/content match
+
+    Returns the file's SHA-256 hex digest.
     """
     # Check size
     validate_file_size(value)
@@ -102,3 +113,5 @@ def validate_uploaded_file(value):
             f"File extension '.{ext}' does not match file content. "
             "Please ensure the file is a valid PDF, JPG, or PNG."
         )
+
+    return value.sha256
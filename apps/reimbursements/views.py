@@ -22,6 +22,8 @@ from .models import (
     RequestStatus,
     TaxStatus,
 )
+from apps.pdfjobs.models import PDFRenderJob
+
 from .forms import (
     ReimbursementCreateForm,
     ReimbursementEditForm,
@@ -29,6 +31,7 @@ from .forms import (
     ReceiptUploadForm,
     SubmitSignatureForm,
 )
+from .services import PACKET_PDF_TEMPLATE, request_packet_pdf
 
 
 class MyReimbursementsView(LoginRequiredMixin, ListView):
@@ -210,7 +213,8 @@ def reimbursement_edit(request, pk):
     This is the main editing view where users add expenses and update info.
     """
     reimbursement = get_object_or_404(
-        ReimbursementRequest.objects.select_related("person", "enrollment__workshop")
+        ReimbursementRequest.objects.with_secrets()
+        .select_related("person", "enrollment__workshop")
         .prefetch_related("line_items__receipts"),
         pk=pk
     )
@@ -313,13 +317,18 @@ def receipt_upload(request, pk, expense_pk):
             messages.error(request, str(e.message))
             return redirect("reimbursements:edit", pk=pk)
 
-        Receipt.objects.create(
+        receipt = Receipt.objects.create(
             line_item=expense,
             file=uploaded_file,
             original_filename=uploaded_file.name,
             file_size=uploaded_file.size,
         )
         messages.success(request, "Receipt uploaded.")
+        if Receipt.objects.filter(pk=receipt.pk).duplicated().exists():
+            messages.warning(
+                request,
+                "This receipt is identical to one already attached to another reimbursement request.",
+            )
 
     return redirect("reimbursements:edit", pk=pk)
 
@@ -343,7 +352,7 @@ def receipt_delete(request, pk, expense_pk, receipt_pk):
         line_item__pk=expense_pk,
         line_item__request=reimbursement
     )
-    receipt.file.delete(save=False)
+    receipt.delete_file()
     receipt.delete()
     messages.success(request, "Receipt removed.")
 
@@ -358,7 +367,7 @@ def reimbursement_submit(request, pk):
     Validates all required fields and transitions to submitted status.
     """
     reimbursement = get_object_or_404(
-        ReimbursementRequest.objects.prefetch_related("line_items"),
+        ReimbursementRequest.objects.with_secrets().prefetch_related("line_items"),
         pk=pk
     )
 
@@ -469,6 +478,9 @@ def protected_receipt(request, pk, expense_pk, receipt_pk):
     """
     Serve receipt files with authorization check.
     Only the submitter or staff can access receipt files.
+
+    Serves the optimized rendition when there is one; ?original=1 serves
+    the file as uploaded.
     """
     reimbursement = get_object_or_404(ReimbursementRequest, pk=pk)
 
@@ -483,7 +495,9 @@ def protected_receipt(request, pk, expense_pk, receipt_pk):
         line_item__request=reimbursement,
     )
 
-    return HttpResponseRedirect(receipt.file.url)
+    if request.GET.get("original"):
+        return HttpResponseRedirect(receipt.file.url)
+    return HttpResponseRedirect(receipt.rendition.url)
 
 
 @login_required(login_url="/accounts/login/")
@@ -545,32 +559,24 @@ def reimbursement_pdf(request, pk):
         messages.warning(request, "Cannot generate PDF for draft requests.")
         return redirect("reimbursements:edit", pk=pk)
 
-    # Render HTML template
-    html_string = render_to_string(
-        "reimbursements/pdf/reimbursement_packet.html",
-        {
-            "reimbursement": reimbursement,
-            "now": timezone.now(),
-        }
-    )
-
-    # Try to use WeasyPrint for PDF generation
-    try:
-        from weasyprint import HTML, CSS
-
-        # Generate PDF
-        pdf_file = HTML(string=html_string, base_url=request.build_absolute_uri('/')).write_pdf()
+    job = request_packet_pdf(reimbursement, requested_by=request.user)
 
-        # Return as downloadable file
-        response = HttpResponse(pdf_file, content_type="application/pdf")
+    if job.status == PDFRenderJob.Status.DONE:
+        reimbursement.refresh_from_db(fields=["packet_pdf", "packet_generated_at"])
         filename = f"reimbursement_{reimbursement.pk}_{reimbursement.person.last_name}.pdf"
-        response["Content-Disposition"] = f'attachment; filename="{filename}"'
-        return response
-
-    except ImportError:
-        # WeasyPrint not installed - return HTML preview instead
-        messages.warning(
-            request,
-            "PDF generation requires WeasyPrint. Install with: pip install weasyprint"
+        return FileResponse(
+            reimbursement.packet_pdf.open("rb"),
+            as_attachment=True,
+            filename=filename,
+            content_type="application/pdf",
         )
-        return HttpResponse(html_string)
+
+    if job.is_pending:
+        messages.info(request, "The PDF is being generated. Please try again in a minute.")
+        return redirect("reimbursements:detail", pk=pk)
+
+    # Render failed (e.g. WeasyPrint not installed) - return HTML preview instead
+    messages.warning(request, f"PDF generation failed: {job.error}")
+    return HttpResponse(
+        render_to_string(PACKET_PDF_TEMPLATE, {"reimbursement": reimbursement, "now": timezone.now()})
+    )
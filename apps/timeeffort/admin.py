@@ -1,6 +1,7 @@
 from datetime import datetime, time, timedelta
 
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django.utils.html import format_html
 
@@ -8,6 +9,7 @@ from .models import (
     Activity,
     AIMHoliday,
     DirectorDefaultAllocation,
+    GrantEffortMonth,
     PDFSnapshot,
     PeriodReport,
     PeriodReportLine,
@@ -16,9 +18,16 @@ from .models import (
     ReportingWeek,
     SalaryIndirectAllocation,
     StaffTimesheetProfile,
+    SupervisorApproval,
     WeeklyTimesheet,
     WeeklyTimesheetLine,
 )
+from .services import (
+    iter_pdf_bundle,
+    pdf_bundle_reports,
+    request_final_pdfs,
+    supervisor_approve,
+)
 
 
 # =============================================================================
@@ -212,10 +221,18 @@ class WeeklyTimesheetAdmin(admin.ModelAdmin):
     inlines = [WeeklyTimesheetLineInline]
     actions = ["unlock_to_draft", "supervisor_approve_timesheets"]
 
+    def get_queryset(self, request):
+        return (
+            super().get_queryset(request)
+            .select_related("staff__user", "week__period")
+            .with_totals()
+        )
+
     def total_hours_display(self, obj):
         return obj.total_hours
 
     total_hours_display.short_description = "Total Hours"
+    total_hours_display.admin_order_field = "calculated_total_hours"
 
     @admin.action(
         description="Unlock selected timesheets back to Draft (use with care)"
@@ -229,16 +246,11 @@ class WeeklyTimesheetAdmin(admin.ModelAdmin):
 
     @admin.action(description="Supervisor-approve selected submitted timesheets")
     def supervisor_approve_timesheets(self, request, queryset):
-        submitted = queryset.filter(status=WeeklyTimesheet.Status.SUBMITTED)
-        now = timezone.now()
-        updated = submitted.update(
-            supervisor_approved_at=now,
-            supervisor_approved_by=request.user,
-        )
+        updated, _ = supervisor_approve(request.user, timesheets=queryset)
         skipped = queryset.count() - updated
         msg = f"Approved {updated} timesheet(s)."
         if skipped:
-            msg += f" {skipped} skipped (not in Submitted status)."
+            msg += f" {skipped} skipped (not in Submitted status or already approved)."
         self.message_user(request, msg)
 
 
@@ -300,12 +312,14 @@ class PeriodReportAdmin(admin.ModelAdmin):
         "supervisor_name_snapshot",
         "employee_title_snapshot",
         "employee_name_snapshot",
+        "pdf_render_status",
     ]
     inlines = [PeriodReportLineInline]
     actions = [
         "action_supervisor_approve",
         "action_mark_processed",
         "action_unlock_to_draft",
+        "action_download_pdf_bundle",
     ]
 
     def status_badge(self, obj):
@@ -320,11 +334,7 @@ class PeriodReportAdmin(admin.ModelAdmin):
 
     @admin.action(description="Supervisor-approve selected submitted reports")
     def action_supervisor_approve(self, request, queryset):
-        eligible = queryset.filter(status=PeriodReport.Status.SUBMITTED)
-        count = 0
-        for report in eligible:
-            report.supervisor_approve(approved_by=request.user)
-            count += 1
+        _, count = supervisor_approve(request.user, reports=queryset)
         skipped = queryset.count() - count
         msg = f"Supervisor-approved {count} report(s)."
         if skipped:
@@ -355,6 +365,61 @@ class PeriodReportAdmin(admin.ModelAdmin):
         )
         self.message_user(request, f"{updated} report(s) reverted to Draft.")
 
+    @admin.action(description="Download final PDFs for selected reports (ZIP)")
+    def action_download_pdf_bundle(self, request, queryset):
+        reports = list(pdf_bundle_reports(queryset))
+        if not reports:
+            self.message_user(request, "No submitted reports selected.", level=messages.WARNING)
+            return None
+        jobs = request_final_pdfs(reports, requested_by=request.user)
+        response = StreamingHttpResponse(iter_pdf_bundle(reports, jobs), content_type="application/zip")
+        response["Content-Disposition"] = (
+            f'attachment; filename="period_reports_{timezone.localdate():%Y%m%d}.zip"'
+        )
+        return response
+
+
+@admin.register(SupervisorApproval)
+class SupervisorApprovalAdmin(admin.ModelAdmin):
+    list_display = ["approved_at", "approved_by", "timesheet", "period_report"]
+    list_select_related = [
+        "approved_by",
+        "timesheet__staff__user",
+        "timesheet__week__period",
+        "period_report__staff__user",
+        "period_report__period",
+    ]
+    readonly_fields = ["approved_at", "approved_by", "timesheet", "period_report"]
+    date_hierarchy = "approved_at"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(GrantEffortMonth)
+class GrantEffortMonthAdmin(admin.ModelAdmin):
+    list_display = ["staff", "month", "grant_code", "source", "hours", "percentage", "fiscal_ytd_hours"]
+    list_filter = ["fiscal_year", "source"]
+    list_select_related = ["staff__user", "month"]
+    search_fields = ["grant_code", "staff__user__last_name", "staff__user__first_name"]
+    readonly_fields = [
+        "staff",
+        "month",
+        "fiscal_year",
+        "grant_code",
+        "source",
+        "hours",
+        "percentage",
+        "fiscal_ytd_hours",
+        "refreshed_at",
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
 
 # =============================================================================
 # PDF SNAPSHOTS
@@ -369,10 +434,12 @@ class PDFSnapshotAdmin(admin.ModelAdmin):
         "version",
         "generated_by",
         "generated_at",
+        "render_status",
         "file_link",
     ]
     list_filter = ["pdf_type"]
-    readonly_fields = ["checksum", "generated_at", "version"]
+    list_select_related = ["render_job"]
+    readonly_fields = ["checksum", "render_key", "generated_at", "version", "render_job"]
 
     def file_link(self, obj):
         if obj.file:
@@ -5,3 +5,12 @@ class TimeEffortConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.timeeffort"
     verbose_name = "Time & Effort Reporting"
+
+    def ready(self):
+        from apps.pdfjobs.services import register_pdf_job
+
+        from . import signals
+        from .services import FinalPDFJob, WeeklyPDFJob
+
+        register_pdf_job(WeeklyPDFJob())
+        register_pdf_job(FinalPDFJob())
@@ -1,8 +1,17 @@
 from decimal import Decimal
 from django import forms
+from django.core.exceptions import ValidationError
 from django.forms import formset_factory
-
-from .models import Activity, DirectorDefaultAllocation, PeriodReportLine, WeeklyTimesheet, WeeklyTimesheetLine
+from django.forms.models import ModelChoiceIterator
+
+from .models import (
+    Activity,
+    DirectorDefaultAllocation,
+    PeriodReportLine,
+    WeeklyTimesheet,
+    WeeklyTimesheetLine,
+    activity_catalog,
+)
 
 
 HOUR_FIELD_ATTRS = {
@@ -13,11 +22,51 @@ HOUR_FIELD_ATTRS = {
 }
 
 
+class ActivityCatalogIterator(ModelChoiceIterator):
+    """Active activities from the cached catalog instead of one query per rendered form."""
+
+    def __init__(self, field):
+        self.field = field
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for activity in activity_catalog().active:
+            yield self.choice(activity)
+
+    def __len__(self):
+        return len(activity_catalog().active) + (1 if self.field.empty_label is not None else 0)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(activity_catalog().active)
+
+
+class ActivityChoiceField(forms.ModelChoiceField):
+    """Active-activity choice whose choices and cleaning both read activity_catalog()."""
+
+    iterator = ActivityCatalogIterator
+
+    def __init__(self, **kwargs):
+        super().__init__(queryset=Activity.objects.filter(is_active=True), **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if isinstance(value, Activity):
+            value = value.pk
+        try:
+            activity = activity_catalog().get(int(value))
+        except (TypeError, ValueError):
+            activity = None
+        if activity is None or not activity.is_active:
+            raise ValidationError(self.error_messages["invalid_choice"], code="invalid_choice")
+        return activity
+
+
 class WeeklyTimesheetLineForm(forms.Form):
     """A single activity row in the weekly entry form."""
 
-    activity = forms.ModelChoiceField(
-        queryset=Activity.objects.filter(is_active=True).order_by("sort_order", "name"),
+    activity = ActivityChoiceField(
         widget=forms.Select(attrs={"class": "form-select form-select-sm activity-select"}),
         empty_label="— Select activity —",
         required=False,
@@ -0,0 +1,272 @@
+"""
+Benchmark time & effort hot paths against synthetic data.
+
+All data is created inside a transaction that is rolled back at the end, so
+the command is safe to run against a development database. Synthetic periods
+are dated in 1901 to stay clear of real reporting periods.
+
+Usage:
+    python manage.py benchmark_timeeffort rollup
+    python manage.py benchmark_timeeffort rollup --staff 40 --activities 12 --repeat 50
+    python manage.py benchmark_timeeffort pdf --staff 1 --periods 2 --repeat 10
+"""
+
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.template.loader import render_to_string
+from django.test.utils import CaptureQueriesContext
+
+from apps.timeeffort.models import (
+    DAY_HOURS_FIELDS,
+    Activity,
+    PeriodReport,
+    ReportingPeriod,
+    ReportingWeek,
+    StaffTimesheetProfile,
+    WeeklyTimesheet,
+    WeeklyTimesheetLine,
+)
+from apps.timeeffort.services import (
+    WEEKLY_PDF_TEMPLATE,
+    _build_rollup_rows,
+    _combined_hours_pdf_context,
+    _weekly_pdf_context,
+    get_period_rollup,
+    initialize_period_report,
+)
+from utils.pdf_rendering import PDFRenderer
+
+BENCH_ANCHOR = date(1901, 1, 6)
+
+
+def _legacy_period_rollup(staff_profile, periods):
+    """The pre-SQL rollup: prefetch every line and sum Decimals in Python."""
+    timesheets = WeeklyTimesheet.objects.filter(
+        staff=staff_profile,
+        week__period__in=periods,
+        status=WeeklyTimesheet.Status.SUBMITTED,
+    ).prefetch_related("lines__activity")
+
+    aggregated = {}
+    for ts in timesheets:
+        for line in ts.lines.all():
+            if line.activity_id:
+                key = (
+                    str(line.activity),
+                    line.grant_code or line.activity.default_grant_code,
+                    line.activity.classification,
+                    line.activity.sort_order,
+                )
+            else:
+                key = (
+                    line.custom_activity_name or "Custom Activity",
+                    line.grant_code,
+                    Activity.Classification.DIRECT,
+                    999,
+                )
+            aggregated[key] = aggregated.get(key, Decimal("0")) + line.total_hours
+    return _build_rollup_rows(aggregated)
+
+
+class Command(BaseCommand):
+    help = "Benchmark time & effort hot paths against synthetic data (rolled back afterwards)"
+
+    targets = ["rollup", "pdf"]
+
+    def add_arguments(self, parser):
+        parser.add_argument("target", choices=self.targets, help="Code path to benchmark")
+        parser.add_argument("--staff", type=int, default=20, help="Synthetic staff profiles (default: 20)")
+        parser.add_argument("--periods", type=int, default=26, help="Biweekly periods to generate (default: 26)")
+        parser.add_argument("--activities", type=int, default=10, help="Lines per weekly timesheet (default: 10)")
+        parser.add_argument("--repeat", type=int, default=20, help="Timed iterations per implementation (default: 20)")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write("Seeding synthetic data...")
+            data = self.seed(options["staff"], options["periods"], options["activities"])
+            getattr(self, f"bench_{options['target']}")(data, options["repeat"])
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("Done (synthetic data rolled back)."))
+
+    # ------------------------------------------------------------------
+    # Seeding
+    # ------------------------------------------------------------------
+
+    def seed(self, staff_count, period_count, activity_count):
+        User = get_user_model()
+        activities = [
+            Activity.objects.create(
+                name=f"Bench Activity {i}",
+                default_grant_code=f"BENCH-{i:03d}" if i % 2 else "",
+                classification=list(Activity.Classification.values)[i % 4],
+                sort_order=i,
+            )
+            for i in range(activity_count)
+        ]
+
+        periods = []
+        weeks = []
+        for index in range(period_count):
+            start = BENCH_ANCHOR + timedelta(days=index * 14)
+            period = ReportingPeriod.objects.create(
+                period_index=index,
+                start_date=start,
+                end_date=start + timedelta(days=13),
+                label=f"Bench period {index}",
+            )
+            periods.append(period)
+            for w in range(2):
+                week_start = start + timedelta(days=w * 7)
+                weeks.append(
+                    ReportingWeek(
+                        period=period,
+                        week_number=w + 1,
+                        start_date=week_start,
+                        end_date=week_start + timedelta(days=6),
+                    )
+                )
+        ReportingWeek.objects.bulk_create(weeks)
+        weeks = list(ReportingWeek.objects.filter(period__in=periods))
+
+        profiles = []
+        for i in range(staff_count):
+            user = User.objects.create(username=f"bench_te_{i}")
+            profiles.append(
+                StaffTimesheetProfile.objects.create(
+                    user=user,
+                    staff_type=StaffTimesheetProfile.StaffType.SALARY,
+                )
+            )
+
+        timesheets = WeeklyTimesheet.objects.bulk_create(
+            [
+                WeeklyTimesheet(staff=profile, week=week, status=WeeklyTimesheet.Status.SUBMITTED)
+                for profile in profiles
+                for week in weeks
+            ]
+        )
+        hours = {field: Decimal("1.25") for field in DAY_HOURS_FIELDS}
+        WeeklyTimesheetLine.objects.bulk_create(
+            [
+                WeeklyTimesheetLine(timesheet=ts, activity=activity, **hours)
+                for ts in timesheets
+                for activity in activities
+            ],
+            batch_size=2000,
+        )
+        self.stdout.write(
+            f"  {len(profiles)} staff × {len(weeks)} weeks × {len(activities)} lines "
+            f"= {len(timesheets) * len(activities)} timesheet lines"
+        )
+        return {"profiles": profiles, "periods": periods, "activities": activities}
+
+    # ------------------------------------------------------------------
+    # Timing helpers
+    # ------------------------------------------------------------------
+
+    def _time(self, label, func, repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            result = func()
+        queries = len(ctx.captured_queries)
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f"  {label:<24} median {statistics.median(samples):8.2f} ms   "
+            f"best {min(samples):8.2f} ms   queries {queries}"
+        )
+        return result, statistics.median(samples)
+
+    def _report_speedup(self, before_ms, after_ms):
+        if after_ms:
+            self.stdout.write(self.style.SUCCESS(f"  speedup: {before_ms / after_ms:.1f}×"))
+
+    # ------------------------------------------------------------------
+    # Targets
+    # ------------------------------------------------------------------
+
+    def bench_rollup(self, data, repeat):
+        """Salary-style rollup (two periods) for one staff member."""
+        profile = data["profiles"][0]
+        periods = ReportingPeriod.objects.filter(pk__in=[p.pk for p in data["periods"][:2]])
+
+        self.stdout.write("get_period_rollup (2 periods, 1 staff):")
+        legacy, legacy_ms = self._time("python (legacy)", lambda: _legacy_period_rollup(profile, periods), repeat)
+        current, current_ms = self._time("sql group by", lambda: get_period_rollup(profile, periods), repeat)
+        if legacy != current:
+            self.stdout.write(self.style.ERROR("  results differ between implementations!"))
+        self._report_speedup(legacy_ms, current_ms)
+
+    def _packet_html(self, user):
+        from apps.reimbursements.models import ExpenseCategory, PaymentMethod, TaxStatus
+        from apps.reimbursements.services import (
+            PACKET_PDF_TEMPLATE,
+            PacketPDFJob,
+            add_expense_line_item,
+            create_reimbursement_request,
+        )
+        from people.models import People
+
+        person = People.objects.create(
+            first_name="Bench", last_name="Packet", email_address="bench-packet@example.invalid"
+        )
+        reimbursement = create_reimbursement_request(
+            person=person,
+            submitted_by=user,
+            tax_status=TaxStatus.US_CITIZEN,
+            payment_method=PaymentMethod.CHECK,
+            payment_address="1 Bench Rd",
+        )
+        for i in range(5):
+            add_expense_line_item(
+                reimbursement,
+                category=ExpenseCategory.AIRFARE,
+                description=f"Bench expense {i}",
+                date_incurred=BENCH_ANCHOR,
+                amount_requested=Decimal("125.00"),
+            )
+        handler = PacketPDFJob()
+        return render_to_string(PACKET_PDF_TEMPLATE, handler.context(handler.load(reimbursement.pk)))
+
+    def bench_pdf(self, data, repeat):
+        """WeasyPrint per-render setup: fresh HTML/fonts/CSS per PDF vs the shared PDFRenderer."""
+        try:
+            import weasyprint
+        except ImportError:
+            raise CommandError("WeasyPrint is not installed.")
+
+        profile = data["profiles"][0]
+        timesheet = WeeklyTimesheet.objects.filter(staff=profile).select_related("staff__user", "week__period").first()
+        report = PeriodReport.objects.create(
+            staff=profile, period=data["periods"][0], submission_type=PeriodReport.SubmissionType.HOURS
+        )
+        initialize_period_report(report)
+
+        documents = {
+            "weekly": render_to_string(WEEKLY_PDF_TEMPLATE, _weekly_pdf_context(timesheet)),
+            "combined": render_to_string(
+                "timeeffort/pdf/combined_report.html", _combined_hours_pdf_context(report)
+            ),
+            "reimbursement packet": self._packet_html(profile.user),
+        }
+
+        renderer = PDFRenderer()
+        started = time.perf_counter()
+        renderer.warm_up()
+        self.stdout.write(f"renderer warm-up: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+        for name, html_string in documents.items():
+            self.stdout.write(f"{name} PDF:")
+            _, cold_ms = self._time(
+                "new HTML per render", lambda: weasyprint.HTML(string=html_string).write_pdf(), repeat
+            )
+            _, shared_ms = self._time("shared renderer", lambda: renderer.render(html_string), repeat)
+            self._report_speedup(cold_ms, shared_ms)
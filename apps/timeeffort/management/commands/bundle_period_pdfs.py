@@ -0,0 +1,61 @@
+"""
+Render and bundle final period PDFs for period close.
+
+Every submitted report for the given periods gets an up-to-date final PDF
+(missing or stale ones are rendered in parallel worker processes), then all
+of them are streamed into one ZIP with a manifest.csv of SHA-256 checksums.
+
+Usage:
+    python manage.py bundle_period_pdfs --period 41
+    python manage.py bundle_period_pdfs --period 41 --period 42 -o close_2026_03.zip
+    python manage.py bundle_period_pdfs --report 310 --report 311 --workers 4
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.pdfjobs.services import pdf_render_executor
+from apps.timeeffort.models import PeriodReport
+from apps.timeeffort.services import iter_pdf_bundle, pdf_bundle_reports, render_final_pdfs
+
+
+class Command(BaseCommand):
+    help = "Render final PDFs for a period's reports and write them to one ZIP bundle"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--period", type=int, action="append", default=[], help="ReportingPeriod id (repeatable)")
+        parser.add_argument("--report", type=int, action="append", default=[], help="PeriodReport id (repeatable)")
+        parser.add_argument("-o", "--output", help="ZIP path (default: period_reports_<date>.zip)")
+        parser.add_argument("--workers", type=int, help="Render processes (default: PDF_RENDER_WORKER_PROCESSES)")
+
+    def handle(self, *args, **options):
+        if not options["period"] and not options["report"]:
+            raise CommandError("Pass at least one --period or --report.")
+
+        queryset = PeriodReport.objects.none()
+        if options["period"]:
+            queryset |= PeriodReport.objects.filter(period_id__in=options["period"])
+        if options["report"]:
+            queryset |= PeriodReport.objects.filter(pk__in=options["report"])
+        reports = list(pdf_bundle_reports(queryset))
+        if not reports:
+            raise CommandError("No submitted reports match.")
+
+        self.stdout.write(f"Rendering final PDFs for {len(reports)} report(s)...")
+        with pdf_render_executor(options["workers"]) as executor:
+            jobs = render_final_pdfs(reports, executor)
+
+        failed = [job for job in jobs.values() if job.status == job.Status.FAILED]
+        for job in failed:
+            self.stdout.write(self.style.WARNING(f"  Report {job.object_id}: {job.error}"))
+
+        output = options["output"] or f"period_reports_{timezone.localdate():%Y%m%d}.zip"
+        with open(output, "wb") as fh:
+            for chunk in iter_pdf_bundle(reports, jobs):
+                fh.write(chunk)
+
+        message = f"Wrote {output} ({len(reports) - len(failed)} PDF(s)"
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{message}, {len(failed)} failed)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{message})."))
@@ -0,0 +1,37 @@
+"""
+Keep the reporting calendar generated a rolling horizon ahead of today.
+
+Idempotent and cheap when nothing is missing (one query), so it is meant to
+run from a daily scheduled job instead of someone remembering the admin
+"Generate reporting periods" action.
+
+Usage:
+    python manage.py extend_reporting_calendar              # 13 salary months ahead
+    python manage.py extend_reporting_calendar --months 18
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.timeeffort.models import ReportingCalendar
+
+
+class Command(BaseCommand):
+    help = "Generate reporting periods through a rolling horizon ahead of today"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=13,
+            help="28-day salary months to keep generated beyond the current one (default: 13)",
+        )
+
+    def handle(self, *args, **options):
+        calendar = ReportingCalendar.objects.first()
+        if calendar is None:
+            raise CommandError("No reporting calendar exists. Create one in the admin first.")
+
+        created, skipped = calendar.extend_horizon(months_ahead=options["months"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Created {created} period(s); {skipped} already existed.")
+        )
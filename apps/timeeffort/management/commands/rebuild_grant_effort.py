@@ -0,0 +1,34 @@
+"""
+Rebuild the GrantEffortMonth summary table for whole fiscal years.
+
+Submitting timesheets and reports keeps the table current for the staff
+member involved; run this after bulk changes made outside those paths
+(admin bulk actions, data fixes) or to populate a new fiscal year.
+
+Usage:
+    python manage.py rebuild_grant_effort                 # current fiscal year
+    python manage.py rebuild_grant_effort --fy 2025 --fy 2026
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.timeeffort.services import fiscal_year_for, refresh_grant_effort
+
+
+class Command(BaseCommand):
+    help = "Recompute grant effort by staff, grant code and month for fiscal years"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fy",
+            type=int,
+            action="append",
+            default=[],
+            help="Fiscal year, named for the year it ends in (repeatable; default: current)",
+        )
+
+    def handle(self, *args, **options):
+        for fiscal_year in options["fy"] or [fiscal_year_for(timezone.localdate())]:
+            rows = refresh_grant_effort(fiscal_year)
+            self.stdout.write(self.style.SUCCESS(f"FY{fiscal_year}: {rows} grant effort row(s)."))
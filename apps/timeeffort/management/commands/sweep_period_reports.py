@@ -0,0 +1,70 @@
+"""
+Pre-generate final period reports once their submission deadline has passed.
+
+For every submitted report whose covered periods are past their deadline and
+whose weeks are all submitted, refresh the rollup and render the final PDF in
+a pool of worker processes, so payroll downloads are plain file serves.
+Reports already up to date are skipped by the render cache, so the sweep is
+safe to re-run. Schedule it off-peak, e.g. nightly from cron:
+
+    15 2 * * *  python manage.py sweep_period_reports
+
+Usage:
+    python manage.py sweep_period_reports              # deadlines in the last 14 days
+    python manage.py sweep_period_reports --days 60 --workers 4
+    python manage.py sweep_period_reports --dry-run
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.pdfjobs.services import pdf_render_executor
+from apps.timeeffort.services import post_deadline_reports, sweep_post_deadline_reports
+
+
+class Command(BaseCommand):
+    help = "Refresh and pre-render final PDFs for reports past their submission deadline"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=14,
+            help="Look back this many days for passed deadlines (default: 14)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.PDF_RENDER_WORKER_PROCESSES,
+            help=f"Render processes (default: {settings.PDF_RENDER_WORKER_PROCESSES})",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="List the reports without touching them")
+
+    def handle(self, *args, **options):
+        reports = post_deadline_reports(timezone.now() - timedelta(days=options["days"]))
+        if not reports:
+            self.stdout.write("No reports past their deadline.")
+            return
+
+        if options["dry_run"]:
+            for report in reports:
+                self.stdout.write(f"  {report}")
+            self.stdout.write(f"{len(reports)} report(s) would be swept.")
+            return
+
+        self.stdout.write(f"Sweeping {len(reports)} report(s)...")
+        with pdf_render_executor(options["workers"]) as executor:
+            jobs = sweep_post_deadline_reports(reports, executor)
+
+        failed = [job for job in jobs.values() if job.status == job.Status.FAILED]
+        for job in failed:
+            self.stdout.write(self.style.WARNING(f"  Report {job.object_id}: {job.error}"))
+
+        message = f"{len(reports) - len(failed)} final PDF(s) up to date"
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{message}, {len(failed)} failed."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{message}."))
@@ -0,0 +1,87 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("timeeffort", "0011_salary_indirect_activity_date_bounds"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PDFRenderJob",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("WEEKLY", "Weekly Report"),
+                            ("FINAL", "Final Period Report"),
+                            ("REIMB_PACKET", "Reimbursement Packet"),
+                        ],
+                        max_length=12,
+                    ),
+                ),
+                ("object_id", models.PositiveIntegerField()),
+                ("input_hash", models.CharField(help_text="SHA-256 of the render inputs.", max_length=64)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("QUEUED", "Queued"),
+                            ("RUNNING", "Running"),
+                            ("DONE", "Done"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="QUEUED",
+                        max_length=7,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "requested_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="pdf_render_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "PDF Render Job",
+                "verbose_name_plural": "PDF Render Jobs",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(fields=["status", "created_at"], name="timeeffort__status_2a4bf1_idx"),
+                    models.Index(fields=["kind", "object_id"], name="timeeffort__kind_cf46e4_idx"),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("kind", "object_id", "input_hash"),
+                        name="unique_pdf_render_job_inputs",
+                    ),
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name="pdfsnapshot",
+            name="render_job",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="snapshots",
+                to="timeeffort.pdfrenderjob",
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("timeeffort", "0012_pdfrenderjob"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="pdfsnapshot",
+            name="checksum",
+            field=models.CharField(db_index=True, help_text="SHA-256 of the PDF file content.", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="pdfsnapshot",
+            name="render_key",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="SHA-256 of the template, its mtime and the render inputs.",
+                max_length=64,
+            ),
+        ),
+    ]
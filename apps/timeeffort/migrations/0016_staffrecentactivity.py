@@ -0,0 +1,70 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+DAY_HOURS_FIELDS = ("hours_sun", "hours_mon", "hours_tue", "hours_wed", "hours_thu", "hours_fri", "hours_sat")
+RETAIN_WEEKS = 6
+
+
+def backfill_recent_activity(apps, schema_editor):
+    # Frozen copy of StaffRecentActivity.record, applied to each staff
+    # member's newest RETAIN_WEEKS timesheets.
+    StaffRecentActivity = apps.get_model("timeeffort", "StaffRecentActivity")
+    WeeklyTimesheet = apps.get_model("timeeffort", "WeeklyTimesheet")
+    WeeklyTimesheetLine = apps.get_model("timeeffort", "WeeklyTimesheetLine")
+
+    staff_ids = WeeklyTimesheet.objects.order_by().values_list("staff_id", flat=True).distinct()
+    for staff_id in staff_ids.iterator():
+        timesheets = list(
+            WeeklyTimesheet.objects.filter(staff_id=staff_id)
+            .order_by("-week__start_date")
+            .values_list("pk", "week_id", "week__start_date")[:RETAIN_WEEKS]
+        )
+        weeks = {
+            str(week_id): {"start": start.isoformat(), "lines": []}
+            for _pk, week_id, start in timesheets
+        }
+        week_by_timesheet = {pk: str(week_id) for pk, week_id, _start in timesheets}
+        lines = (
+            WeeklyTimesheetLine.objects.filter(timesheet_id__in=week_by_timesheet)
+            .order_by("custom_activity_name", "pk")
+            .values_list("timesheet_id", "activity_id", "grant_code", "custom_activity_name", *DAY_HOURS_FIELDS)
+        )
+        for timesheet_id, activity_id, grant_code, custom_activity_name, *hours in lines:
+            weeks[week_by_timesheet[timesheet_id]]["lines"].append({
+                "activity_id": activity_id,
+                "grant_code": grant_code,
+                "custom_activity_name": custom_activity_name,
+                "hours": [str(h or 0) for h in hours],
+            })
+        StaffRecentActivity.objects.update_or_create(staff_id=staff_id, defaults={"weeks": weeks})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("timeeffort", "0015_supervisorapproval"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StaffRecentActivity",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("weeks", models.JSONField(blank=True, default=dict)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "staff",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recent_activity",
+                        to="timeeffort.stafftimesheetprofile",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Staff Recent Activity",
+                "verbose_name_plural": "Staff Recent Activity",
+            },
+        ),
+        migrations.RunPython(backfill_recent_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("timeeffort", "0016_staffrecentactivity"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GrantEffortMonth",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "fiscal_year",
+                    models.PositiveSmallIntegerField(help_text="Named for the calendar year the fiscal year ends in."),
+                ),
+                ("grant_code", models.CharField(blank=True, max_length=50)),
+                (
+                    "source",
+                    models.CharField(
+                        choices=[("TIMESHEETS", "Timesheets"), ("REPORT", "Period Report")],
+                        max_length=10,
+                    ),
+                ),
+                ("hours", models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ("percentage", models.DecimalField(decimal_places=2, default=Decimal("0"), max_digits=5)),
+                ("fiscal_ytd_hours", models.DecimalField(blank=True, decimal_places=2, max_digits=9, null=True)),
+                ("refreshed_at", models.DateTimeField(auto_now=True)),
+                (
+                    "month",
+                    models.ForeignKey(
+                        help_text="First period of the 28-day salary month.",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="timeeffort.reportingperiod",
+                    ),
+                ),
+                (
+                    "staff",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="grant_effort",
+                        to="timeeffort.stafftimesheetprofile",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Grant Effort Month",
+                "verbose_name_plural": "Grant Effort Months",
+                "ordering": ["fiscal_year", "month__start_date", "grant_code"],
+                "indexes": [models.Index(fields=["fiscal_year", "grant_code"], name="timeeffort__fiscal__336db0_idx")],
+                "unique_together": {("staff", "month", "grant_code")},
+            },
+        ),
+    ]
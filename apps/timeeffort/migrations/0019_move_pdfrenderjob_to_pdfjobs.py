@@ -0,0 +1,30 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pdfjobs", "0001_initial"),
+        ("timeeffort", "0017_granteffortmonth"),
+    ]
+
+    operations = [
+        # State only: the table stays put and now belongs to pdfjobs.PDFRenderJob.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name="pdfsnapshot",
+                    name="render_job",
+                    field=models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="snapshots",
+                        to="pdfjobs.pdfrenderjob",
+                    ),
+                ),
+                migrations.DeleteModel(name="PDFRenderJob"),
+            ],
+        ),
+    ]
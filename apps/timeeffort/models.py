@@ -1,10 +1,79 @@
-from datetime import timedelta, datetime, time
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import date, timedelta, datetime, time
 from decimal import Decimal
+from time import monotonic
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
+from apps.pdfjobs.models import PDFRenderJob
+
+
+# Day columns on WeeklyTimesheetLine, in entry-grid order (Sunday first).
+DAY_HOURS_FIELDS = (
+    "hours_sun",
+    "hours_mon",
+    "hours_tue",
+    "hours_wed",
+    "hours_thu",
+    "hours_fri",
+    "hours_sat",
+)
+
+# apps.pdfjobs kinds for this app's PDFs (handlers in services, registered in
+# TimeEffortConfig.ready). object_id is a WeeklyTimesheet / PeriodReport pk.
+WEEKLY_PDF_JOB = "WEEKLY"
+FINAL_PDF_JOB = "FINAL"
+
+
+def line_hours_expression(prefix=""):
+    """
+    ORM expression for the total hours of a WeeklyTimesheetLine (sum of the
+    seven day columns), so totals can be computed in SQL instead of Python.
+
+    prefix: lookup path from the queried model to the line, e.g. "lines__".
+    """
+    expression = F(f"{prefix}{DAY_HOURS_FIELDS[0]}")
+    for field in DAY_HOURS_FIELDS[1:]:
+        expression = expression + F(f"{prefix}{field}")
+    return ExpressionWrapper(expression, output_field=DecimalField(max_digits=6, decimal_places=2))
+
+
+class ProcessCache:
+    """
+    A lookup structure built on first use in each process and rebuilt after
+    invalidate() or once it is `ttl` seconds old. Changes made in this
+    process call changed(); other processes' changes surface within the TTL.
+    """
+
+    def __init__(self, build, ttl):
+        self._build = build
+        self.ttl = ttl
+        self._value = None
+        self._built_at = 0.0
+
+    def get(self):
+        now = monotonic()
+        if self._value is None or now - self._built_at > self.ttl:
+            self._value = self._build()
+            self._built_at = now
+        return self._value
+
+    def invalidate(self):
+        self._value = None
+
+    def changed(self):
+        """
+        Drop the value now and again at commit, so a rebuild by another
+        thread between the two can't keep pre-commit data for a full TTL.
+        """
+        self.invalidate()
+        transaction.on_commit(self.invalidate)
+
 
 # =============================================================================
 # STAFF PROFILE
@@ -129,9 +198,14 @@ class Activity(models.Model):
         verbose_name_plural = "Activities"
 
     def __str__(self):
-        if self.default_grant_code:
-            return f"{self.name} / {self.default_grant_code}"
-        return self.name
+        return self.format_label(self.name, self.default_grant_code)
+
+    @staticmethod
+    def format_label(name, default_grant_code):
+        """Display label for an activity; also used for rollups built from .values() rows."""
+        if default_grant_code:
+            return f"{name} / {default_grant_code}"
+        return name
 
     def is_valid_for_week(self, week_start, week_end):
         """Return True if this activity is valid for any day in the given week range."""
@@ -142,6 +216,70 @@ class Activity(models.Model):
         return True
 
 
+ACTIVITY_CATALOG_TTL = 300
+
+
+class ActivityCatalog:
+    """
+    Every Activity, loaded in one query, with the lookups the entry forms
+    need: active activities in display order, presets, the holiday activity
+    and the activities valid for a date range. Get it via activity_catalog();
+    the instances are shared, so treat them as read-only.
+    """
+
+    def __init__(self, activities):
+        self.activities = list(activities)
+        self._by_id = {a.pk: a for a in self.activities}
+        self.active = [a for a in self.activities if a.is_active]
+        self.presets = [a for a in self.active if a.is_preset]
+        self.holiday_ids = frozenset(a.pk for a in self.activities if a.is_holiday_activity)
+        self.holiday_activity = next((a for a in self.active if a.is_holiday_activity), None)
+
+        # Validity index: active activities sorted by valid_from (open start
+        # first), so "started by `end`" is a prefix found by bisection.
+        self._rank = {a.pk: i for i, a in enumerate(self.active)}
+        self._by_start = sorted(self.active, key=lambda a: a.valid_from or date.min)
+        self._starts = [a.valid_from or date.min for a in self._by_start]
+        self._valid = {}
+
+    @classmethod
+    def build(cls):
+        return cls(Activity.objects.order_by("sort_order", "name"))
+
+    def get(self, pk):
+        return self._by_id.get(pk)
+
+    def valid_for(self, start, end):
+        """Active activities valid on any day from start to end, in display order."""
+        key = (start, end)
+        if key not in self._valid:
+            started = self._by_start[:bisect_right(self._starts, end)]
+            self._valid[key] = sorted(
+                (a for a in started if a.valid_to is None or a.valid_to >= start),
+                key=lambda a: self._rank[a.pk],
+            )
+        return self._valid[key]
+
+    def active_in(self, *classifications):
+        return [a for a in self.active if a.classification in classifications]
+
+
+_activity_catalog = ProcessCache(ActivityCatalog.build, ACTIVITY_CATALOG_TTL)
+
+
+def activity_catalog():
+    """This process's ActivityCatalog."""
+    return _activity_catalog.get()
+
+
+def invalidate_activity_catalog():
+    _activity_catalog.invalidate()
+
+
+def activities_changed():
+    _activity_catalog.changed()
+
+
 # =============================================================================
 # AIM HOLIDAYS
 # =============================================================================
@@ -160,6 +298,65 @@ class AIMHoliday(models.Model):
         return f"{self.name} ({self.date})"
 
 
+HolidayDate = namedtuple("HolidayDate", ["date", "name"])
+
+HOLIDAY_CALENDAR_TTL = 300
+
+
+class HolidayCalendar:
+    """
+    AIM holidays loaded one year at a time into sorted date lists, so range
+    counts and membership tests are a bisect rather than a query. Get it via
+    holiday_calendar().
+    """
+
+    def __init__(self):
+        self._years = {}
+
+    def _year(self, year):
+        if year not in self._years:
+            rows = AIMHoliday.objects.filter(date__year=year).order_by("date").values_list("date", "name")
+            self._years[year] = ([d for d, _ in rows], [HolidayDate(*row) for row in rows])
+        return self._years[year]
+
+    def _spans(self, start, end):
+        """(dates, holidays, lo, hi) slices of each year touched by start..end inclusive."""
+        for year in range(start.year, end.year + 1):
+            dates, holidays = self._year(year)
+            yield dates, holidays, bisect_left(dates, start), bisect_right(dates, end)
+
+    def count(self, start, end):
+        return sum(hi - lo for _, _, lo, hi in self._spans(start, end))
+
+    def between(self, start, end):
+        """HolidayDate(date, name) tuples from start to end inclusive, in date order."""
+        return [h for _, holidays, lo, hi in self._spans(start, end) for h in holidays[lo:hi]]
+
+    def dates_between(self, start, end):
+        return [h.date for h in self.between(start, end)]
+
+    def is_holiday(self, day):
+        dates, _ = self._year(day.year)
+        i = bisect_left(dates, day)
+        return i < len(dates) and dates[i] == day
+
+
+_holiday_calendar = ProcessCache(HolidayCalendar, HOLIDAY_CALENDAR_TTL)
+
+
+def holiday_calendar():
+    """This process's HolidayCalendar."""
+    return _holiday_calendar.get()
+
+
+def invalidate_holiday_calendar():
+    _holiday_calendar.invalidate()
+
+
+def holidays_changed():
+    _holiday_calendar.changed()
+
+
 # =============================================================================
 # REPORTING CALENDAR
 # =============================================================================
@@ -215,6 +412,28 @@ class ReportingCalendar(models.Model):
     # Generation
     # ------------------------------------------------------------------
 
+    def period_fields(self, period_index):
+        """Dates, label and deadline of the period at period_index (nothing is saved)."""
+        period_start = self.anchor_start_date + timedelta(days=period_index * 14)
+        period_end = period_start + timedelta(days=13)
+
+        label = (
+            f"{period_start.strftime('%b %-d')} – "
+            f"{period_end.strftime('%b %-d, %Y')}"
+        )
+
+        # submission_deadline = period end + 3 days at 14:00 local
+        deadline_naive = datetime.combine(
+            period_end + timedelta(days=3), time(14, 0)
+        )
+
+        return {
+            "start_date": period_start,
+            "end_date": period_end,
+            "label": label,
+            "submission_deadline": timezone.make_aware(deadline_naive),
+        }
+
     def generate_periods(self, months_back=24, months_forward=13):
         """
         Generate ReportingPeriod + ReportingWeek rows from months_back
@@ -226,58 +445,56 @@ class ReportingCalendar(models.Model):
         Returns (created_count, skipped_count).
         """
         # Each 28-day salary month = 2 biweekly periods
-        periods_back = months_back * 2
-        periods_forward = months_forward * 2
-        total_periods = periods_back + periods_forward
-
-        created = 0
-        skipped = 0
-
-        for i in range(total_periods):
-            # period_index relative to anchor (can be negative for past periods)
-            period_index = -periods_back + i
-            period_start = self.anchor_start_date + timedelta(days=period_index * 14)
-            period_end = period_start + timedelta(days=13)
-
-            label = (
-                f"{period_start.strftime('%b %-d')} – "
-                f"{period_end.strftime('%b %-d, %Y')}"
-            )
-
-            # submission_deadline = period end + 3 days at 14:00 local
-            deadline_naive = datetime.combine(
-                period_end + timedelta(days=3), time(14, 0)
-            )
-            deadline = timezone.make_aware(deadline_naive)
-
-            period, was_created = ReportingPeriod.objects.get_or_create(
-                calendar=self,
-                period_index=period_index,
-                defaults={
-                    "start_date": period_start,
-                    "end_date": period_end,
-                    "label": label,
-                    "submission_deadline": deadline,
-                },
-            )
+        return self.generate_period_range(-months_back * 2, months_forward * 2)
 
-            if was_created:
-                created += 1
-                for w in range(2):
-                    week_start = period_start + timedelta(days=w * 7)
-                    week_end = week_start + timedelta(days=6)
-                    ReportingWeek.objects.get_or_create(
-                        period=period,
-                        week_number=w + 1,
-                        defaults={
-                            "start_date": week_start,
-                            "end_date": week_end,
-                        },
-                    )
-            else:
-                skipped += 1
-
-        return created, skipped
+    def extend_horizon(self, months_ahead=13, today=None):
+        """
+        Make sure periods exist from the current salary month through
+        months_ahead 28-day months after it. Returns (created_count, skipped_count).
+        """
+        today = today or timezone.localdate()
+        # Start of the current 28-day window (salary months begin on even indexes)
+        first = self.period_index_for_date(today)
+        first -= first % 2
+        return self.generate_period_range(first, first + (months_ahead + 1) * 2)
+
+    @transaction.atomic
+    def generate_period_range(self, first_index, stop_index):
+        """
+        Bulk-create the periods with first_index <= period_index < stop_index,
+        and the two weeks of each new period, in a fixed number of queries.
+        Existing periods are left untouched. Returns (created_count, skipped_count).
+        """
+        indexes = range(first_index, stop_index)
+        existing = set(
+            self.periods.filter(period_index__in=indexes).values_list("period_index", flat=True)
+        )
+        missing = [i for i in indexes if i not in existing]
+        if not missing:
+            return 0, len(existing)
+
+        # ignore_conflicts also covers a concurrent run (or a legacy period on the same dates)
+        ReportingPeriod.objects.bulk_create(
+            [ReportingPeriod(calendar=self, period_index=i, **self.period_fields(i)) for i in missing],
+            ignore_conflicts=True,
+        )
+        created = list(self.periods.filter(period_index__in=missing))
+        ReportingWeek.objects.bulk_create(
+            [
+                ReportingWeek(
+                    period=period,
+                    week_number=w + 1,
+                    start_date=period.start_date + timedelta(days=w * 7),
+                    end_date=period.start_date + timedelta(days=w * 7 + 6),
+                )
+                for period in created
+                for w in range(2)
+            ],
+            ignore_conflicts=True,
+        )
+        # bulk_create sends no post_save signals
+        calendar_changed()
+        return len(created), len(indexes) - len(created)
 
 
 # =============================================================================
@@ -353,17 +570,16 @@ class ReportingPeriod(models.Model):
         Label covering this period + the next (28 days).
         For display on salary/director reports.
         """
-        try:
-            next_p = ReportingPeriod.objects.get(
-                calendar=self.calendar,
-                period_index=self.period_index + 1,
-            )
-            return (
-                f"{self.start_date.strftime('%b %-d')} – "
-                f"{next_p.end_date.strftime('%b %-d, %Y')}"
-            )
-        except ReportingPeriod.DoesNotExist:
+        return self.window_label(calendar_index().offset(self, 1))
+
+    def window_label(self, next_period):
+        """Label for the 28-day window of this period + next_period (own label if None)."""
+        if next_period is None:
             return self.label
+        return (
+            f"{self.start_date.strftime('%b %-d')} – "
+            f"{next_period.end_date.strftime('%b %-d, %Y')}"
+        )
 
     @property
     def edits_allowed(self):
@@ -410,11 +626,119 @@ class ReportingWeek(models.Model):
         return f"{self.period.label} — Week {self.week_number} ({self.start_date} – {self.end_date})"
 
 
+# =============================================================================
+# CALENDAR INDEX  (in-memory period/week lookup)
+# =============================================================================
+
+
+CalendarPeriod = namedtuple(
+    "CalendarPeriod", ["id", "calendar_id", "period_index", "start_date", "end_date", "label"]
+)
+CalendarWeek = namedtuple("CalendarWeek", ["id", "period_id", "week_number", "start_date", "end_date"])
+
+# Other processes' changes (admin edits, the horizon command) are picked up
+# after this long; changes made in this process invalidate immediately.
+CALENDAR_INDEX_TTL = 300
+
+
+class CalendarIndex:
+    """
+    Every ReportingPeriod and ReportingWeek, keyed for neighbour lookups:
+    (calendar, period_index) → period, (period, week_number) → week, and
+    date → period/week. Built with two queries; get it via calendar_index().
+    """
+
+    def __init__(self, periods, weeks):
+        self.periods = {p.id: p for p in periods}
+        self._by_index = {(p.calendar_id, p.period_index): p for p in periods}
+        self._weeks = {(w.period_id, w.week_number): w for w in weeks}
+        self._period_by_date = {}
+        for p in periods:
+            for offset in range((p.end_date - p.start_date).days + 1):
+                self._period_by_date[p.start_date + timedelta(days=offset)] = p
+        self._week_by_date = {}
+        for w in weeks:
+            for offset in range((w.end_date - w.start_date).days + 1):
+                self._week_by_date[w.start_date + timedelta(days=offset)] = w
+
+    @classmethod
+    def build(cls):
+        return cls(
+            [CalendarPeriod(*row) for row in ReportingPeriod.objects.values_list(*CalendarPeriod._fields)],
+            [CalendarWeek(*row) for row in ReportingWeek.objects.values_list(*CalendarWeek._fields)],
+        )
+
+    def period(self, calendar_id, period_index):
+        return self._by_index.get((calendar_id, period_index))
+
+    def offset(self, period, offset):
+        """The period `offset` steps from period (a ReportingPeriod or CalendarPeriod), or None."""
+        return self._by_index.get((period.calendar_id, period.period_index + offset))
+
+    def salary_anchor(self, period):
+        """First period of the 28-day salary window containing period, or None."""
+        return self.period(period.calendar_id, period.period_index - period.period_index % 2)
+
+    def salary_window(self, period):
+        """The (up to two) periods of the 28-day salary window containing period, in order."""
+        anchor_index = period.period_index - period.period_index % 2
+        return [
+            p for p in (
+                self.period(period.calendar_id, anchor_index),
+                self.period(period.calendar_id, anchor_index + 1),
+            )
+            if p is not None
+        ]
+
+    def week(self, period_id, week_number):
+        return self._weeks.get((period_id, week_number))
+
+    def period_for_date(self, d):
+        return self._period_by_date.get(d)
+
+    def week_for_date(self, d):
+        return self._week_by_date.get(d)
+
+
+_calendar_index = ProcessCache(CalendarIndex.build, CALENDAR_INDEX_TTL)
+
+
+def calendar_index():
+    """This process's CalendarIndex."""
+    return _calendar_index.get()
+
+
+def invalidate_calendar_index():
+    _calendar_index.invalidate()
+
+
+def calendar_changed():
+    _calendar_index.changed()
+
+
 # =============================================================================
 # WEEKLY TIMESHEETS  (Salary + Hourly only; Directors skip this layer)
 # =============================================================================
 
 
+class WeeklyTimesheetQuerySet(models.QuerySet):
+    def with_totals(self):
+        """Annotate each timesheet with the SQL sum of its lines' hours (read by total_hours)."""
+        return self.annotate(
+            calculated_total_hours=Coalesce(
+                Sum(line_hours_expression("lines__")),
+                Value(Decimal("0")),
+                output_field=DecimalField(max_digits=6, decimal_places=2),
+            )
+        )
+
+
+class WeeklyTimesheetLineQuerySet(models.QuerySet):
+    def with_totals(self):
+        """Annotate each line with the sum of its seven day columns (read by total_hours)."""
+        return self.annotate(calculated_total_hours=line_hours_expression())
+
+
 class WeeklyTimesheet(models.Model):
     class Status(models.TextChoices):
         DRAFT = "DRAFT", "Draft"
@@ -454,6 +778,8 @@ class WeeklyTimesheet(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = WeeklyTimesheetQuerySet.as_manager()
+
     class Meta:
         unique_together = [("staff", "week")]
         ordering = ["week__start_date"]
@@ -469,7 +795,13 @@ class WeeklyTimesheet(models.Model):
 
     @property
     def total_hours(self):
-        return sum(line.total_hours for line in self.lines.all())
+        """From with_totals() or prefetched lines when available, otherwise one SUM query."""
+        if "calculated_total_hours" in self.__dict__:
+            return self.calculated_total_hours
+        if "lines" in getattr(self, "_prefetched_objects_cache", {}):
+            return sum((line.total_hours for line in self.lines.all()), Decimal("0"))
+        total = self.lines.aggregate(total=Sum(line_hours_expression()))["total"]
+        return total if total is not None else Decimal("0")
 
     @property
     def is_zero_week(self):
@@ -509,12 +841,8 @@ class WeeklyTimesheet(models.Model):
         timesheet, created = cls.objects.get_or_create(staff=staff, week=week)
 
         if created:
-            try:
-                holiday_activity = Activity.objects.get(
-                    is_holiday_activity=True,
-                    is_active=True,
-                )
-            except Activity.DoesNotExist:
+            holiday_activity = activity_catalog().holiday_activity
+            if holiday_activity is None:
                 return timesheet
 
             # Map Python weekday (Mon=0 … Sun=6) to hours field name
@@ -528,9 +856,7 @@ class WeeklyTimesheet(models.Model):
                 5: "hours_sat",
             }
 
-            holidays = AIMHoliday.objects.filter(
-                date__range=[week.start_date, week.end_date]
-            )
+            holidays = holiday_calendar().between(week.start_date, week.end_date)
 
             for holiday in holidays:
                 field = day_field.get(holiday.date.weekday())
@@ -580,6 +906,8 @@ class WeeklyTimesheetLine(models.Model):
         help_text="Brief note about work performed this week for this activity.",
     )
 
+    objects = WeeklyTimesheetLineQuerySet.as_manager()
+
     class Meta:
         ordering = ["activity__sort_order", "activity__name", "custom_activity_name"]
         verbose_name = "Timesheet Line"
@@ -591,6 +919,8 @@ class WeeklyTimesheetLine(models.Model):
 
     @property
     def total_hours(self):
+        if "calculated_total_hours" in self.__dict__:
+            return self.calculated_total_hours
         return sum([
             self.hours_sun or Decimal("0"),
             self.hours_mon or Decimal("0"),
@@ -615,6 +945,90 @@ class WeeklyTimesheetLine(models.Model):
         ]
 
 
+# =============================================================================
+# RECENT ACTIVITY SNAPSHOT  (carry-forward source for the entry forms)
+# =============================================================================
+
+
+class StaffRecentActivity(models.Model):
+    """
+    The lines on a staff member's most recently saved weeks, kept as one
+    JSON document so the weekly entry forms can carry rows forward without
+    walking back through earlier timesheets.
+
+    weeks maps str(week_id) to {"start": ISO date, "lines": [...]}, newest
+    RETAIN_WEEKS only. save_timesheet_lines() records a week as it saves it;
+    any other write to a week's timesheet or lines drops that week (see
+    signals), and readers fall back to the timesheet tables for a week the
+    snapshot doesn't hold.
+    """
+
+    RETAIN_WEEKS = 6
+
+    staff = models.OneToOneField(
+        StaffTimesheetProfile,
+        on_delete=models.CASCADE,
+        related_name="recent_activity",
+    )
+    weeks = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Staff Recent Activity"
+        verbose_name_plural = "Staff Recent Activity"
+
+    def __str__(self):
+        return f"Recent activity — {self.staff}"
+
+    def lines_for(self, week_id):
+        """
+        Unsaved WeeklyTimesheetLines for week_id as last recorded, or None if
+        the snapshot doesn't hold that week. Only the activity, grant code,
+        custom name and day hours are kept.
+        """
+        entry = self.weeks.get(str(week_id))
+        if entry is None:
+            return None
+        return [
+            WeeklyTimesheetLine(
+                activity_id=row["activity_id"],
+                grant_code=row["grant_code"],
+                custom_activity_name=row["custom_activity_name"],
+                **{field: Decimal(hours) for field, hours in zip(DAY_HOURS_FIELDS, row["hours"])},
+            )
+            for row in entry["lines"]
+        ]
+
+    @classmethod
+    def record(cls, staff_id, week, lines):
+        """Store lines as week's entry for staff_id, dropping all but the newest RETAIN_WEEKS weeks."""
+        with transaction.atomic():
+            snapshot, _ = cls.objects.select_for_update().get_or_create(staff_id=staff_id)
+            snapshot.weeks[str(week.id)] = {
+                "start": week.start_date.isoformat(),
+                "lines": [
+                    {
+                        "activity_id": line.activity_id,
+                        "grant_code": line.grant_code,
+                        "custom_activity_name": line.custom_activity_name,
+                        "hours": [str(getattr(line, field) or Decimal("0")) for field in DAY_HOURS_FIELDS],
+                    }
+                    for line in sorted(lines, key=lambda line: line.custom_activity_name)
+                ],
+            }
+            newest = sorted(snapshot.weeks.items(), key=lambda item: item[1]["start"], reverse=True)
+            snapshot.weeks = dict(newest[:cls.RETAIN_WEEKS])
+            snapshot.save()
+
+    @classmethod
+    def forget(cls, staff_id, week_id):
+        """Drop week_id from staff_id's snapshot, if it's there."""
+        with transaction.atomic():
+            snapshot = cls.objects.select_for_update().filter(staff_id=staff_id).first()
+            if snapshot and snapshot.weeks.pop(str(week_id), None) is not None:
+                snapshot.save(update_fields=["weeks", "updated_at"])
+
+
 # =============================================================================
 # PERIOD REPORT  (unified for all staff types)
 # =============================================================================
@@ -725,29 +1139,41 @@ class PeriodReport(models.Model):
         """Last date covered by this report (end of the 28-day window for salary/director)."""
         if self.staff.is_hourly:
             return self.period.end_date
-        try:
-            next_period = ReportingPeriod.objects.get(
-                calendar=self.period.calendar,
-                period_index=self.period.period_index + 1,
-            )
-            return next_period.end_date
-        except ReportingPeriod.DoesNotExist:
-            return self.period.end_date
+        next_period = calendar_index().offset(self.period, 1)
+        return next_period.end_date if next_period else self.period.end_date
 
     @property
     def covered_periods(self):
         """QuerySet of ReportingPeriod objects this report covers (1 for hourly, 2 for salary/director)."""
         if self.staff.is_hourly:
             return ReportingPeriod.objects.filter(pk=self.period_id)
+        next_period = calendar_index().offset(self.period, 1)
         return ReportingPeriod.objects.filter(
-            calendar=self.period.calendar,
-            period_index__in=[self.period.period_index, self.period.period_index + 1],
+            pk__in=[self.period_id] + ([next_period.id] if next_period else [])
         )
 
     @property
     def covered_weeks(self):
         return ReportingWeek.objects.filter(period__in=self.covered_periods)
 
+    # ------------------------------------------------------------------
+    # Final PDF render status
+    # ------------------------------------------------------------------
+
+    @property
+    def pdf_render_job(self):
+        """Most recent final-PDF render job for this report, or None."""
+        return (
+            PDFRenderJob.objects.filter(kind=FINAL_PDF_JOB, object_id=self.pk)
+            .order_by("-created_at")
+            .first()
+        )
+
+    @property
+    def pdf_render_status(self):
+        job = self.pdf_render_job
+        return job.status if job else ""
+
     # ------------------------------------------------------------------
     # Readiness checks (hours-based only)
     # ------------------------------------------------------------------
@@ -879,6 +1305,100 @@ class PeriodReportLine(models.Model):
         return f"{self.activity_name_snapshot} — {hours}"
 
 
+# =============================================================================
+# SUPERVISOR APPROVALS  (audit trail)
+# =============================================================================
+
+
+class SupervisorApproval(models.Model):
+    """
+    One supervisor sign-off of a weekly timesheet or a period report.
+    Written alongside the bulk UPDATE in services.supervisor_approve, since
+    the update itself leaves no per-row history.
+    """
+
+    approved_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="supervisor_approvals",
+    )
+    approved_at = models.DateTimeField()
+    timesheet = models.ForeignKey(
+        WeeklyTimesheet,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="approvals",
+    )
+    period_report = models.ForeignKey(
+        PeriodReport,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="approvals",
+    )
+
+    class Meta:
+        ordering = ["-approved_at"]
+        verbose_name = "Supervisor Approval"
+        verbose_name_plural = "Supervisor Approvals"
+
+    def __str__(self):
+        return f"{self.timesheet or self.period_report} — approved {self.approved_at:%Y-%m-%d}"
+
+
+# =============================================================================
+# GRANT EFFORT SUMMARY
+# =============================================================================
+
+
+class GrantEffortMonth(models.Model):
+    """
+    One staff member's effort on one grant code over one 28-day salary
+    month, for fiscal-year grant reporting. Derived data: kept up to date by
+    services.refresh_grant_effort() when a report is submitted, and rebuilt
+    by the rebuild_grant_effort command.
+
+    Hourly and salary rows come from submitted timesheet lines (hours, share
+    of the month, fiscal-year-to-date hours). Director rows come from their
+    submitted percentage reports, so they carry a percentage only.
+    """
+
+    class Source(models.TextChoices):
+        TIMESHEETS = "TIMESHEETS", "Timesheets"
+        REPORT = "REPORT", "Period Report"
+
+    staff = models.ForeignKey(
+        StaffTimesheetProfile,
+        on_delete=models.CASCADE,
+        related_name="grant_effort",
+    )
+    month = models.ForeignKey(
+        ReportingPeriod,
+        on_delete=models.CASCADE,
+        related_name="+",
+        help_text="First period of the 28-day salary month.",
+    )
+    fiscal_year = models.PositiveSmallIntegerField(help_text="Named for the calendar year the fiscal year ends in.")
+    grant_code = models.CharField(max_length=50, blank=True)
+    source = models.CharField(max_length=10, choices=Source.choices)
+    hours = models.DecimalField(max_digits=8, decimal_places=2, null=True, blank=True)
+    percentage = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal("0"))
+    fiscal_ytd_hours = models.DecimalField(max_digits=9, decimal_places=2, null=True, blank=True)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [("staff", "month", "grant_code")]
+        indexes = [models.Index(fields=["fiscal_year", "grant_code"])]
+        ordering = ["fiscal_year", "month__start_date", "grant_code"]
+        verbose_name = "Grant Effort Month"
+        verbose_name_plural = "Grant Effort Months"
+
+    def __str__(self):
+        return f"{self.staff} — {self.grant_code or 'No grant'} — {self.month.start_date:%b %Y}"
+
+
 # =============================================================================
 # PDF SNAPSHOTS
 # =============================================================================
@@ -913,7 +1433,22 @@ class PDFSnapshot(models.Model):
         null=True,
         related_name="generated_pdfs",
     )
-    checksum = models.CharField(max_length=64, help_text="SHA-256 of the PDF file content.")
+    checksum = models.CharField(
+        max_length=64, db_index=True, help_text="SHA-256 of the PDF file content."
+    )
+    render_key = models.CharField(
+        max_length=64,
+        blank=True,
+        db_index=True,
+        help_text="SHA-256 of the template, its mtime and the render inputs.",
+    )
+    render_job = models.ForeignKey(
+        PDFRenderJob,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="snapshots",
+    )
 
     class Meta:
         ordering = ["-generated_at"]
@@ -923,6 +1458,11 @@ class PDFSnapshot(models.Model):
     def __str__(self):
         return f"{self.get_pdf_type_display()} v{self.version} — {self.generated_at:%Y-%m-%d}"
 
+    @property
+    def render_status(self):
+        """Status of the render job that produced this snapshot ("" for direct renders)."""
+        return self.render_job.status if self.render_job_id else ""
+
 
 # =============================================================================
 # DIRECTOR DEFAULT ALLOCATION
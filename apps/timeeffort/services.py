@@ -5,31 +5,167 @@ All business logic lives here: rollup calculations, PDF generation, validation.
 Views should never compute percentages or touch WeasyPrint directly.
 """
 
+import csv
 import hashlib
-import threading
+import io
+import zipfile
+from collections import Counter
+from datetime import date, timedelta
 from decimal import Decimal, ROUND_HALF_UP
 from io import BytesIO
 
+from django.conf import settings
 from django.core.files.base import ContentFile
-from django.template.loader import render_to_string
+from django.db import transaction
+from django.db.models import F, FloatField, Prefetch, Q, Sum, Value, Window
+from django.db.models.functions import Cast, Coalesce, Floor, NullIf
 from django.utils import timezone
 
+from apps.pdfjobs.models import PDFRenderJob
+from apps.pdfjobs.services import (
+    PDFJobHandler,
+    claim_pdf_job,
+    enqueue_pdf_render,
+    pdf_job_handler,
+    render_pdf,
+    render_pdf_jobs,
+    request_pdf_render,
+)
+
 from .models import (
     Activity,
-    AIMHoliday,
+    GrantEffortMonth,
     PDFSnapshot,
     PeriodReport,
     PeriodReportLine,
+    ReportingPeriod,
+    ReportingWeek,
+    StaffRecentActivity,
+    StaffTimesheetProfile,
+    SupervisorApproval,
     WeeklyTimesheet,
     WeeklyTimesheetLine,
+    DAY_HOURS_FIELDS,
+    FINAL_PDF_JOB,
+    WEEKLY_PDF_JOB,
+    calendar_index,
+    holiday_calendar,
+    line_hours_expression,
 )
 
 
+# =============================================================================
+# TIMESHEET LINE SAVES
+# =============================================================================
+
+
+LINE_VALUE_FIELDS = DAY_HOURS_FIELDS + ("description",)
+
+
+def _line_key(activity_id, grant_code, custom_activity_name):
+    return (activity_id, grant_code or "", custom_activity_name or "")
+
+
+def save_timesheet_lines(timesheet, rows):
+    """
+    Make timesheet's lines match rows without recreating unchanged ones.
+
+    rows: iterable of dicts with activity_id, grant_code, custom_activity_name
+    and any of the hours_* / description values (missing ones default to
+    0 / ""). Existing lines are matched on (activity, grant code, custom
+    name) and updated in place, new rows are bulk-created and lines with no
+    matching row are deleted, so line ids stay stable across draft saves.
+    The saved lines are also recorded in the staff member's
+    StaffRecentActivity snapshot.
+
+    Returns True if anything was written.
+    """
+    existing = {}
+    for line in timesheet.lines.order_by("pk"):
+        key = _line_key(line.activity_id, line.grant_code, line.custom_activity_name)
+        existing.setdefault(key, []).append(line)
+
+    to_create, to_update, saved = [], [], []
+    for row in rows:
+        key = _line_key(row.get("activity_id"), row.get("grant_code"), row.get("custom_activity_name"))
+        values = {field: row.get(field) or Decimal("0") for field in DAY_HOURS_FIELDS}
+        values["description"] = row.get("description") or ""
+
+        # Pop so a form that repeats a key keeps one line per repeat
+        matches = existing.get(key)
+        line = matches.pop(0) if matches else None
+        if line is None:
+            line = WeeklyTimesheetLine(
+                timesheet=timesheet,
+                activity_id=key[0],
+                grant_code=key[1],
+                custom_activity_name=key[2],
+                **values,
+            )
+            to_create.append(line)
+        elif any(getattr(line, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(line, field, value)
+            to_update.append(line)
+        saved.append(line)
+
+    stale = [line.pk for lines in existing.values() for line in lines]
+    if not (to_create or to_update or stale):
+        return False
+
+    with transaction.atomic():
+        if stale:
+            WeeklyTimesheetLine.objects.filter(pk__in=stale).delete()
+        if to_update:
+            WeeklyTimesheetLine.objects.bulk_update(to_update, LINE_VALUE_FIELDS)
+        if to_create:
+            WeeklyTimesheetLine.objects.bulk_create(to_create)
+        StaffRecentActivity.record(timesheet.staff_id, timesheet.week, saved)
+    return True
+
+
+def recent_activity(profile):
+    """profile's StaffRecentActivity snapshot (unsaved and empty if there isn't one yet)."""
+    return StaffRecentActivity.objects.filter(staff=profile).first() or StaffRecentActivity(staff=profile)
+
+
+def recent_week_lines(snapshot, week_id):
+    """
+    The lines snapshot.staff last saved for week_id: from the snapshot when
+    it holds that week, otherwise from the database (a list either way).
+    """
+    lines = snapshot.lines_for(week_id)
+    if lines is None:
+        lines = list(
+            WeeklyTimesheetLine.objects.filter(timesheet__staff_id=snapshot.staff_id, timesheet__week_id=week_id)
+        )
+    return lines
+
+
 # =============================================================================
 # ROLLUP / CALCULATION
 # =============================================================================
 
 
+# Columns a line rollup is grouped by (see _rollup_key for how they collapse into a row).
+ROLLUP_GROUP_FIELDS = (
+    "activity_id",
+    "activity__name",
+    "activity__default_grant_code",
+    "activity__classification",
+    "activity__sort_order",
+    "grant_code",
+    "custom_activity_name",
+)
+
+CLASSIFICATION_ORDER = {
+    Activity.Classification.DIRECT: 0,
+    Activity.Classification.INDIRECT: 1,
+    Activity.Classification.LEAVE: 2,
+    Activity.Classification.UNALLOWABLE: 3,
+}
+
+
 def get_period_rollup(staff_profile, periods):
     """
     Compute rolled-up hours per (activity_name, grant_code, classification) across
@@ -48,34 +184,52 @@ def get_period_rollup(staff_profile, periods):
             "sort_order": int,
         }
     Sorted by classification order then sort_order.
+
+    The day columns are summed in the database with a single GROUP BY over
+    activity / grant code / custom name; only the grouped rows reach Python.
     """
-    timesheets = WeeklyTimesheet.objects.filter(
-        staff=staff_profile,
-        week__period__in=periods,
-        status=WeeklyTimesheet.Status.SUBMITTED,
-    ).prefetch_related("lines__activity")
+    grouped = (
+        WeeklyTimesheetLine.objects.filter(
+            timesheet__staff=staff_profile,
+            timesheet__week__period__in=periods,
+            timesheet__status=WeeklyTimesheet.Status.SUBMITTED,
+        )
+        .values(*ROLLUP_GROUP_FIELDS)
+        .order_by()
+        .annotate(hours=Sum(line_hours_expression()))
+    )
 
-    # Aggregate: key = (activity_name, grant_code, classification, sort_order)
     aggregated = {}
-    for ts in timesheets:
-        for line in ts.lines.all():
-            if line.activity_id:
-                key = (
-                    str(line.activity),
-                    line.grant_code or line.activity.default_grant_code,
-                    line.activity.classification,
-                    line.activity.sort_order,
-                )
-            else:
-                # Custom free-text row (salary only)
-                key = (
-                    line.custom_activity_name or "Custom Activity",
-                    line.grant_code,
-                    Activity.Classification.DIRECT,
-                    999,
-                )
-            aggregated[key] = aggregated.get(key, Decimal("0")) + line.total_hours
+    for row in grouped:
+        key = _rollup_key(row)
+        aggregated[key] = aggregated.get(key, Decimal("0")) + (row["hours"] or Decimal("0"))
+
+    return _build_rollup_rows(aggregated)
+
 
+def _rollup_key(row):
+    """
+    Map a grouped .values() row to its rollup key:
+    (activity_name, grant_code, classification, sort_order).
+    """
+    if row["activity_id"]:
+        return (
+            Activity.format_label(row["activity__name"], row["activity__default_grant_code"]),
+            row["grant_code"] or row["activity__default_grant_code"],
+            row["activity__classification"],
+            row["activity__sort_order"],
+        )
+    # Custom free-text row (salary only)
+    return (
+        row["custom_activity_name"] or "Custom Activity",
+        row["grant_code"],
+        Activity.Classification.DIRECT,
+        999,
+    )
+
+
+def _build_rollup_rows(aggregated):
+    """Turn {rollup_key: hours} into sorted rollup rows with percentages."""
     if not aggregated:
         return []
 
@@ -83,13 +237,6 @@ def get_period_rollup(staff_profile, periods):
     if total_hours == 0:
         return []
 
-    classification_order = {
-        Activity.Classification.DIRECT: 0,
-        Activity.Classification.INDIRECT: 1,
-        Activity.Classification.LEAVE: 2,
-        Activity.Classification.UNALLOWABLE: 3,
-    }
-
     rows = []
     for (activity_name, grant_code, classification, sort_order), hours in aggregated.items():
         percentage = (hours / total_hours * 100).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
@@ -101,7 +248,7 @@ def get_period_rollup(staff_profile, periods):
                 "total_hours": hours,
                 "percentage": percentage,
                 "sort_order": sort_order,
-                "_class_order": classification_order.get(classification, 99),
+                "_class_order": CLASSIFICATION_ORDER.get(classification, 99),
             }
         )
 
@@ -109,6 +256,122 @@ def get_period_rollup(staff_profile, periods):
     return rows
 
 
+def get_org_rollup(periods):
+    """
+    All-staff rollup for the payroll processor: every active hourly/salary
+    profile's submitted hours by activity and grant across the given periods.
+
+    Runs a fixed number of queries regardless of headcount — one grouped
+    line query for the hours matrix, one annotated timesheet query for the
+    status flags, plus profiles, weeks and period reports.
+
+    Returns:
+        {
+            "weeks": [ReportingWeek, ...],
+            "columns": [{"activity_name", "grant_code", "classification"}, ...],
+            "rows": [
+                {
+                    "profile": StaffTimesheetProfile,
+                    "cells": [Decimal | None, ...],   # aligned with columns
+                    "total_hours": Decimal,
+                    "outstanding_weeks": [ReportingWeek, ...],
+                    "zero_weeks": [ReportingWeek, ...],
+                    "unapproved_weeks": [ReportingWeek, ...],
+                    "reports": [PeriodReport, ...],
+                },
+                ...
+            ],
+        }
+    """
+    profiles = list(
+        StaffTimesheetProfile.objects.filter(
+            is_active=True,
+            staff_type__in=[
+                StaffTimesheetProfile.StaffType.HOURLY,
+                StaffTimesheetProfile.StaffType.SALARY,
+            ],
+        )
+        .select_related("user", "supervisor")
+        .order_by("user__last_name", "user__first_name", "user__username")
+    )
+    weeks = list(ReportingWeek.objects.filter(period__in=periods).order_by("start_date"))
+    weeks_by_id = {week.id: week for week in weeks}
+
+    # Hours matrix: one GROUP BY across all staff
+    grouped = (
+        WeeklyTimesheetLine.objects.filter(
+            timesheet__staff__in=profiles,
+            timesheet__week__period__in=periods,
+            timesheet__status=WeeklyTimesheet.Status.SUBMITTED,
+        )
+        .values("timesheet__staff_id", *ROLLUP_GROUP_FIELDS)
+        .order_by()
+        .annotate(hours=Sum(line_hours_expression()))
+    )
+    hours_by_staff = {}
+    for row in grouped:
+        key = _rollup_key(row)
+        staff_hours = hours_by_staff.setdefault(row["timesheet__staff_id"], {})
+        staff_hours[key] = staff_hours.get(key, Decimal("0")) + (row["hours"] or Decimal("0"))
+
+    column_keys = sorted(
+        {key for staff_hours in hours_by_staff.values() for key in staff_hours},
+        key=lambda k: (CLASSIFICATION_ORDER.get(k[2], 99), k[3], k[0], k[1]),
+    )
+
+    # Status flags: one row per timesheet with its total hours
+    timesheets_by_staff = {}
+    timesheets = (
+        WeeklyTimesheet.objects.filter(staff__in=profiles, week__in=weeks)
+        .values("staff_id", "week_id", "status", "supervisor_approved_at")
+        .order_by()
+        .annotate(hours=Sum(line_hours_expression("lines__")))
+    )
+    for ts in timesheets:
+        timesheets_by_staff.setdefault(ts["staff_id"], {})[ts["week_id"]] = ts
+
+    reports_by_staff = {}
+    for report in PeriodReport.objects.filter(
+        staff__in=profiles, period__in=periods
+    ).select_related("period").order_by("period__start_date"):
+        reports_by_staff.setdefault(report.staff_id, []).append(report)
+
+    rows = []
+    for profile in profiles:
+        staff_hours = hours_by_staff.get(profile.id, {})
+        staff_timesheets = timesheets_by_staff.get(profile.id, {})
+        submitted = {
+            week_id: ts for week_id, ts in staff_timesheets.items()
+            if ts["status"] == WeeklyTimesheet.Status.SUBMITTED
+        }
+        rows.append(
+            {
+                "profile": profile,
+                "cells": [staff_hours.get(key) for key in column_keys],
+                "total_hours": sum(staff_hours.values(), Decimal("0")),
+                "outstanding_weeks": [w for w in weeks if w.id not in submitted],
+                "zero_weeks": [
+                    weeks_by_id[week_id] for week_id, ts in submitted.items()
+                    if not ts["hours"]
+                ],
+                "unapproved_weeks": [
+                    weeks_by_id[week_id] for week_id, ts in submitted.items()
+                    if ts["supervisor_approved_at"] is None
+                ],
+                "reports": reports_by_staff.get(profile.id, []),
+            }
+        )
+
+    return {
+        "weeks": weeks,
+        "columns": [
+            {"activity_name": name, "grant_code": grant_code, "classification": classification}
+            for name, grant_code, classification, _sort_order in column_keys
+        ],
+        "rows": rows,
+    }
+
+
 def validate_period_percentages(rollup_rows):
     """
     Returns True if percentages sum to 100% ± 0.1 (rounding tolerance).
@@ -129,10 +392,14 @@ def initialize_period_report(report):
     Create or refresh PeriodReportLines for a HOURS-based period report.
 
     Computes the rollup from all submitted WeeklyTimesheets across the report's
-    covered periods (1 for hourly, 2 for salary), then writes PeriodReportLines.
+    covered periods (1 for hourly, 2 for salary), then brings the report's
+    lines in step with it. Lines are matched on (activity, grant code,
+    classification) and updated in place, so their duties descriptions and
+    ids survive a refresh, and a refresh that changes nothing writes nothing
+    (the final PDF's render key stays the same).
 
     Snapshots employee/supervisor info at call time.
-    Report is left in DRAFT status — caller must call report.submit() when ready.
+    Report status is left as-is — caller must call report.submit() when ready.
 
     For PCT (director) reports use initialize_director_period_report() instead.
     """
@@ -142,32 +409,52 @@ def initialize_period_report(report):
     rollup = get_period_rollup(report.staff, report.covered_periods)
     total_hours = sum(r["total_hours"] for r in rollup)
 
-    # Replace all existing lines
-    report.lines.all().delete()
+    existing = {}
+    for line in report.lines.order_by("sort_order", "pk"):
+        key = (line.activity_name_snapshot, line.grant_code_snapshot, line.classification_snapshot)
+        existing.setdefault(key, []).append(line)
 
+    to_create, to_update = [], []
     for i, row in enumerate(rollup):
-        PeriodReportLine.objects.create(
-            period_report=report,
-            activity_name_snapshot=row["activity_name"],
-            grant_code_snapshot=row["grant_code"],
-            classification_snapshot=row["classification"],
-            total_hours=row["total_hours"],
-            percentage=row["percentage"],
-            duties_description="",
-            sort_order=i,
-        )
-
-    report.total_hours = total_hours
-    report.supervisor_name_snapshot = report.staff.supervisor_name
-    report.employee_title_snapshot = report.staff.title
-    report.employee_name_snapshot = report.staff.user.get_full_name() or report.staff.user.username
-    report.save(update_fields=[
-        "total_hours",
-        "supervisor_name_snapshot",
-        "employee_title_snapshot",
-        "employee_name_snapshot",
-        "updated_at",
-    ])
+        values = {"total_hours": row["total_hours"], "percentage": row["percentage"], "sort_order": i}
+        matches = existing.get((row["activity_name"], row["grant_code"], row["classification"]))
+        line = matches.pop(0) if matches else None
+        if line is None:
+            to_create.append(PeriodReportLine(
+                period_report=report,
+                activity_name_snapshot=row["activity_name"],
+                grant_code_snapshot=row["grant_code"],
+                classification_snapshot=row["classification"],
+                duties_description="",
+                **values,
+            ))
+        elif any(getattr(line, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(line, field, value)
+            to_update.append(line)
+    stale = [line.pk for lines in existing.values() for line in lines]
+
+    report_values = {
+        "total_hours": total_hours,
+        "supervisor_name_snapshot": report.staff.supervisor_name,
+        "employee_title_snapshot": report.staff.title,
+        "employee_name_snapshot": report.staff.user.get_full_name() or report.staff.user.username,
+    }
+    changed_fields = [field for field, value in report_values.items() if getattr(report, field) != value]
+    if not (stale or to_update or to_create or changed_fields):
+        return report
+
+    with transaction.atomic():
+        if stale:
+            PeriodReportLine.objects.filter(pk__in=stale).delete()
+        if to_update:
+            PeriodReportLine.objects.bulk_update(to_update, ["total_hours", "percentage", "sort_order"])
+        if to_create:
+            PeriodReportLine.objects.bulk_create(to_create)
+        if changed_fields:
+            for field in changed_fields:
+                setattr(report, field, report_values[field])
+            report.save(update_fields=[*changed_fields, "updated_at"])
 
     return report
 
@@ -262,17 +549,9 @@ def initialize_director_period_report(report, defaults=None, holiday_pct=Decimal
 # =============================================================================
 
 
-def _render_pdf_bytes(template_name, context):
-    """Render a WeasyPrint PDF and return raw bytes."""
-    try:
-        from weasyprint import HTML
-    except ImportError:
-        raise RuntimeError(
-            "WeasyPrint is required for PDF generation. Install it with: pip install weasyprint"
-        )
-    html_string = render_to_string(template_name, context)
-    pdf_bytes = HTML(string=html_string, base_url="/").write_pdf()
-    return pdf_bytes
+WEEKLY_PDF_TEMPLATE = "timeeffort/pdf/weekly_report.html"
+FINAL_PDF_TEMPLATE = "timeeffort/pdf/final_report.html"
+COMBINED_PDF_TEMPLATE = "timeeffort/pdf/combined_report.html"
 
 
 def _sha256(data: bytes) -> str:
@@ -284,47 +563,89 @@ def _next_version(queryset):
     return (latest.version + 1) if latest else 1
 
 
+def _reuse_snapshot(snapshot, render_job=None):
+    """Point an existing snapshot at the job that asked for it again."""
+    if render_job is not None and snapshot.render_job_id != render_job.pk:
+        snapshot.render_job = render_job
+        snapshot.save(update_fields=["render_job"])
+    return snapshot
+
+
+def _cached_snapshot(snapshots, render_key, render_job=None):
+    """The latest snapshot in `snapshots` if it was rendered from render_key, else None."""
+    latest = snapshots.order_by("-version").first()
+    if latest and render_key and latest.render_key == render_key:
+        return _reuse_snapshot(latest, render_job)
+    return None
+
+
+def _save_snapshot(snapshots, pdf_bytes, filename, render_key="", **fields):
+    """
+    Store pdf_bytes as the next version in `snapshots` (one owner's snapshots
+    of one type). filename is formatted with the new version number.
+    """
+    version = _next_version(snapshots)
+    snapshot = PDFSnapshot(
+        version=version,
+        checksum=_sha256(pdf_bytes),
+        render_key=render_key,
+        **fields,
+    )
+    snapshot.file.save(filename.format(version=version), ContentFile(pdf_bytes), save=True)
+    return snapshot
+
+
 def generate_weekly_pdf(timesheet, generated_by=None):
     """
     Generate a weekly PDF snapshot for a submitted timesheet.
     Stores the file and returns the PDFSnapshot instance.
     """
-    lines = (
-        timesheet.lines.select_related("activity")
+    return render_pdf(pdf_job_handler(WEEKLY_PDF_JOB), timesheet, generated_by)
+
+
+def _weekly_pdf_inputs(timesheet):
+    return {
+        "status": timesheet.status,
+        "submitted_at": timesheet.submitted_at,
+        "zero_week_reason": timesheet.zero_week_reason,
+        "lines": list(timesheet.lines.order_by("pk").values()),
+    }
+
+
+def _weekly_pdf_context(timesheet):
+    lines = list(
+        timesheet.lines.with_totals()
+        .select_related("activity")
         .order_by("activity__sort_order", "activity__name")
-        .all()
     )
 
-    context = {
+    return {
         "timesheet": timesheet,
         "staff": timesheet.staff,
         "week": timesheet.week,
         "period": timesheet.week.period,
         "lines": lines,
-        "total_hours": timesheet.total_hours,
+        "total_hours": sum((line.total_hours for line in lines), Decimal("0")),
         "day_labels": ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"],
         "generated_at": timezone.now(),
     }
 
-    pdf_bytes = _render_pdf_bytes("timeeffort/pdf/weekly_report.html", context)
-    checksum = _sha256(pdf_bytes)
 
-    existing = PDFSnapshot.objects.filter(
-        timesheet=timesheet,
-        pdf_type=PDFSnapshot.PDFType.WEEKLY,
-    )
-    version = _next_version(existing)
+def _weekly_snapshots(timesheet):
+    return PDFSnapshot.objects.filter(timesheet=timesheet, pdf_type=PDFSnapshot.PDFType.WEEKLY)
 
-    filename = f"weekly_{timesheet.staff.user.username}_{timesheet.week.start_date}_v{version}.pdf"
-    snapshot = PDFSnapshot(
+
+def _save_weekly_snapshot(timesheet, pdf_bytes, generated_by=None, render_job=None, render_key=""):
+    return _save_snapshot(
+        _weekly_snapshots(timesheet),
+        pdf_bytes,
+        f"weekly_{timesheet.staff.user.username}_{timesheet.week.start_date}_v{{version}}.pdf",
+        render_key,
         timesheet=timesheet,
         pdf_type=PDFSnapshot.PDFType.WEEKLY,
-        version=version,
         generated_by=generated_by,
-        checksum=checksum,
+        render_job=render_job,
     )
-    snapshot.file.save(filename, ContentFile(pdf_bytes), save=True)
-    return snapshot
 
 
 def generate_final_pdf(period_report, generated_by=None):
@@ -337,12 +658,41 @@ def generate_final_pdf(period_report, generated_by=None):
     PeriodReportLines must already be saved with duties descriptions filled in.
     Sets generated_at on the report. Returns the PDFSnapshot instance.
     """
+    return render_pdf(pdf_job_handler(FINAL_PDF_JOB), period_report, generated_by)
+
+
+def _final_pdf_inputs(report):
+    return {
+        "status": report.status,
+        "total_hours": report.total_hours,
+        "snapshots": [
+            report.employee_name_snapshot,
+            report.employee_title_snapshot,
+            report.supervisor_name_snapshot,
+        ],
+        "lines": list(report.lines.order_by("pk").values()),
+        # Weekly grids in the combined PDF come from the covered timesheets
+        "timesheets": list(
+            WeeklyTimesheet.objects.filter(
+                staff_id=report.staff_id, week__period__in=report.covered_periods
+            ).order_by("pk").values_list("pk", "updated_at")
+        ),
+    }
+
+
+def _final_pdf_template(period_report):
+    if period_report.submission_type == PeriodReport.SubmissionType.HOURS:
+        return COMBINED_PDF_TEMPLATE
+    return FINAL_PDF_TEMPLATE
+
+
+def _final_pdf_context(period_report):
     if period_report.submission_type == PeriodReport.SubmissionType.HOURS:
-        return _generate_combined_hours_pdf(period_report, generated_by)
-    return _generate_pct_pdf(period_report, generated_by)
+        return _combined_hours_pdf_context(period_report)
+    return _pct_pdf_context(period_report)
 
 
-def _generate_pct_pdf(period_report, generated_by=None):
+def _pct_pdf_context(period_report):
     """Director PCT-based PDF using the existing final_report template."""
     lines = period_report.lines.order_by("sort_order", "activity_name_snapshot").all()
     direct = [ln for ln in lines if ln.classification_snapshot == Activity.Classification.DIRECT]
@@ -350,7 +700,7 @@ def _generate_pct_pdf(period_report, generated_by=None):
     leave = [ln for ln in lines if ln.classification_snapshot == Activity.Classification.LEAVE]
     unallowable = [ln for ln in lines if ln.classification_snapshot == Activity.Classification.UNALLOWABLE]
 
-    context = {
+    return {
         "report": period_report,
         "staff": period_report.staff,
         "period": period_report.period,
@@ -362,13 +712,10 @@ def _generate_pct_pdf(period_report, generated_by=None):
         "is_pct_report": True,
         "generated_at": timezone.now(),
     }
-    return _save_final_snapshot(period_report, generated_by, "timeeffort/pdf/final_report.html", context, "final")
 
 
-def _generate_combined_hours_pdf(period_report, generated_by=None):
+def _combined_hours_pdf_context(period_report):
     """Salary/hourly HOURS-based PDF: cover + 4 weekly grids + rollup table."""
-    from .models import ReportingWeek
-
     lines = period_report.lines.order_by("sort_order", "activity_name_snapshot").all()
     direct = [ln for ln in lines if ln.classification_snapshot == Activity.Classification.DIRECT]
     indirect = [ln for ln in lines if ln.classification_snapshot == Activity.Classification.INDIRECT]
@@ -379,13 +726,18 @@ def _generate_combined_hours_pdf(period_report, generated_by=None):
         period__in=period_report.covered_periods
     ).order_by("start_date")
 
+    timesheets = {
+        ts.week_id: ts
+        for ts in WeeklyTimesheet.objects.with_totals()
+        .filter(staff=period_report.staff, week__in=covered_weeks)
+        .prefetch_related(
+            Prefetch("lines", queryset=WeeklyTimesheetLine.objects.with_totals().select_related("activity"))
+        )
+    }
+
     weekly_data = []
     for week in covered_weeks:
-        ts = (
-            WeeklyTimesheet.objects.filter(staff=period_report.staff, week=week)
-            .prefetch_related("lines__activity")
-            .first()
-        )
+        ts = timesheets.get(week.pk)
         nonzero_lines = [ln for ln in ts.lines.all() if ln.total_hours > 0] if ts else []
         weekly_data.append({
             "week": week,
@@ -394,7 +746,7 @@ def _generate_combined_hours_pdf(period_report, generated_by=None):
             "total": ts.total_hours if ts else Decimal("0"),
         })
 
-    context = {
+    return {
         "report": period_report,
         "staff": period_report.staff,
         "period": period_report.period,
@@ -408,32 +760,26 @@ def _generate_combined_hours_pdf(period_report, generated_by=None):
         "generated_at": timezone.now(),
         "day_labels": ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"],
     }
-    return _save_final_snapshot(period_report, generated_by, "timeeffort/pdf/combined_report.html", context, "combined")
 
 
-def _save_final_snapshot(period_report, generated_by, template_name, context, prefix):
-    pdf_bytes = _render_pdf_bytes(template_name, context)
-    checksum = _sha256(pdf_bytes)
+def _final_snapshots(period_report):
+    return PDFSnapshot.objects.filter(period_report=period_report, pdf_type=PDFSnapshot.PDFType.FINAL)
 
-    existing = PDFSnapshot.objects.filter(
-        period_report=period_report,
-        pdf_type=PDFSnapshot.PDFType.FINAL,
-    )
-    version = _next_version(existing)
 
-    filename = (
+def _save_final_snapshot(period_report, pdf_bytes, generated_by, render_job=None, render_key=""):
+    prefix = "combined" if period_report.submission_type == PeriodReport.SubmissionType.HOURS else "final"
+    snapshot = _save_snapshot(
+        _final_snapshots(period_report),
+        pdf_bytes,
         f"{prefix}_{period_report.staff.user.username}"
         f"_{period_report.period.start_date}_{period_report.period.end_date}"
-        f"_v{version}.pdf"
-    )
-    snapshot = PDFSnapshot(
+        "_v{version}.pdf",
+        render_key,
         period_report=period_report,
         pdf_type=PDFSnapshot.PDFType.FINAL,
-        version=version,
         generated_by=generated_by,
-        checksum=checksum,
+        render_job=render_job,
     )
-    snapshot.file.save(filename, ContentFile(pdf_bytes), save=True)
 
     period_report.generated_at = timezone.now()
     period_report.save(update_fields=["generated_at", "updated_at"])
@@ -442,9 +788,733 @@ def _save_final_snapshot(period_report, generated_by, template_name, context, pr
 
 
 def generate_final_pdf_async(period_report, generated_by=None):
-    """Fire PDF generation in a background thread to avoid blocking the request."""
-    t = threading.Thread(target=generate_final_pdf, args=(period_report, generated_by), daemon=True)
-    t.start()
+    """Queue the final PDF for the render worker instead of blocking the request."""
+    return enqueue_pdf_render(FINAL_PDF_JOB, period_report, requested_by=generated_by)
+
+
+# =============================================================================
+# PDF RENDER QUEUE HANDLERS
+# =============================================================================
+
+
+class WeeklyPDFJob(PDFJobHandler):
+    kind = WEEKLY_PDF_JOB
+    label = "Weekly Report"
+    model = WeeklyTimesheet
+    templates = (WEEKLY_PDF_TEMPLATE,)
+
+    def load(self, object_id):
+        return WeeklyTimesheet.objects.select_related("staff__user", "week__period").get(pk=object_id)
+
+    def inputs(self, timesheet):
+        return _weekly_pdf_inputs(timesheet)
+
+    def template_name(self, timesheet):
+        return WEEKLY_PDF_TEMPLATE
+
+    def context(self, timesheet):
+        return _weekly_pdf_context(timesheet)
+
+    def save(self, timesheet, pdf_bytes, generated_by=None, render_job=None, render_key=""):
+        return _save_weekly_snapshot(timesheet, pdf_bytes, generated_by, render_job, render_key)
+
+    def cached(self, timesheet, render_key, render_job=None):
+        return _cached_snapshot(_weekly_snapshots(timesheet), render_key, render_job)
+
+    def has_output(self, timesheet, job):
+        return job.snapshots.exists()
+
+
+class FinalPDFJob(PDFJobHandler):
+    kind = FINAL_PDF_JOB
+    label = "Final Period Report"
+    model = PeriodReport
+    templates = (FINAL_PDF_TEMPLATE, COMBINED_PDF_TEMPLATE)
+
+    def load(self, object_id):
+        return PeriodReport.objects.select_related("staff__user", "period").get(pk=object_id)
+
+    def inputs(self, report):
+        return _final_pdf_inputs(report)
+
+    def template_name(self, report):
+        return _final_pdf_template(report)
+
+    def context(self, report):
+        return _final_pdf_context(report)
+
+    def save(self, report, pdf_bytes, generated_by=None, render_job=None, render_key=""):
+        return _save_final_snapshot(report, pdf_bytes, generated_by, render_job, render_key)
+
+    def cached(self, report, render_key, render_job=None):
+        return _cached_snapshot(_final_snapshots(report), render_key, render_job)
+
+    def has_output(self, report, job):
+        return job.snapshots.exists()
+
+
+# =============================================================================
+# PERIOD-CLOSE PDF BUNDLE
+# =============================================================================
+
+PDF_BUNDLE_CHUNK_SIZE = 64 * 1024
+
+PDF_BUNDLE_MANIFEST_FIELDS = [
+    "file",
+    "report_id",
+    "employee",
+    "staff_type",
+    "period_start",
+    "period_end",
+    "report_status",
+    "pdf_version",
+    "sha256",
+    "bytes",
+    "render_status",
+]
+
+
+def pdf_bundle_reports(queryset):
+    """Reports from queryset that can go into a bundle (anything past draft)."""
+    return (
+        queryset.exclude(status=PeriodReport.Status.DRAFT)
+        .select_related("staff__user", "period")
+        .order_by("period__start_date", "staff__user__last_name", "staff__user__first_name")
+    )
+
+
+def render_final_pdfs(reports, executor, requested_by=None):
+    """
+    Bring every report's final PDF up to date, rendering the missing or stale
+    ones in parallel in `executor`. Jobs already claimed by a worker are left
+    to it. Returns {report pk: PDFRenderJob}.
+    """
+    jobs = {
+        report.pk: enqueue_pdf_render(FINAL_PDF_JOB, report, requested_by)
+        for report in reports
+    }
+    claimed = [
+        job for job in jobs.values()
+        if job.status == PDFRenderJob.Status.QUEUED and claim_pdf_job(job)
+    ]
+    if claimed:
+        render_pdf_jobs(claimed, executor)
+    return jobs
+
+
+def request_final_pdfs(reports, requested_by=None):
+    """
+    render_final_pdfs for a web request: no process pool (forking a web
+    worker and closing its DB connection mid-request is not safe). Each
+    stale PDF is queued for the worker, or without one rendered inline, one
+    at a time. Returns {report pk: PDFRenderJob}.
+    """
+    return {
+        report.pk: request_pdf_render(FINAL_PDF_JOB, report, requested_by)
+        for report in reports
+    }
+
+
+class _ZipSink:
+    """Write-only stream for ZipFile that hands back what was written since the last drain()."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _pdf_bundle_filename(report):
+    return f"{report.staff.user.username}_{report.period.start_date}_{report.period.end_date}.pdf"
+
+
+def iter_pdf_bundle(reports, jobs=None):
+    """
+    Yield a ZIP archive of each report's latest final PDF plus manifest.csv,
+    chunk by chunk. PDFs are copied through in PDF_BUNDLE_CHUNK_SIZE pieces,
+    so memory use doesn't grow with the bundle. `jobs` (from
+    render_final_pdfs) fills the manifest's render_status column.
+    """
+    reports = list(reports)
+    jobs = jobs or {}
+    latest = {}
+    for snapshot in PDFSnapshot.objects.filter(
+        period_report__in=reports, pdf_type=PDFSnapshot.PDFType.FINAL
+    ).order_by("period_report_id", "-version"):
+        latest.setdefault(snapshot.period_report_id, snapshot)
+
+    manifest = io.StringIO()
+    writer = csv.DictWriter(manifest, fieldnames=PDF_BUNDLE_MANIFEST_FIELDS)
+    writer.writeheader()
+
+    sink = _ZipSink()
+    # PDFs are already compressed; storing them keeps the bundle cheap to build.
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as bundle:
+        for report in reports:
+            job = jobs.get(report.pk)
+            row = {
+                "report_id": report.pk,
+                "employee": report.employee_name_snapshot or report.staff.user.get_full_name(),
+                "staff_type": report.staff.get_staff_type_display(),
+                "period_start": report.period.start_date,
+                "period_end": report.period.end_date,
+                "report_status": report.get_status_display(),
+                "render_status": job.status if job else "",
+            }
+            snapshot = latest.get(report.pk)
+            if snapshot is None:
+                row["render_status"] = row["render_status"] or "MISSING"
+                writer.writerow(row)
+                continue
+
+            filename = _pdf_bundle_filename(report)
+            digest = hashlib.sha256()
+            size = 0
+            with snapshot.file.open("rb") as source, bundle.open(filename, "w") as target:
+                for chunk in iter(lambda: source.read(PDF_BUNDLE_CHUNK_SIZE), b""):
+                    target.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+
+            row.update(file=filename, pdf_version=snapshot.version, sha256=digest.hexdigest(), bytes=size)
+            writer.writerow(row)
+
+        bundle.writestr("manifest.csv", manifest.getvalue())
+    yield sink.drain()
+
+
+# =============================================================================
+# POST-DEADLINE SWEEP
+# =============================================================================
+
+# Reports the sweep leaves alone once payroll has processed them.
+SWEEP_REPORT_STATUSES = (PeriodReport.Status.SUBMITTED, PeriodReport.Status.SUPERVISOR_APPROVED)
+
+
+def post_deadline_reports(since, until=None):
+    """
+    Submitted reports whose last covered period's submission deadline fell
+    between since and until (default: now), and whose covered weeks are all
+    submitted. Timesheets can't change after the deadline, so their rollups
+    and final PDFs are final and can be produced ahead of payroll.
+    """
+    until = until or timezone.now()
+    index = calendar_index()
+    closed = set(
+        ReportingPeriod.objects.filter(submission_deadline__gt=since, submission_deadline__lte=until)
+        .values_list("pk", flat=True)
+    )
+    if not closed:
+        return []
+
+    def covered(report):
+        if report.staff.is_hourly:
+            return [report.period_id]
+        following = index.offset(report.period, 1)
+        return [report.period_id] + ([following.id] if following else [])
+
+    # A salary/director report is keyed on the first period of its pair
+    anchors = set(closed)
+    for pk in closed:
+        period = index.periods.get(pk)
+        previous = period and index.offset(period, -1)
+        if previous:
+            anchors.add(previous.id)
+    reports = [
+        report
+        for report in pdf_bundle_reports(
+            PeriodReport.objects.filter(period_id__in=anchors, status__in=SWEEP_REPORT_STATUSES)
+        )
+        if covered(report)[-1] in closed
+    ]
+
+    hours_reports = [r for r in reports if r.submission_type == PeriodReport.SubmissionType.HOURS]
+    period_ids = {pk for report in hours_reports for pk in covered(report)}
+    week_counts = Counter(
+        ReportingWeek.objects.filter(period_id__in=period_ids).values_list("period_id", flat=True)
+    )
+    submitted_counts = Counter(
+        WeeklyTimesheet.objects.filter(
+            staff_id__in={report.staff_id for report in hours_reports},
+            week__period_id__in=period_ids,
+            status=WeeklyTimesheet.Status.SUBMITTED,
+        ).values_list("staff_id", "week__period_id")
+    )
+    return [
+        report for report in reports
+        if report.submission_type != PeriodReport.SubmissionType.HOURS
+        or all(submitted_counts[(report.staff_id, pk)] == week_counts[pk] for pk in covered(report))
+    ]
+
+
+def sweep_post_deadline_reports(reports, executor):
+    """
+    Refresh each HOURS report's rollup, then bring every report's final PDF
+    up to date in executor. Returns {report pk: PDFRenderJob}.
+    """
+    for report in reports:
+        if report.submission_type == PeriodReport.SubmissionType.HOURS:
+            initialize_period_report(report)
+    return render_final_pdfs(reports, executor)
+
+
+# =============================================================================
+# GRANT EFFORT ANALYTICS
+# =============================================================================
+
+# Reports whose lines count toward grant effort.
+GRANT_EFFORT_REPORT_STATUSES = (
+    PeriodReport.Status.SUBMITTED,
+    PeriodReport.Status.SUPERVISOR_APPROVED,
+    PeriodReport.Status.PROCESSED,
+)
+
+GRANT_EFFORT_CSV_HEADER = [
+    "Fiscal Year",
+    "Month Start",
+    "Month End",
+    "Employee",
+    "Staff Type",
+    "Grant Code",
+    "Source",
+    "Hours",
+    "Percentage",
+    "Fiscal YTD Hours",
+]
+
+
+def fiscal_year_for(d):
+    """Fiscal year containing date d, named for the calendar year it ends in."""
+    start_month = settings.TIMEEFFORT_FISCAL_YEAR_START_MONTH
+    return d.year + 1 if start_month > 1 and d.month >= start_month else d.year
+
+
+def fiscal_year_months(fiscal_year):
+    """
+    {period id: salary month anchor} for every period whose 28-day salary
+    month starts in fiscal_year. From the calendar index, so no queries.
+    """
+    index = calendar_index()
+    months = {}
+    for period in index.periods.values():
+        anchor = index.salary_anchor(period) or period
+        if fiscal_year_for(anchor.start_date) == fiscal_year:
+            months[period.id] = anchor
+    return months
+
+
+def grant_effort_rows(fiscal_year, staff_ids=None):
+    """
+    Unsaved GrantEffortMonth rows for fiscal_year (optionally only staff_ids).
+
+    Timesheet effort is one SQL pass over the submitted lines with window
+    functions: hours per (staff, month, grant), the staff member's hours for
+    the month, and the running fiscal-year total per grant, collapsed to one
+    row per partition with DISTINCT. Director effort is one grouped query
+    over their submitted percentage report lines.
+    """
+    months = fiscal_year_months(fiscal_year)
+    index = calendar_index()
+    lines = WeeklyTimesheetLine.objects.filter(
+        timesheet__status=WeeklyTimesheet.Status.SUBMITTED,
+        timesheet__week__period_id__in=months,
+    )
+    director_lines = PeriodReportLine.objects.filter(
+        period_report__submission_type=PeriodReport.SubmissionType.PCT,
+        period_report__status__in=GRANT_EFFORT_REPORT_STATUSES,
+        period_report__period_id__in=months,
+    )
+    if staff_ids is not None:
+        lines = lines.filter(timesheet__staff_id__in=staff_ids)
+        director_lines = director_lines.filter(period_report__staff_id__in=staff_ids)
+
+    hours = line_hours_expression()
+    staff_id, month, grant = F("timesheet__staff_id"), F("month"), F("grant")
+    lines = (
+        lines.annotate(
+            # Salary months pair periods 2n and 2n + 1
+            month=Floor(Cast("timesheet__week__period__period_index", FloatField()) / 2),
+            grant=Coalesce(NullIf("grant_code", Value("")), "activity__default_grant_code", Value("")),
+        )
+        .annotate(
+            grant_hours=Window(Sum(hours), partition_by=[staff_id, month, grant]),
+            month_hours=Window(Sum(hours), partition_by=[staff_id, month]),
+            ytd_hours=Window(Sum(hours), partition_by=[staff_id, grant], order_by=month.asc()),
+        )
+        .values(
+            "timesheet__staff_id",
+            "timesheet__week__period__calendar_id",
+            "month",
+            "grant",
+            "grant_hours",
+            "month_hours",
+            "ytd_hours",
+        )
+        .order_by()
+        .distinct()
+    )
+
+    rows = []
+    for row in lines:
+        calendar_id, first_index = row["timesheet__week__period__calendar_id"], int(row["month"]) * 2
+        anchor = index.period(calendar_id, first_index) or index.period(calendar_id, first_index + 1)
+        if anchor is None:
+            continue
+        month_hours = row["month_hours"] or Decimal("0")
+        rows.append(GrantEffortMonth(
+            staff_id=row["timesheet__staff_id"],
+            month_id=anchor.id,
+            fiscal_year=fiscal_year,
+            grant_code=row["grant"],
+            source=GrantEffortMonth.Source.TIMESHEETS,
+            hours=row["grant_hours"],
+            percentage=(
+                (row["grant_hours"] / month_hours * 100).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+                if month_hours else Decimal("0")
+            ),
+            fiscal_ytd_hours=row["ytd_hours"],
+        ))
+
+    director_lines = (
+        director_lines.values("period_report__staff_id", "period_report__period_id", "grant_code_snapshot")
+        .annotate(percentage=Sum("percentage"))
+        .order_by()
+    )
+    for row in director_lines:
+        rows.append(GrantEffortMonth(
+            staff_id=row["period_report__staff_id"],
+            month_id=months[row["period_report__period_id"]].id,
+            fiscal_year=fiscal_year,
+            grant_code=row["grant_code_snapshot"],
+            source=GrantEffortMonth.Source.REPORT,
+            percentage=row["percentage"],
+        ))
+    return rows
+
+
+def refresh_grant_effort(fiscal_year, staff_ids=None):
+    """
+    Replace the stored GrantEffortMonth rows for fiscal_year (optionally
+    only staff_ids) with freshly computed ones. Returns the row count.
+    """
+    rows = grant_effort_rows(fiscal_year, staff_ids)
+    existing = GrantEffortMonth.objects.filter(fiscal_year=fiscal_year)
+    if staff_ids is not None:
+        existing = existing.filter(staff_id__in=staff_ids)
+    with transaction.atomic():
+        existing.delete()
+        GrantEffortMonth.objects.bulk_create(rows)
+    return len(rows)
+
+
+def refresh_staff_grant_effort(staff_id, period_id):
+    """
+    Recompute one staff member's effort for the fiscal year that period_id's
+    salary month falls in; called as their timesheets and reports change status.
+    """
+    index = calendar_index()
+    period = index.periods.get(period_id)
+    if period is None:
+        return 0
+    anchor = index.salary_anchor(period) or period
+    return refresh_grant_effort(fiscal_year_for(anchor.start_date), [staff_id])
+
+
+class _CSVLine:
+    """File-like object for csv.writer that hands back each row it writes."""
+
+    def write(self, value):
+        return value
+
+
+def iter_grant_effort_csv(fiscal_year):
+    """Stream fiscal_year's stored grant effort as CSV, one row at a time."""
+    writer = csv.writer(_CSVLine())
+    yield writer.writerow(GRANT_EFFORT_CSV_HEADER)
+    rows = (
+        GrantEffortMonth.objects.filter(fiscal_year=fiscal_year)
+        .select_related("staff__user", "month")
+        .order_by("grant_code", "staff__user__last_name", "staff__user__first_name", "month__start_date")
+    )
+    for row in rows.iterator(chunk_size=2000):
+        user = row.staff.user
+        yield writer.writerow([
+            row.fiscal_year,
+            row.month.start_date,
+            row.month.start_date + timedelta(days=27),
+            user.get_full_name() or user.username,
+            row.staff.get_staff_type_display(),
+            row.grant_code,
+            row.get_source_display(),
+            "" if row.hours is None else row.hours,
+            row.percentage,
+            "" if row.fiscal_ytd_hours is None else row.fiscal_ytd_hours,
+        ])
+
+
+# =============================================================================
+# DASHBOARD LOADING
+# =============================================================================
+
+
+class DashboardYear:
+    """
+    Everything a staff dashboard needs for one calendar year, fetched up front
+    (periods, weeks, the staff member's timesheets and reports) so period
+    summaries can be assembled in memory with no per-period queries. Holiday
+    counts come from the process-wide holiday_calendar().
+
+    Periods within 28 days either side of the year are loaded too, so 28-day
+    windows and "previous period" checks at the year boundary still resolve.
+    Directors have no weekly timesheets: pass include_timesheets=False to skip
+    the week and timesheet queries.
+    """
+
+    MARGIN = timedelta(days=28)
+
+    def __init__(self, profile, year, include_timesheets=True):
+        all_periods = list(
+            ReportingPeriod.objects.filter(
+                start_date__gte=date(year, 1, 1) - self.MARGIN,
+                start_date__lte=date(year, 12, 31) + self.MARGIN,
+            ).order_by("-start_date")
+        )
+        self.periods = [p for p in all_periods if p.start_date.year == year]
+        self._by_index = {(p.calendar_id, p.period_index): p for p in all_periods}
+
+        self.weeks_by_period = {}
+        self.timesheets_by_week = {}
+        if include_timesheets and all_periods:
+            for week in ReportingWeek.objects.filter(period__in=all_periods).order_by("start_date"):
+                self.weeks_by_period.setdefault(week.period_id, []).append(week)
+            self.timesheets_by_week = {
+                ts.week_id: ts
+                for ts in WeeklyTimesheet.objects.filter(staff=profile, week__period__in=all_periods)
+            }
+
+        self.reports_by_period = {}
+        if all_periods:
+            self.reports_by_period = {
+                report.period_id: report
+                for report in PeriodReport.objects.filter(staff=profile, period__in=all_periods)
+            }
+
+    def period_at(self, period, offset):
+        """The period `offset` steps from `period` in the same calendar, or None."""
+        return self._by_index.get((period.calendar_id, period.period_index + offset))
+
+    def window_end(self, period):
+        """End of the 28-day window starting at period (see views._get_28day_end)."""
+        next_period = self.period_at(period, 1)
+        return next_period.end_date if next_period else period.end_date
+
+    def salary_month_label(self, period):
+        """In-memory equivalent of ReportingPeriod.salary_month_label."""
+        return period.window_label(self.period_at(period, 1))
+
+    def window_weeks(self, period):
+        """Weeks of the 28-day salary window anchored at period, in date order."""
+        weeks = list(self.weeks_by_period.get(period.id, []))
+        next_period = self.period_at(period, 1)
+        if next_period:
+            weeks += self.weeks_by_period.get(next_period.id, [])
+        return sorted(weeks, key=lambda w: w.start_date)
+
+    def week_statuses(self, weeks):
+        return [{"week": week, "timesheet": self.timesheets_by_week.get(week.id)} for week in weeks]
+
+    def holiday_count(self, start, end):
+        return holiday_calendar().count(start, end)
+
+
+def _submission_summary(data, weeks):
+    """Shared progress fields for hourly and salary period cards."""
+    week_statuses = data.week_statuses(weeks)
+    submitted_ids = {
+        ws["week"].id for ws in week_statuses
+        if ws["timesheet"] and ws["timesheet"].status == WeeklyTimesheet.Status.SUBMITTED
+    }
+    return {
+        "total_weeks": len(weeks),
+        "submitted_count": len(submitted_ids),
+        "outstanding_weeks": [week for week in weeks if week.id not in submitted_ids],
+        "week_statuses": week_statuses,
+    }
+
+
+def hourly_period_summaries(data):
+    """Dashboard cards for hourly staff: one per 14-day period, newest first."""
+    summaries = []
+    for period in data.periods:
+        summary = {"period": period}
+        summary.update(_submission_summary(data, data.weeks_by_period.get(period.id, [])))
+        summaries.append(summary)
+    return summaries
+
+
+def salary_period_summaries(data):
+    """Dashboard cards for salary staff: one per 28-day window, newest first."""
+    summaries = []
+    for period in data.periods:
+        if not period.is_salary_month_start:
+            continue
+        end_date = data.window_end(period)
+        summary = {
+            "period": period,
+            "period_label": data.salary_month_label(period),
+            "period_end": end_date,
+            "report": data.reports_by_period.get(period.id),
+            "has_prev": data.period_at(period, -2) is not None,
+            "holiday_count": data.holiday_count(period.start_date, end_date),
+        }
+        summary.update(_submission_summary(data, data.window_weeks(period)))
+        summaries.append(summary)
+    return summaries
+
+
+def director_period_summaries(data):
+    """Dashboard cards for directors: one per 28-day window, newest first."""
+    summaries = []
+    for period in data.periods:
+        if not period.is_salary_month_start:
+            continue
+        end_date = data.window_end(period)
+        holiday_count = data.holiday_count(period.start_date, end_date)
+        summaries.append(
+            {
+                "period": period,
+                "period_label": data.salary_month_label(period),
+                "period_end": end_date,
+                "report": data.reports_by_period.get(period.id),
+                "holiday_count": holiday_count,
+                "holiday_pct": holiday_count * 5,
+            }
+        )
+    return summaries
+
+
+def attach_salary_month_labels(reports):
+    """
+    Set ``period_label`` (the salary month label) on each report using one
+    query for the following periods, instead of one lookup per report.
+    Returns the reports as a list.
+    """
+    reports = list(reports)
+    if not reports:
+        return reports
+    following = Q()
+    for report in reports:
+        following |= Q(calendar_id=report.period.calendar_id, period_index=report.period.period_index + 1)
+    next_periods = {
+        (p.calendar_id, p.period_index): p for p in ReportingPeriod.objects.filter(following)
+    }
+    for report in reports:
+        period = report.period
+        report.period_label = period.window_label(
+            next_periods.get((period.calendar_id, period.period_index + 1))
+        )
+    return reports
+
+
+# =============================================================================
+# SUPERVISOR APPROVAL
+# =============================================================================
+
+
+def get_supervisor_queue(supervisor):
+    """
+    Everything awaiting supervisor's sign-off across their supervised_staff:
+    submitted, unapproved timesheets (with SQL totals) and submitted period
+    reports. One query each, however many staff and weeks are pending.
+    """
+    timesheets = (
+        WeeklyTimesheet.objects.with_totals()
+        .filter(
+            staff__supervisor=supervisor,
+            status=WeeklyTimesheet.Status.SUBMITTED,
+            supervisor_approved_at__isnull=True,
+        )
+        .select_related("staff__user", "week__period")
+        .order_by("staff__user__last_name", "staff__user__first_name", "week__start_date")
+    )
+    reports = (
+        PeriodReport.objects.filter(
+            staff__supervisor=supervisor,
+            status=PeriodReport.Status.SUBMITTED,
+        )
+        .select_related("staff__user", "period")
+        .order_by("staff__user__last_name", "staff__user__first_name", "period__start_date")
+    )
+    return {"timesheets": list(timesheets), "reports": list(reports)}
+
+
+def _lock_selected(queryset, **filters):
+    """
+    SELECT ... FOR UPDATE the rows of queryset matching filters. The lock is
+    taken on a fresh queryset keyed on the selected pks: callers pass admin
+    changelist querysets annotated with with_totals(), and PostgreSQL refuses
+    FOR UPDATE alongside their GROUP BY.
+    """
+    return (
+        queryset.model._default_manager.filter(pk__in=queryset.values("pk"), **filters)
+        .select_for_update()
+    )
+
+
+@transaction.atomic
+def supervisor_approve(approved_by, timesheets=None, reports=None):
+    """
+    Sign off the submitted, not-yet-approved rows of the given timesheet and
+    period report querysets: one UPDATE per model plus one bulk insert of
+    SupervisorApproval audit rows, regardless of how many rows are approved.
+    Anything else in the querysets is left alone.
+
+    Returns (timesheets_approved, reports_approved).
+    """
+    now = timezone.now()
+    timesheet_ids, report_ids = [], []
+
+    if timesheets is not None:
+        timesheet_ids = list(
+            _lock_selected(
+                timesheets,
+                status=WeeklyTimesheet.Status.SUBMITTED,
+                supervisor_approved_at__isnull=True,
+            ).values_list("pk", flat=True)
+        )
+        WeeklyTimesheet.objects.filter(pk__in=timesheet_ids).update(
+            supervisor_approved_at=now,
+            supervisor_approved_by=approved_by,
+            updated_at=now,
+        )
+    if reports is not None:
+        report_ids = list(
+            _lock_selected(reports, status=PeriodReport.Status.SUBMITTED).values_list("pk", flat=True)
+        )
+        PeriodReport.objects.filter(pk__in=report_ids).update(
+            supervisor_approved_at=now,
+            supervisor_approved_by=approved_by,
+            status=PeriodReport.Status.SUPERVISOR_APPROVED,
+            updated_at=now,
+        )
+
+    SupervisorApproval.objects.bulk_create(
+        [SupervisorApproval(approved_by=approved_by, approved_at=now, timesheet_id=pk) for pk in timesheet_ids]
+        + [SupervisorApproval(approved_by=approved_by, approved_at=now, period_report_id=pk) for pk in report_ids]
+    )
+    return len(timesheet_ids), len(report_ids)
 
 
 # =============================================================================
@@ -454,4 +1524,4 @@ def generate_final_pdf_async(period_report, generated_by=None):
 
 def count_holidays_in_period(period):
     """Return the number of AIM holidays that fall within the period's date range."""
-    return AIMHoliday.objects.filter(date__range=[period.start_date, period.end_date]).count()
+    return holiday_calendar().count(period.start_date, period.end_date)
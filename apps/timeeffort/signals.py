@@ -0,0 +1,83 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import (
+    Activity,
+    AIMHoliday,
+    PeriodReport,
+    ReportingPeriod,
+    ReportingWeek,
+    StaffRecentActivity,
+    WeeklyTimesheet,
+    WeeklyTimesheetLine,
+    activities_changed,
+    calendar_changed,
+    holidays_changed,
+)
+from .services import refresh_staff_grant_effort
+
+
+@receiver(post_save, sender=ReportingPeriod)
+@receiver(post_delete, sender=ReportingPeriod)
+@receiver(post_save, sender=ReportingWeek)
+@receiver(post_delete, sender=ReportingWeek)
+def invalidate_calendar_index_on_change(sender, **kwargs):
+    """Keep the in-memory CalendarIndex in step with period/week edits."""
+    calendar_changed()
+
+
+@receiver(post_save, sender=AIMHoliday)
+@receiver(post_delete, sender=AIMHoliday)
+def invalidate_holiday_calendar_on_change(sender, **kwargs):
+    """Keep the in-memory HolidayCalendar in step with holiday edits."""
+    holidays_changed()
+
+
+@receiver(post_save, sender=Activity)
+@receiver(post_delete, sender=Activity)
+def invalidate_activity_catalog_on_change(sender, **kwargs):
+    """Keep the in-memory ActivityCatalog in step with activity edits."""
+    activities_changed()
+
+
+@receiver(post_save, sender=WeeklyTimesheet)
+@receiver(post_delete, sender=WeeklyTimesheet)
+def forget_recent_week_on_timesheet_change(sender, instance, update_fields=None, **kwargs):
+    """
+    A timesheet saved without update_fields (created, or edited in the
+    admin along with its line inlines) or deleted may no longer match its
+    StaffRecentActivity entry. Status changes pass update_fields and leave
+    the lines alone.
+    """
+    if update_fields is None:
+        StaffRecentActivity.forget(instance.staff_id, instance.week_id)
+
+
+@receiver(post_save, sender=WeeklyTimesheetLine)
+def forget_recent_week_on_line_save(sender, instance, **kwargs):
+    """Lines saved one at a time bypass save_timesheet_lines(), so drop their week from the snapshot."""
+    timesheet = instance.timesheet
+    StaffRecentActivity.forget(timesheet.staff_id, timesheet.week_id)
+
+
+@receiver(post_delete, sender=WeeklyTimesheetLine)
+def forget_recent_week_on_line_delete(sender, instance, origin=None, **kwargs):
+    """A deleted line (admin inline, queryset delete) leaves its week's snapshot entry stale too."""
+    if isinstance(origin, WeeklyTimesheet) or getattr(origin, "model", None) is WeeklyTimesheet:
+        return  # forget_recent_week_on_timesheet_change covers the timesheet going
+    timesheet = instance.timesheet
+    StaffRecentActivity.forget(timesheet.staff_id, timesheet.week_id)
+
+
+@receiver(post_save, sender=PeriodReport)
+def refresh_grant_effort_on_report_status(sender, instance, update_fields=None, **kwargs):
+    """Bring GrantEffortMonth up to date when a report is submitted (or otherwise changes status)."""
+    if update_fields and "status" in update_fields:
+        refresh_staff_grant_effort(instance.staff_id, instance.period_id)
+
+
+@receiver(post_save, sender=WeeklyTimesheet)
+def refresh_grant_effort_on_timesheet_status(sender, instance, update_fields=None, **kwargs):
+    """Timesheets are the source of hourly/salary grant effort, so their submissions refresh it too."""
+    if update_fields and "status" in update_fields:
+        refresh_staff_grant_effort(instance.staff_id, instance.week.period_id)
@@ -0,0 +1,1445 @@
+"""
+Time & Effort tests.
+
+Coverage:
+- Period rollup (SQL aggregation, grouping and percentages)
+- Org-wide rollup service and processor view
+- Dashboard year loader (query count and summaries)
+- PDF render queue (dedup, inline fallback, worker claim/render, failures)
+- PDF render cache and content-addressed snapshot storage
+- Period-close PDF bundle (ZIP + manifest, management command)
+- Shared WeasyPrint renderer (stylesheet reuse)
+- Reporting calendar generation (bulk insert, rolling horizon)
+- In-memory calendar index (neighbour/date lookups, invalidation)
+- Timesheet totals annotated in SQL (with_totals)
+- Diff-based timesheet line saves
+- Cached holiday calendar (range counts, invalidation)
+- Cached activity catalog (validity lookup, form choices)
+- Supervisor approval queue (bulk sign-off, audit rows)
+- Recent-activity snapshot for weekly entry carry-forward
+- Post-deadline sweep (report selection, in-place refresh, pre-render)
+- Grant effort analytics (window-function rollup, summary refresh, CSV)
+"""
+
+import csv
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.pdfjobs.models import PDFRenderJob
+from apps.pdfjobs.services import (
+    claim_pdf_jobs,
+    enqueue_pdf_render,
+    pdf_render_key,
+    render_pdf_jobs,
+    request_pdf_render,
+)
+
+from .admin import PeriodReportAdmin, WeeklyTimesheetAdmin
+from .forms import WeeklyTimesheetLineForm, WeeklyTimesheetLineFormSet
+from .models import (
+    Activity,
+    AIMHoliday,
+    GrantEffortMonth,
+    PDFSnapshot,
+    PeriodReport,
+    PeriodReportLine,
+    ReportingCalendar,
+    ReportingPeriod,
+    ReportingWeek,
+    StaffRecentActivity,
+    StaffTimesheetProfile,
+    SupervisorApproval,
+    WeeklyTimesheet,
+    WeeklyTimesheetLine,
+    FINAL_PDF_JOB,
+    WEEKLY_PDF_JOB,
+    activity_catalog,
+    calendar_index,
+    holiday_calendar,
+    invalidate_activity_catalog,
+    invalidate_calendar_index,
+    invalidate_holiday_calendar,
+)
+from .services import (
+    FINAL_PDF_TEMPLATE,
+    WEEKLY_PDF_TEMPLATE,
+    DashboardYear,
+    _lock_selected,
+    attach_salary_month_labels,
+    director_period_summaries,
+    generate_weekly_pdf,
+    iter_pdf_bundle,
+    get_org_rollup,
+    get_period_rollup,
+    get_supervisor_queue,
+    grant_effort_rows,
+    hourly_period_summaries,
+    initialize_period_report,
+    pdf_bundle_reports,
+    post_deadline_reports,
+    refresh_grant_effort,
+    render_final_pdfs,
+    salary_period_summaries,
+    save_timesheet_lines,
+    supervisor_approve,
+)
+
+from utils.pdf_rendering import PDFRenderer
+
+User = get_user_model()
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+class TimeEffortTestCase(TestCase):
+    """
+    Clears the process-wide calendar, holiday and activity caches around each
+    test. Rows rolled back with a test send no post_delete, so a cache built in
+    one test would otherwise leak into the next.
+    """
+
+    def setUp(self):
+        super().setUp()
+        for invalidate in (invalidate_calendar_index, invalidate_holiday_calendar, invalidate_activity_catalog):
+            invalidate()
+            self.addCleanup(invalidate)
+
+
+def make_profile(username="staffer", staff_type=StaffTimesheetProfile.StaffType.SALARY, **kwargs):
+    user = User.objects.create_user(username=username, password="pass")
+    return StaffTimesheetProfile.objects.create(user=user, staff_type=staff_type, **kwargs)
+
+
+def make_period(start=date(2026, 1, 11), period_index=0):
+    """Create a 14-day period with its two weeks."""
+    period = ReportingPeriod.objects.create(
+        period_index=period_index,
+        start_date=start,
+        end_date=start + timedelta(days=13),
+        label=f"Period {period_index}",
+    )
+    for number in (1, 2):
+        week_start = start + timedelta(days=(number - 1) * 7)
+        ReportingWeek.objects.create(
+            period=period,
+            week_number=number,
+            start_date=week_start,
+            end_date=week_start + timedelta(days=6),
+        )
+    return period
+
+
+def make_activity(name="Research", classification=Activity.Classification.DIRECT, **kwargs):
+    return Activity.objects.create(name=name, classification=classification, **kwargs)
+
+
+def make_timesheet(profile, week, status=WeeklyTimesheet.Status.SUBMITTED):
+    return WeeklyTimesheet.objects.create(staff=profile, week=week, status=status)
+
+
+def add_line(timesheet, activity=None, hours_each_day=Decimal("0"), **kwargs):
+    """Add a line with the same hours Monday–Friday."""
+    weekday_hours = {
+        f"hours_{day}": hours_each_day for day in ("mon", "tue", "wed", "thu", "fri")
+    }
+    weekday_hours.update(kwargs)
+    return WeeklyTimesheetLine.objects.create(timesheet=timesheet, activity=activity, **weekday_hours)
+
+
+# =============================================================================
+# ROLLUP
+# =============================================================================
+
+class PeriodRollupTests(TimeEffortTestCase):
+    def setUp(self):
+        super().setUp()
+        self.profile = make_profile()
+        self.period = make_period()
+        self.week1, self.week2 = self.period.weeks.order_by("week_number")
+        self.research = make_activity("Research", default_grant_code="DMS-1", sort_order=1)
+        self.admin = make_activity("Administrative", Activity.Classification.INDIRECT, sort_order=2)
+
+    def periods(self):
+        return ReportingPeriod.objects.filter(pk=self.period.pk)
+
+    def test_sums_day_columns_across_weeks(self):
+        for week in (self.week1, self.week2):
+            ts = make_timesheet(self.profile, week)
+            add_line(ts, self.research, Decimal("6"))
+            add_line(ts, self.admin, Decimal("2"))
+
+        rows = get_period_rollup(self.profile, self.periods())
+
+        self.assertEqual(len(rows), 2)
+        research, admin = rows
+        self.assertEqual(research["activity_name"], "Research / DMS-1")
+        self.assertEqual(research["grant_code"], "DMS-1")
+        self.assertEqual(research["total_hours"], Decimal("60"))
+        self.assertEqual(research["percentage"], Decimal("75.00"))
+        self.assertEqual(admin["classification"], Activity.Classification.INDIRECT)
+        self.assertEqual(admin["total_hours"], Decimal("20"))
+        self.assertEqual(admin["percentage"], Decimal("25.00"))
+
+    def test_draft_timesheets_are_excluded(self):
+        add_line(make_timesheet(self.profile, self.week1), self.research, Decimal("8"))
+        add_line(
+            make_timesheet(self.profile, self.week2, status=WeeklyTimesheet.Status.DRAFT),
+            self.research,
+            Decimal("8"),
+        )
+
+        rows = get_period_rollup(self.profile, self.periods())
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["total_hours"], Decimal("40"))
+
+    def test_other_staff_excluded(self):
+        other = make_profile("other")
+        add_line(make_timesheet(other, self.week1), self.research, Decimal("8"))
+
+        self.assertEqual(get_period_rollup(self.profile, self.periods()), [])
+
+    def test_line_grant_code_overrides_default(self):
+        ts = make_timesheet(self.profile, self.week1)
+        add_line(ts, self.research, Decimal("4"))
+        add_line(ts, self.research, Decimal("4"), grant_code="NSF-9")
+
+        rows = get_period_rollup(self.profile, self.periods())
+
+        self.assertEqual({r["grant_code"] for r in rows}, {"DMS-1", "NSF-9"})
+        self.assertTrue(all(r["total_hours"] == Decimal("20") for r in rows))
+
+    def test_custom_rows_grouped_by_name(self):
+        timesheets = [make_timesheet(self.profile, week) for week in (self.week1, self.week2)]
+        for ts in timesheets:
+            add_line(ts, None, Decimal("1"), custom_activity_name="Outreach", grant_code="X-1")
+        add_line(timesheets[0], None, Decimal("1"))
+
+        rows = get_period_rollup(self.profile, self.periods())
+        by_name = {r["activity_name"]: r for r in rows}
+
+        self.assertEqual(by_name["Outreach"]["total_hours"], Decimal("10"))
+        self.assertEqual(by_name["Outreach"]["classification"], Activity.Classification.DIRECT)
+        self.assertEqual(by_name["Custom Activity"]["total_hours"], Decimal("5"))
+
+    def test_weekend_columns_counted(self):
+        ts = make_timesheet(self.profile, self.week1)
+        add_line(ts, self.research, hours_sun=Decimal("1.5"), hours_sat=Decimal("2.25"))
+
+        rows = get_period_rollup(self.profile, self.periods())
+
+        self.assertEqual(rows[0]["total_hours"], Decimal("3.75"))
+        self.assertEqual(rows[0]["percentage"], Decimal("100.00"))
+
+    def test_no_hours_returns_empty(self):
+        make_timesheet(self.profile, self.week1)
+        self.assertEqual(get_period_rollup(self.profile, self.periods()), [])
+
+    def test_single_query(self):
+        ts = make_timesheet(self.profile, self.week1)
+        add_line(ts, self.research, Decimal("8"))
+        add_line(ts, self.admin, Decimal("1"))
+        periods = self.periods()
+
+        with self.assertNumQueries(1):
+            get_period_rollup(self.profile, periods)
+
+
+# =============================================================================
+# ORG-WIDE ROLLUP
+# =============================================================================
+
+class OrgRollupTests(TimeEffortTestCase):
+    def setUp(self):
+        super().setUp()
+        self.period = make_period()
+        self.week1, self.week2 = self.period.weeks.order_by("week_number")
+        self.research = make_activity("Research", default_grant_code="DMS-1", sort_order=1)
+        self.admin = make_activity("Administrative", Activity.Classification.INDIRECT, sort_order=2)
+        self.alice = make_profile("alice")
+        self.bob = make_profile("bob", staff_type=StaffTimesheetProfile.StaffType.HOURLY)
+
+    def rollup(self):
+        return get_org_rollup(ReportingPeriod.objects.filter(pk=self.period.pk))
+
+    def test_matrix_matches_per_staff_rollup(self):
+        for week in (self.week1, self.week2):
+            ts = make_timesheet(self.alice, week)
+            add_line(ts, self.research, Decimal("6"))
+            add_line(ts, self.admin, Decimal("2"))
+        add_line(make_timesheet(self.bob, self.week1), self.admin, Decimal("4"))
+
+        result = self.rollup()
+        columns = [(c["activity_name"], c["grant_code"]) for c in result["columns"]]
+        rows = {r["profile"]: r for r in result["rows"]}
+
+        self.assertEqual(columns, [("Research / DMS-1", "DMS-1"), ("Administrative", "")])
+        self.assertEqual(rows[self.alice]["cells"], [Decimal("60"), Decimal("20")])
+        self.assertEqual(rows[self.alice]["total_hours"], Decimal("80"))
+        self.assertEqual(rows[self.bob]["cells"], [None, Decimal("20")])
+        per_staff = get_period_rollup(self.alice, ReportingPeriod.objects.filter(pk=self.period.pk))
+        self.assertEqual([r["total_hours"] for r in per_staff], rows[self.alice]["cells"])
+
+    def test_status_flags(self):
+        ts = make_timesheet(self.alice, self.week1)
+        add_line(ts, self.research, Decimal("8"))
+        ts.supervisor_approve(self.bob.user)
+        make_timesheet(self.alice, self.week2)  # submitted with no hours
+        make_timesheet(self.bob, self.week1, status=WeeklyTimesheet.Status.DRAFT)
+
+        rows = {r["profile"]: r for r in self.rollup()["rows"]}
+
+        self.assertEqual(rows[self.alice]["outstanding_weeks"], [])
+        self.assertEqual(rows[self.alice]["zero_weeks"], [self.week2])
+        self.assertEqual(rows[self.alice]["unapproved_weeks"], [self.week2])
+        self.assertEqual(rows[self.bob]["outstanding_weeks"], [self.week1, self.week2])
+
+    def test_inactive_and_director_profiles_excluded(self):
+        make_profile("carol", is_active=False)
+        make_profile("dana", staff_type=StaffTimesheetProfile.StaffType.DIRECTOR)
+
+        profiles = {r["profile"].user.username for r in self.rollup()["rows"]}
+
+        self.assertEqual(profiles, {"alice", "bob"})
+
+    def test_query_count_independent_of_headcount(self):
+        for i in range(5):
+            profile = make_profile(f"extra{i}")
+            add_line(make_timesheet(profile, self.week1), self.research, Decimal("8"))
+        periods = ReportingPeriod.objects.filter(pk=self.period.pk)
+
+        with self.assertNumQueries(5):
+            get_org_rollup(periods)
+
+    def test_view_requires_staff(self):
+        self.client.force_login(self.alice.user)
+        response = self.client.get(reverse("timeeffort:org_rollup"))
+        self.assertEqual(response.status_code, 302)
+
+    def _login_processor(self):
+        staff = User.objects.create_user(username="processor", password="pass", is_staff=True)
+        self.client.force_login(staff)
+        return {"year": 2026, "start": self.period.pk, "end": self.period.pk}
+
+    def test_view_renders(self):
+        add_line(make_timesheet(self.alice, self.week1), self.research, Decimal("8"))
+        params = self._login_processor()
+
+        response = self.client.get(reverse("timeeffort:org_rollup"), params)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Research / DMS-1")
+
+    def test_csv_export(self):
+        add_line(make_timesheet(self.alice, self.week1), self.research, Decimal("8"))
+        params = self._login_processor()
+
+        response = self.client.get(reverse("timeeffort:org_rollup"), {**params, "format": "csv"})
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        lines = response.content.decode().splitlines()
+        self.assertIn("Research / DMS-1 [DMS-1]", lines[0])
+        self.assertTrue(any(line.startswith("alice,Salary,,40") for line in lines[1:]))
+
+
+# =============================================================================
+# DASHBOARD LOADER
+# =============================================================================
+
+class DashboardYearTests(TimeEffortTestCase):
+    def setUp(self):
+        super().setUp()
+        self.profile = make_profile()
+        self.periods = [
+            make_period(date(2026, 1, 11) + timedelta(days=14 * i), period_index=i)
+            for i in range(6)
+        ]
+        AIMHoliday.objects.create(name="MLK Day", date=date(2026, 1, 19))
+        weeks = list(ReportingWeek.objects.order_by("start_date"))
+        for week in weeks[:3]:
+            make_timesheet(self.profile, week)
+        make_timesheet(self.profile, weeks[3], status=WeeklyTimesheet.Status.DRAFT)
+        self.report = PeriodReport.objects.create(
+            staff=self.profile,
+            period=self.periods[0],
+            status=PeriodReport.Status.SUBMITTED,
+        )
+
+    def test_fixed_query_count(self):
+        holiday_calendar().count(date(2026, 1, 1), date(2026, 12, 31))
+        with self.assertNumQueries(4):
+            data = DashboardYear(self.profile, 2026)
+        with self.assertNumQueries(0):
+            salary_period_summaries(data)
+            hourly_period_summaries(data)
+
+        make_period(date(2026, 1, 11) + timedelta(days=14 * 6), period_index=6)
+        make_period(date(2026, 1, 11) + timedelta(days=14 * 7), period_index=7)
+        with self.assertNumQueries(4):
+            DashboardYear(self.profile, 2026)
+
+    def test_director_skips_timesheet_queries(self):
+        with self.assertNumQueries(2):
+            data = DashboardYear(self.profile, 2026, include_timesheets=False)
+        self.assertEqual(len(director_period_summaries(data)), 3)
+
+    def test_salary_summaries(self):
+        summaries = salary_period_summaries(DashboardYear(self.profile, 2026))
+
+        self.assertEqual([s["period"] for s in summaries], self.periods[4::-2])
+        first = summaries[-1]
+        self.assertEqual(first["period_label"], self.periods[0].salary_month_label)
+        self.assertEqual(first["period_end"], self.periods[1].end_date)
+        self.assertEqual(first["total_weeks"], 4)
+        self.assertEqual(first["submitted_count"], 3)
+        self.assertEqual(len(first["outstanding_weeks"]), 1)
+        self.assertEqual(first["report"], self.report)
+        self.assertEqual(first["holiday_count"], 1)
+        self.assertFalse(first["has_prev"])
+        self.assertTrue(summaries[0]["has_prev"])
+
+    def test_hourly_summaries(self):
+        summaries = hourly_period_summaries(DashboardYear(self.profile, 2026))
+
+        self.assertEqual(len(summaries), 6)
+        first = summaries[-1]
+        self.assertEqual(first["submitted_count"], 2)
+        self.assertEqual(
+            [bool(ws["timesheet"]) for ws in first["week_statuses"]], [True, True]
+        )
+
+    def test_attach_salary_month_labels(self):
+        with self.assertNumQueries(2):
+            reports = attach_salary_month_labels(
+                PeriodReport.objects.select_related("period")
+            )
+        self.assertEqual(reports[0].period_label, self.periods[0].salary_month_label)
+
+    def test_dashboards_render(self):
+        self.client.force_login(self.profile.user)
+        for staff_type in StaffTimesheetProfile.StaffType.values:
+            self.profile.staff_type = staff_type
+            self.profile.save(update_fields=["staff_type"])
+
+            response = self.client.get(reverse("timeeffort:dashboard"), {"year": 2026})
+
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, self.periods[0].start_date.strftime("%b %-d, %Y"))
+
+
+# =============================================================================
+# PDF RENDER QUEUE
+# =============================================================================
+
+FAKE_PDF = b"%PDF-fake"
+
+
+@patch("apps.pdfjobs.services.html_to_pdf", return_value=FAKE_PDF)
+class PDFRenderQueueTests(TimeEffortTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.profile = make_profile()
+        make_period()
+        self.week = ReportingWeek.objects.order_by("start_date").first()
+        self.timesheet = make_timesheet(self.profile, self.week)
+        self.line = add_line(self.timesheet, hours_each_day=Decimal("8"))
+
+    def test_same_inputs_reuse_job(self, html_to_pdf):
+        job = enqueue_pdf_render(WEEKLY_PDF_JOB, self.timesheet)
+        self.assertEqual(enqueue_pdf_render(WEEKLY_PDF_JOB, self.timesheet), job)
+
+        self.line.hours_mon = Decimal("4")
+        self.line.save()
+        changed = enqueue_pdf_render(WEEKLY_PDF_JOB, self.timesheet)
+
+        self.assertNotEqual(changed.pk, job.pk)
+        self.assertNotEqual(changed.input_hash, job.input_hash)
+
+    def test_inline_render_without_worker(self, html_to_pdf):
+        job = request_pdf_render(WEEKLY_PDF_JOB, self.timesheet)
+
+        self.assertEqual(job.status, PDFRenderJob.Status.DONE)
+        self.assertEqual(job.attempts, 1)
+        snapshot = job.snapshots.get()
+        self.assertEqual(snapshot.render_status, PDFRenderJob.Status.DONE)
+        self.assertEqual(snapshot.file.read(), FAKE_PDF)
+
+        # Unchanged inputs: served from the existing job, no second render
+        request_pdf_render(WEEKLY_PDF_JOB, self.timesheet)
+        self.assertEqual(html_to_pdf.call_count, 1)
+
+    def test_final_report_render_status(self, html_to_pdf):
+        report = PeriodReport.objects.create(
+            staff=self.profile,
+            period=self.week.period,
+            status=PeriodReport.Status.SUBMITTED,
+        )
+        self.assertEqual(report.pdf_render_status, "")
+
+        request_pdf_render(FINAL_PDF_JOB, report)
+
+        self.assertEqual(report.pdf_render_status, PDFRenderJob.Status.DONE)
+        self.assertEqual(report.pdfs.count(), 1)
+
+    @override_settings(PDF_RENDER_WORKER=True)
+    def test_worker_claims_and_renders(self, html_to_pdf):
+        job = request_pdf_render(WEEKLY_PDF_JOB, self.timesheet)
+        self.assertEqual(job.status, PDFRenderJob.Status.QUEUED)
+
+        claimed = claim_pdf_jobs(limit=5)
+        self.assertEqual(claimed, [job])
+        self.assertEqual(claim_pdf_jobs(limit=5), [])
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(render_pdf_jobs(claimed, executor), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, PDFRenderJob.Status.DONE)
+        self.assertEqual(self.timesheet.pdfs.count(), 1)
+
+    @override_settings(PDF_RENDER_WORKER=True)
+    def test_stale_running_job_is_reclaimed(self, html_to_pdf):
+        job = enqueue_pdf_render(WEEKLY_PDF_JOB, self.timesheet)
+        claim_pdf_jobs(limit=5)
+        PDFRenderJob.objects.filter(pk=job.pk).update(
+            started_at=job.created_at - timedelta(hours=1)
+        )
+
+        self.assertEqual(claim_pdf_jobs(limit=5), [job])
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 2)
+
+    @override_settings(PDF_RENDER_WORKER=True)
+    def test_dead_render_process_requeues_jobs(self, html_to_pdf):
+        html_to_pdf.side_effect = BrokenProcessPool("A child process terminated abruptly.")
+        job = enqueue_pdf_render(WEEKLY_PDF_JOB, self.timesheet)
+        claimed = claim_pdf_jobs(limit=5)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            with self.assertRaises(BrokenProcessPool):
+                render_pdf_jobs(claimed, executor)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, PDFRenderJob.Status.QUEUED)
+        self.assertEqual(job.error, "")
+        self.assertEqual(claim_pdf_jobs(limit=5), [job])
+
+    def test_render_error_marks_job_failed_and_requeues(self, html_to_pdf):
+        html_to_pdf.side_effect = RuntimeError("WeasyPrint is not installed.")
+        job = request_pdf_render(WEEKLY_PDF_JOB, self.timesheet)
+
+        self.assertEqual(job.status, PDFRenderJob.Status.FAILED)
+        self.assertIn("WeasyPrint", job.error)
+        self.assertFalse(self.timesheet.pdfs.exists())
+
+        html_to_pdf.side_effect = None
+        retried = request_pdf_render(WEEKLY_PDF_JOB, self.timesheet)
+        self.assertEqual(retried.pk, job.pk)
+        self.assertEqual(retried.status, PDFRenderJob.Status.DONE)
+        self.assertEqual(retried.attempts, 2)
+
+    def test_download_weekly_pdf_renders_on_demand(self, html_to_pdf):
+        self.client.force_login(self.profile.user)
+
+        response = self.client.get(
+            reverse("timeeffort:download_weekly_pdf", args=[self.timesheet.pk])
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, FAKE_PDF)
+        self.assertEqual(PDFRenderJob.objects.get().status, PDFRenderJob.Status.DONE)
+
+
+@patch("apps.pdfjobs.services.html_to_pdf", return_value=FAKE_PDF)
+class PDFRenderCacheTests(TimeEffortTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.profile = make_profile()
+        make_period()
+        self.week = ReportingWeek.objects.order_by("start_date").first()
+        self.timesheet = make_timesheet(self.profile, self.week)
+        self.line = add_line(self.timesheet, hours_each_day=Decimal("8"))
+
+    def test_unchanged_inputs_skip_render(self, html_to_pdf):
+        first = generate_weekly_pdf(self.timesheet)
+        second = generate_weekly_pdf(self.timesheet)
+
+        self.assertEqual(second, first)
+        self.assertEqual(html_to_pdf.call_count, 1)
+        self.assertTrue(first.render_key)
+
+    def test_changed_inputs_render_new_version(self, html_to_pdf):
+        first = generate_weekly_pdf(self.timesheet)
+        html_to_pdf.return_value = b"%PDF-changed"
+        self.line.hours_mon = Decimal("4")
+        self.line.save()
+
+        second = generate_weekly_pdf(self.timesheet)
+
+        self.assertEqual(second.version, first.version + 1)
+        self.assertNotEqual(second.file.name, first.file.name)
+
+    def test_template_change_invalidates_cache(self, html_to_pdf):
+        with patch("apps.pdfjobs.services._template_digest", return_value="a"):
+            generate_weekly_pdf(self.timesheet)
+        with patch("apps.pdfjobs.services._template_digest", return_value="b"):
+            generate_weekly_pdf(self.timesheet)
+
+        self.assertEqual(html_to_pdf.call_count, 2)
+
+    def test_render_key_hashes_template_source_not_mtime(self, html_to_pdf):
+        key = pdf_render_key(WEEKLY_PDF_TEMPLATE, {"lines": []})
+        with patch("os.path.getmtime", return_value=0.0):
+            self.assertEqual(pdf_render_key(WEEKLY_PDF_TEMPLATE, {"lines": []}), key)
+        self.assertNotEqual(pdf_render_key(FINAL_PDF_TEMPLATE, {"lines": []}), key)
+
+
+@patch("apps.pdfjobs.services.html_to_pdf", return_value=FAKE_PDF)
+class PDFBundleTests(TimeEffortTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.period = make_period()
+        self.reports = [
+            PeriodReport.objects.create(
+                staff=make_profile(f"staffer{i}"),
+                period=self.period,
+                status=PeriodReport.Status.SUBMITTED,
+            )
+            for i in range(3)
+        ]
+        self.draft = PeriodReport.objects.create(staff=make_profile("drafter"), period=self.period)
+
+    def _read_bundle(self, chunks):
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+        manifest = list(csv.DictReader(io.StringIO(archive.read("manifest.csv").decode())))
+        return archive, manifest
+
+    def test_bundle_contains_pdfs_and_manifest(self, html_to_pdf):
+        reports = list(pdf_bundle_reports(PeriodReport.objects.all()))
+        self.assertNotIn(self.draft, reports)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            jobs = render_final_pdfs(reports, executor)
+        archive, manifest = self._read_bundle(iter_pdf_bundle(reports, jobs))
+
+        self.assertEqual(len(manifest), 3)
+        for row in manifest:
+            self.assertEqual(archive.read(row["file"]), FAKE_PDF)
+            self.assertEqual(row["sha256"], PDFSnapshot.objects.get(period_report_id=row["report_id"]).checksum)
+            self.assertEqual(row["render_status"], PDFRenderJob.Status.DONE)
+
+        # Second close of the same period reuses every stored PDF
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            render_final_pdfs(reports, executor)
+        self.assertEqual(html_to_pdf.call_count, 3)
+
+    def test_failed_render_is_listed_in_manifest(self, html_to_pdf):
+        html_to_pdf.side_effect = RuntimeError("boom")
+        reports = list(pdf_bundle_reports(PeriodReport.objects.all()))
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            jobs = render_final_pdfs(reports, executor)
+        archive, manifest = self._read_bundle(iter_pdf_bundle(reports, jobs))
+
+        self.assertEqual(archive.namelist(), ["manifest.csv"])
+        self.assertEqual({row["render_status"] for row in manifest}, {PDFRenderJob.Status.FAILED})
+
+    @patch("apps.pdfjobs.services.ProcessPoolExecutor", side_effect=AssertionError("no pool in a request"))
+    def test_admin_action_renders_without_process_pool(self, pool, html_to_pdf):
+        request = RequestFactory().post("/")
+        request.user = User.objects.create_user(username="finance", password="pass")
+        model_admin = PeriodReportAdmin(PeriodReport, admin.site)
+
+        response = model_admin.action_download_pdf_bundle(request, PeriodReport.objects.all())
+        archive, manifest = self._read_bundle(response.streaming_content)
+
+        self.assertEqual(len(archive.namelist()), 4)
+        self.assertEqual({row["render_status"] for row in manifest}, {PDFRenderJob.Status.DONE})
+        pool.assert_not_called()
+
+    @patch("apps.pdfjobs.services.ProcessPoolExecutor", ThreadPoolExecutor)
+    def test_command_writes_bundle(self, html_to_pdf):
+        output = os.path.join(self.media_root, "bundle.zip")
+
+        call_command("bundle_period_pdfs", period=[self.period.pk], output=output, stdout=io.StringIO())
+
+        with zipfile.ZipFile(output) as archive:
+            self.assertEqual(len(archive.namelist()), 4)
+
+
+class PDFRendererTests(TimeEffortTestCase):
+    def setUp(self):
+        super().setUp()
+        self.weasyprint = MagicMock()
+        patcher = patch(
+            "utils.pdf_rendering._import_weasyprint",
+            return_value=(self.weasyprint, MagicMock()),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_style_blocks_parsed_once_per_process(self):
+        renderer = PDFRenderer()
+        for report_id in (1, 2):
+            renderer.render(f"<style>@page {{ size: letter; }}</style><p>R-{report_id}</p>")
+
+        self.weasyprint.CSS.assert_called_once_with(
+            string="@page { size: letter; }", font_config=renderer.font_config
+        )
+        html_string = self.weasyprint.HTML.call_args.kwargs["string"]
+        self.assertEqual(html_string, "<p>R-2</p>")
+        write_kwargs = self.weasyprint.HTML.return_value.write_pdf.call_args.kwargs
+        self.assertEqual(write_kwargs["stylesheets"], [self.weasyprint.CSS.return_value])
+        self.assertIs(write_kwargs["font_config"], renderer.font_config)
+
+
+# =============================================================================
+# REPORTING CALENDAR
+# =============================================================================
+
+class ReportingCalendarTests(TimeEffortTestCase):
+    def setUp(self):
+        super().setUp()
+        self.calendar = ReportingCalendar.objects.create(anchor_start_date=date(2026, 1, 11))
+
+    def test_generate_periods_in_fixed_queries(self):
+        with self.assertNumQueries(6):
+            created, skipped = self.calendar.generate_periods(months_back=24, months_forward=13)
+
+        self.assertEqual((created, skipped), (74, 0))
+        self.assertEqual(ReportingWeek.objects.count(), 148)
+        period = self.calendar.periods.get(period_index=-1)
+        self.assertEqual(period.start_date, date(2025, 12, 28))
+        self.assertEqual(period.end_date, date(2026, 1, 10))
+        self.assertEqual(period.label, "Dec 28 – Jan 10, 2026")
+        self.assertEqual(
+            [(w.week_number, w.start_date, w.end_date) for w in period.weeks.order_by("week_number")],
+            [(1, date(2025, 12, 28), date(2026, 1, 3)), (2, date(2026, 1, 4), date(2026, 1, 10))],
+        )
+
+    def test_generate_periods_is_idempotent(self):
+        self.calendar.generate_periods(months_back=1, months_forward=1)
+
+        with self.assertNumQueries(3):
+            created, skipped = self.calendar.generate_periods(months_back=1, months_forward=1)
+        self.assertEqual((created, skipped), (0, 4))
+
+        created, skipped = self.calendar.generate_periods(months_back=1, months_forward=2)
+        self.assertEqual((created, skipped), (2, 4))
+
+    def test_extend_horizon_from_current_salary_month(self):
+        created, _ = self.calendar.extend_horizon(months_ahead=2, today=date(2026, 2, 20))
+
+        self.assertEqual(created, 6)
+        indexes = list(self.calendar.periods.order_by("period_index").values_list("period_index", flat=True))
+        self.assertEqual(indexes, [2, 3, 4, 5, 6, 7])
+
+    def test_command_extends_horizon(self):
+        call_command("extend_reporting_calendar", months=1, stdout=io.StringIO())
+        call_command("extend_reporting_calendar", months=1, stdout=io.StringIO())
+
+        self.assertEqual(self.calendar.periods.count(), 4)
+
+
+# =============================================================================
+# CALENDAR INDEX
+# =============================================================================
+
+class CalendarIndexTests(TimeEffortTestCase):
+    def setUp(self):
+        super().setUp()
+        self.calendar = ReportingCalendar.objects.create(anchor_start_date=date(2026, 1, 11))
+        self.calendar.generate_periods(months_back=0, months_forward=2)
+        self.first = self.calendar.periods.get(period_index=0)
+        self.second = self.calendar.periods.get(period_index=1)
+
+    def test_neighbour_lookups_need_no_queries_once_built(self):
+        index = calendar_index()
+
+        with self.assertNumQueries(0):
+            index = calendar_index()
+            self.assertEqual(index.offset(self.first, 1).id, self.second.pk)
+            self.assertIsNone(index.offset(self.first, -1))
+            self.assertEqual(index.salary_anchor(self.second).id, self.first.pk)
+            self.assertEqual([p.id for p in index.salary_window(self.second)], [self.first.pk, self.second.pk])
+            self.assertEqual(index.week(self.second.pk, 2).start_date, date(2026, 2, 1))
+
+    def test_date_lookup(self):
+        index = calendar_index()
+
+        self.assertEqual(index.period_for_date(date(2026, 1, 24)).id, self.first.pk)
+        self.assertEqual(index.period_for_date(date(2026, 1, 25)).id, self.second.pk)
+        week = index.week_for_date(date(2026, 1, 20))
+        self.assertEqual((week.period_id, week.week_number), (self.first.pk, 2))
+        self.assertIsNone(index.period_for_date(date(2025, 1, 1)))
+
+    def test_salary_month_label_from_index(self):
+        calendar_index()
+
+        with self.assertNumQueries(0):
+            label = self.first.salary_month_label
+        self.assertEqual(label, "Jan 11 – Feb 7, 2026")
+
+    def test_saving_a_period_invalidates(self):
+        index = calendar_index()
+        self.second.end_date = date(2026, 2, 8)
+        self.second.save()
+
+        self.assertIsNot(calendar_index(), index)
+        self.assertEqual(calendar_index().offset(self.first, 1).end_date, date(2026, 2, 8))
+
+    def test_generating_periods_invalidates(self):
+        calendar_index()
+        self.calendar.generate_periods(months_back=0, months_forward=3)
+
+        self.assertIsNotNone(calendar_index().period(self.calendar.pk, 4))
+
+
+# =============================================================================
+# TIMESHEET TOTALS
+# =============================================================================
+
+class TimesheetTotalsTests(TimeEffortTestCase):
+    def setUp(self):
+        super().setUp()
+        self.profile = make_profile()
+        self.period = make_period()
+        weeks = list(self.period.weeks.order_by("week_number"))
+        self.timesheet = make_timesheet(self.profile, weeks[0])
+        add_line(self.timesheet, make_activity("Research"), Decimal("6"))
+        add_line(self.timesheet, make_activity("Admin"), Decimal("1.5"), hours_sat=Decimal("2"))
+        self.empty = make_timesheet(self.profile, weeks[1])
+
+    def test_with_totals_reads_no_lines(self):
+        with self.assertNumQueries(1):
+            totals = {
+                ts.pk: (ts.total_hours, ts.is_zero_week)
+                for ts in WeeklyTimesheet.objects.with_totals()
+            }
+
+        self.assertEqual(totals[self.timesheet.pk], (Decimal("39.50"), False))
+        self.assertEqual(totals[self.empty.pk], (Decimal("0"), True))
+
+    def test_line_totals(self):
+        with self.assertNumQueries(1):
+            totals = sorted(line.total_hours for line in WeeklyTimesheetLine.objects.with_totals())
+        self.assertEqual(totals, [Decimal("9.50"), Decimal("30.00")])
+
+    def test_unannotated_total_is_one_query(self):
+        timesheet = WeeklyTimesheet.objects.get(pk=self.timesheet.pk)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(timesheet.total_hours, Decimal("39.50"))
+        empty = WeeklyTimesheet.objects.get(pk=self.empty.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(empty.is_zero_week)
+
+    def test_admin_changelist_query_count_is_flat(self):
+        admin_user = User.objects.create_superuser(username="admin", password="pass")
+        self.client.force_login(admin_user)
+        url = reverse("admin:timeeffort_weeklytimesheet_changelist")
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertContains(response, '<td class="field-total_hours_display">39.5')
+
+        for number in range(3):
+            make_timesheet(make_profile(f"extra{number}"), self.empty.week)
+        with self.assertNumQueries(len(ctx.captured_queries)):
+            self.client.get(url)
+
+
+# =============================================================================
+# TIMESHEET LINE SAVES
+# =============================================================================
+
+class SaveTimesheetLinesTests(TimeEffortTestCase):
+    def setUp(self):
+        super().setUp()
+        self.profile = make_profile()
+        self.week = make_period().weeks.get(week_number=1)
+        self.timesheet = make_timesheet(self.profile, self.week, status=WeeklyTimesheet.Status.DRAFT)
+        self.research = make_activity("Research")
+        self.admin = make_activity("Admin", classification=Activity.Classification.INDIRECT)
+        self.rows = [
+            {"activity_id": self.research.pk, "grant_code": "NSF-1", "hours_mon": Decimal("8")},
+            {"activity_id": self.admin.pk, "grant_code": "", "hours_tue": Decimal("2")},
+            {"activity_id": None, "custom_activity_name": "Outreach", "grant_code": "", "hours_wed": Decimal("1")},
+        ]
+        save_timesheet_lines(self.timesheet, self.rows)
+
+    def test_unchanged_save_writes_nothing(self):
+        with self.assertNumQueries(1):
+            self.assertFalse(save_timesheet_lines(self.timesheet, self.rows))
+
+    def test_changes_are_applied_in_place(self):
+        research_line = self.timesheet.lines.get(activity=self.research)
+        rows = [
+            {**self.rows[0], "hours_mon": Decimal("6"), "description": "Grant work"},
+            {"activity_id": self.research.pk, "grant_code": "DOE-2", "hours_fri": Decimal("4")},
+            self.rows[2],
+        ]
+
+        self.assertTrue(save_timesheet_lines(self.timesheet, rows))
+
+        research_line.refresh_from_db()
+        self.assertEqual((research_line.hours_mon, research_line.description), (Decimal("6"), "Grant work"))
+        self.assertFalse(self.timesheet.lines.filter(activity=self.admin).exists())
+        self.assertEqual(
+            sorted(self.timesheet.lines.values_list("grant_code", flat=True)), ["", "DOE-2", "NSF-1"]
+        )
+        self.assertEqual(self.timesheet.total_hours, Decimal("11"))
+
+    def test_salary_draft_save_keeps_line_ids(self):
+        self.client.force_login(self.profile.user)
+        line_ids = set(self.timesheet.lines.values_list("pk", flat=True))
+        url = reverse("timeeffort:weekly_entry", args=[self.week.pk])
+        post = {
+            "action": "save",
+            f"act_{self.research.pk}_grant": "NSF-1",
+            f"act_{self.research.pk}_mon": "8",
+            f"act_{self.admin.pk}_grant": "",
+            f"act_{self.admin.pk}_tue": "2",
+            "custom_1_name": "Outreach",
+            "custom_1_wed": "1",
+        }
+
+        self.client.post(url, post)
+        self.assertEqual(set(self.timesheet.lines.values_list("pk", flat=True)), line_ids)
+
+        post[f"act_{self.admin.pk}_tue"] = "3"
+        self.client.post(url, post)
+        self.assertEqual(set(self.timesheet.lines.values_list("pk", flat=True)), line_ids)
+        self.assertEqual(self.timesheet.lines.get(activity=self.admin).hours_tue, Decimal("3"))
+
+    def test_salary_save_ignores_stale_activity_catalog(self):
+        self.client.force_login(self.profile.user)
+        activity_catalog()
+        # Added by another process: this one's cached catalog doesn't know it
+        fresh = Activity.objects.bulk_create([Activity(name="Fresh grant")])[0]
+        self.assertNotIn(fresh, activity_catalog().active)
+
+        self.client.post(reverse("timeeffort:weekly_entry", args=[self.week.pk]), {
+            "action": "save",
+            f"act_{self.research.pk}_grant": "NSF-1",
+            f"act_{self.research.pk}_mon": "8",
+            f"act_{fresh.pk}_grant": "",
+            f"act_{fresh.pk}_thu": "4",
+        })
+
+        self.assertEqual(self.timesheet.lines.get(activity=fresh).hours_thu, Decimal("4"))
+
+
+# =============================================================================
+# HOLIDAY CALENDAR
+# =============================================================================
+
+class HolidayCalendarTests(TimeEffortTestCase):
+    def setUp(self):
+        super().setUp()
+        for name, day in [
+            ("New Year's Day", date(2026, 1, 1)),
+            ("MLK Day", date(2026, 1, 19)),
+            ("Christmas", date(2025, 12, 25)),
+        ]:
+            AIMHoliday.objects.create(name=name, date=day)
+
+    def test_range_queries_load_each_year_once(self):
+        calendar = holiday_calendar()
+
+        with self.assertNumQueries(2):
+            self.assertEqual(calendar.count(date(2025, 12, 20), date(2026, 1, 19)), 3)
+            self.assertEqual(calendar.count(date(2026, 1, 2), date(2026, 1, 18)), 0)
+            self.assertEqual(
+                [h.name for h in calendar.between(date(2025, 12, 25), date(2026, 1, 1))],
+                ["Christmas", "New Year's Day"],
+            )
+            self.assertTrue(calendar.is_holiday(date(2026, 1, 19)))
+            self.assertFalse(calendar.is_holiday(date(2026, 1, 20)))
+
+    def test_holiday_changes_invalidate(self):
+        self.assertEqual(holiday_calendar().count(date(2026, 7, 1), date(2026, 7, 31)), 0)
+
+        holiday = AIMHoliday.objects.create(name="Independence Day", date=date(2026, 7, 3))
+        self.assertEqual(holiday_calendar().count(date(2026, 7, 1), date(2026, 7, 31)), 1)
+
+        holiday.delete()
+        self.assertEqual(holiday_calendar().count(date(2026, 7, 1), date(2026, 7, 31)), 0)
+
+    def test_new_timesheet_gets_holiday_lines(self):
+        make_activity("Holiday", classification=Activity.Classification.LEAVE, is_holiday_activity=True)
+        week = make_period().weeks.get(week_number=2)
+
+        timesheet = WeeklyTimesheet.create_with_holidays(make_profile(), week)
+
+        line = timesheet.lines.get()
+        self.assertEqual((line.hours_mon, line.total_hours), (Decimal("8"), Decimal("8")))
+
+
+# =============================================================================
+# ACTIVITY CATALOG
+# =============================================================================
+
+class ActivityCatalogTests(TimeEffortTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = make_activity("Admin", classification=Activity.Classification.INDIRECT, sort_order=1)
+        self.old_grant = make_activity("Old grant", valid_to=date(2026, 1, 14))
+        self.new_grant = make_activity("New grant", valid_from=date(2026, 1, 17))
+        self.later_grant = make_activity("Later grant", valid_from=date(2026, 2, 1), valid_to=date(2026, 6, 30))
+        self.retired = make_activity("Retired", is_active=False)
+
+    def test_valid_for_week(self):
+        with self.assertNumQueries(1):
+            catalog = activity_catalog()
+            self.assertEqual(
+                catalog.valid_for(date(2026, 1, 11), date(2026, 1, 17)),
+                [self.new_grant, self.old_grant, self.admin],
+            )
+            self.assertEqual(catalog.valid_for(date(2026, 1, 18), date(2026, 1, 24)), [self.new_grant, self.admin])
+            self.assertEqual(
+                catalog.valid_for(date(2026, 2, 1), date(2026, 2, 7)),
+                [self.later_grant, self.new_grant, self.admin],
+            )
+
+    def test_activity_changes_invalidate(self):
+        self.assertNotIn(self.retired, activity_catalog().active)
+
+        self.retired.is_active = True
+        self.retired.save()
+
+        self.assertIn(self.retired, activity_catalog().active)
+
+    def test_form_choices_come_from_catalog(self):
+        activity_catalog()
+        formset = WeeklyTimesheetLineFormSet(initial=[{}] * 5, prefix="lines")
+
+        with self.assertNumQueries(0):
+            html = str(formset)
+        self.assertEqual(html.count(f'<option value="{self.admin.pk}"'), len(formset.forms))
+        self.assertNotIn("Retired", html)
+
+        form = WeeklyTimesheetLineForm({"activity": self.retired.pk, "hours_mon": "1"})
+        self.assertFalse(form.is_valid())
+        form = WeeklyTimesheetLineForm({"activity": str(self.admin.pk), "hours_mon": "1"})
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data["activity"], self.admin)
+
+
+# =============================================================================
+# SUPERVISOR APPROVAL QUEUE
+# =============================================================================
+
+class SupervisorQueueTests(TimeEffortTestCase):
+    def setUp(self):
+        super().setUp()
+        self.supervisor = User.objects.create_user(username="boss", password="pass")
+        self.period = make_period()
+        self.week = self.period.weeks.get(week_number=1)
+        activity = make_activity()
+        self.timesheets = []
+        for number in range(2):
+            profile = make_profile(f"report{number}", supervisor=self.supervisor)
+            timesheet = make_timesheet(profile, self.week)
+            add_line(timesheet, activity, Decimal("8"))
+            self.timesheets.append(timesheet)
+        self.report = PeriodReport.objects.create(
+            staff=profile,
+            period=self.period,
+            submission_type=PeriodReport.SubmissionType.HOURS,
+            status=PeriodReport.Status.SUBMITTED,
+            total_hours=Decimal("40"),
+        )
+        make_timesheet(make_profile("draft", supervisor=self.supervisor), self.week, status=WeeklyTimesheet.Status.DRAFT)
+        self.other = make_timesheet(make_profile("elsewhere"), self.week)
+        self.client.force_login(self.supervisor)
+        self.url = reverse("timeeffort:supervisor_queue")
+
+    def test_queue_lists_pending_items_with_totals(self):
+        with self.assertNumQueries(2):
+            queue = get_supervisor_queue(self.supervisor)
+            totals = [(ts.staff.user.username, ts.total_hours) for ts in queue["timesheets"]]
+            reports = [(r.staff.user.username, r.period.label) for r in queue["reports"]]
+
+        self.assertEqual(totals, [("report0", Decimal("40.00")), ("report1", Decimal("40.00"))])
+        self.assertEqual(reports, [("report1", "Period 0")])
+
+        response = self.client.get(self.url)
+        self.assertContains(response, 'name="timesheet"', count=2)
+        self.assertContains(response, f'name="report" value="{self.report.pk}"')
+
+    def test_bulk_approve_is_set_based_and_audited(self):
+        ids = [ts.pk for ts in self.timesheets] + [self.other.pk]
+        with CaptureQueriesContext(connection) as ctx:
+            supervisor_approve(self.supervisor, timesheets=WeeklyTimesheet.objects.filter(pk=ids[0]))
+        WeeklyTimesheet.objects.filter(pk=ids[0]).update(supervisor_approved_at=None)
+
+        with self.assertNumQueries(len(ctx.captured_queries) + 2):
+            counts = supervisor_approve(
+                self.supervisor,
+                timesheets=WeeklyTimesheet.objects.filter(pk__in=ids, staff__supervisor=self.supervisor),
+                reports=PeriodReport.objects.filter(pk=self.report.pk),
+            )
+
+        self.assertEqual(counts, (2, 1))
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, PeriodReport.Status.SUPERVISOR_APPROVED)
+        self.assertEqual(self.report.approvals.get().approved_by, self.supervisor)
+        self.assertEqual(
+            SupervisorApproval.objects.filter(timesheet__in=self.timesheets).count(), 3,
+        )
+        self.assertEqual(supervisor_approve(self.supervisor, reports=PeriodReport.objects.all()), (0, 0))
+
+    def test_bulk_approve_locks_without_group_by(self):
+        # The admin changelist queryset carries with_totals()' GROUP BY;
+        # PostgreSQL rejects FOR UPDATE on such a query, so the lock must
+        # only see it as a subquery.
+        request = RequestFactory().get("/")
+        request.user = self.supervisor
+        queryset = WeeklyTimesheetAdmin(WeeklyTimesheet, admin.site).get_queryset(request)
+        self.assertIn("GROUP BY", str(queryset.query))
+
+        with patch.object(connection.features, "has_select_for_update", True):
+            sql, _ = _lock_selected(queryset, status=WeeklyTimesheet.Status.SUBMITTED).query.sql_with_params()
+        self.assertTrue(sql.endswith("FOR UPDATE"))
+        self.assertLess(sql.rindex("GROUP BY"), sql.rindex(")"))
+
+        # Every submitted timesheet in the changelist; the draft is skipped.
+        self.assertEqual(supervisor_approve(self.supervisor, timesheets=queryset), (3, 0))
+        self.assertEqual(
+            WeeklyTimesheet.objects.filter(supervisor_approved_by=self.supervisor).count(), 3,
+        )
+
+    def test_post_ignores_other_supervisors_staff(self):
+        response = self.client.post(self.url, {"timesheet": [self.timesheets[0].pk, self.other.pk]})
+
+        self.assertRedirects(response, self.url)
+        self.timesheets[0].refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.timesheets[0].supervisor_approved_by, self.supervisor)
+        self.assertIsNone(self.other.supervisor_approved_at)
+        self.assertFalse(self.other.approvals.exists())
+
+
+# =============================================================================
+# RECENT ACTIVITY SNAPSHOT
+# =============================================================================
+
+class RecentActivitySnapshotTests(TimeEffortTestCase):
+    def setUp(self):
+        super().setUp()
+        self.profile = make_profile(staff_type=StaffTimesheetProfile.StaffType.HOURLY)
+        self.period = make_period()
+        self.week1, self.week2 = self.period.weeks.order_by("week_number")
+        self.research = make_activity("Research", default_grant_code="NSF-1")
+        self.timesheet = make_timesheet(self.profile, self.week1, status=WeeklyTimesheet.Status.DRAFT)
+        save_timesheet_lines(self.timesheet, [
+            {"activity_id": self.research.pk, "grant_code": "NSF-1", "hours_mon": Decimal("8")},
+            {"activity_id": None, "custom_activity_name": "Outreach", "hours_tue": Decimal("1.5")},
+        ])
+        self.client.force_login(self.profile.user)
+
+    def lines_queried(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        lines_table = WeeklyTimesheetLine._meta.db_table
+        return response, sum(lines_table in query["sql"] for query in ctx.captured_queries)
+
+    def test_save_records_week(self):
+        lines = self.profile.recent_activity.lines_for(self.week1.pk)
+
+        self.assertEqual(
+            [(line.activity_id, line.custom_activity_name, line.total_hours) for line in lines],
+            [(self.research.pk, "", Decimal("8")), (None, "Outreach", Decimal("1.5"))],
+        )
+        self.assertIsNone(self.profile.recent_activity.lines_for(self.week2.pk))
+
+    def test_hourly_carry_forward_reads_snapshot(self):
+        response, line_queries = self.lines_queried(reverse("timeeffort:weekly_entry", args=[self.week2.pk]))
+
+        self.assertEqual(line_queries, 1)
+        carried = [(row["activity"], row["grant_code"]) for row in response.context["formset"].initial]
+        self.assertEqual(carried, [(self.research.pk, "NSF-1")])
+
+    def test_direct_line_save_falls_back_to_timesheet_tables(self):
+        admin = make_activity("Admin", classification=Activity.Classification.INDIRECT, sort_order=5)
+        add_line(self.timesheet, admin, Decimal("1"))
+        self.profile.recent_activity.refresh_from_db()
+        self.assertIsNone(self.profile.recent_activity.lines_for(self.week1.pk))
+
+        response, line_queries = self.lines_queried(reverse("timeeffort:weekly_entry", args=[self.week2.pk]))
+
+        self.assertEqual(line_queries, 2)
+        carried = [row["activity"] for row in response.context["formset"].initial]
+        self.assertEqual(carried, [self.research.pk, admin.pk])
+
+    def test_deleted_line_drops_week(self):
+        self.timesheet.lines.get(custom_activity_name="Outreach").delete()
+
+        self.profile.recent_activity.refresh_from_db()
+        self.assertIsNone(self.profile.recent_activity.lines_for(self.week1.pk))
+
+    def test_save_removing_a_row_still_records_week(self):
+        save_timesheet_lines(self.timesheet, [
+            {"activity_id": self.research.pk, "grant_code": "NSF-1", "hours_mon": Decimal("8")},
+        ])
+
+        self.profile.recent_activity.refresh_from_db()
+        lines = self.profile.recent_activity.lines_for(self.week1.pk)
+        self.assertEqual([line.activity_id for line in lines], [self.research.pk])
+
+    def test_salary_carry_forward_reads_snapshot(self):
+        self.profile.staff_type = StaffTimesheetProfile.StaffType.SALARY
+        self.profile.save(update_fields=["staff_type"])
+
+        response, line_queries = self.lines_queried(reverse("timeeffort:weekly_entry", args=[self.week2.pk]))
+
+        self.assertEqual(line_queries, 1)
+        research_row = next(row for row in response.context["direct_rows"] if row["activity"].pk == self.research.pk)
+        self.assertEqual(dict(research_row["hours_pairs"])["mon"], Decimal("8"))
+        self.assertEqual(response.context["custom_rows"][0]["name"], "Outreach")
+
+    def test_keeps_newest_weeks_only(self):
+        start = self.period.end_date + timedelta(days=1)
+        for index in range(1, StaffRecentActivity.RETAIN_WEEKS):
+            week = make_period(start + timedelta(days=14 * (index - 1)), period_index=index).weeks.get(week_number=1)
+            save_timesheet_lines(
+                make_timesheet(self.profile, week, status=WeeklyTimesheet.Status.DRAFT),
+                [{"activity_id": self.research.pk, "grant_code": "NSF-1", "hours_fri": Decimal("2")}],
+            )
+        snapshot = StaffRecentActivity.objects.get(staff=self.profile)
+        self.assertEqual(len(snapshot.weeks), StaffRecentActivity.RETAIN_WEEKS)
+
+        save_timesheet_lines(
+            make_timesheet(self.profile, self.week2, status=WeeklyTimesheet.Status.DRAFT),
+            [{"activity_id": self.research.pk, "grant_code": "NSF-1", "hours_fri": Decimal("2")}],
+        )
+
+        snapshot.refresh_from_db()
+        self.assertEqual(len(snapshot.weeks), StaffRecentActivity.RETAIN_WEEKS)
+        self.assertNotIn(str(self.week1.pk), snapshot.weeks)
+
+
+# =============================================================================
+# POST-DEADLINE SWEEP
+# =============================================================================
+
+@patch("apps.pdfjobs.services.html_to_pdf", return_value=FAKE_PDF)
+class PostDeadlineSweepTests(TimeEffortTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.period = make_period()
+        self.next_period = make_period(date(2026, 1, 25), period_index=1)
+        ReportingPeriod.objects.filter(pk=self.period.pk).update(submission_deadline=self.now - timedelta(days=1))
+        ReportingPeriod.objects.filter(pk=self.next_period.pk).update(submission_deadline=self.now + timedelta(days=13))
+        self.research = make_activity("Research")
+        self.report = self.make_report("hourly", StaffTimesheetProfile.StaffType.HOURLY, self.period.weeks.all())
+
+    def make_report(self, username, staff_type, weeks):
+        profile = make_profile(username, staff_type=staff_type)
+        for week in weeks:
+            add_line(make_timesheet(profile, week), self.research, Decimal("8"))
+        report = PeriodReport.objects.create(
+            staff=profile,
+            period=self.period,
+            submission_type=PeriodReport.SubmissionType.HOURS,
+            status=PeriodReport.Status.SUBMITTED,
+        )
+        return initialize_period_report(report)
+
+    def test_selects_reports_past_deadline_with_all_weeks_submitted(self, html_to_pdf):
+        self.make_report("partial", StaffTimesheetProfile.StaffType.HOURLY, self.period.weeks.filter(week_number=1))
+        salary_weeks = ReportingWeek.objects.filter(period__in=[self.period, self.next_period])
+        salary = self.make_report("salary", StaffTimesheetProfile.StaffType.SALARY, salary_weeks)
+        since = self.now - timedelta(days=14)
+
+        self.assertEqual(post_deadline_reports(since), [self.report])
+
+        # The salary report covers both periods, so it waits for the second deadline
+        self.assertEqual(post_deadline_reports(self.now, self.now + timedelta(days=14)), [salary])
+
+    def test_refresh_keeps_lines_and_duties(self, html_to_pdf):
+        line = self.report.lines.get()
+        line.duties_description = "Field surveys"
+        line.save(update_fields=["duties_description"])
+
+        with self.assertNumQueries(2):
+            initialize_period_report(self.report)
+
+        self.assertEqual(self.report.lines.get().pk, line.pk)
+        self.assertEqual(self.report.lines.get().duties_description, "Field surveys")
+        self.assertEqual(self.report.total_hours, Decimal("80"))
+
+    @patch("apps.pdfjobs.services.ProcessPoolExecutor", ThreadPoolExecutor)
+    def test_command_pre_renders_final_pdf_once(self, html_to_pdf):
+        stdout = io.StringIO()
+        call_command("sweep_period_reports", stdout=stdout)
+        call_command("sweep_period_reports", stdout=stdout)
+
+        self.assertEqual(self.report.pdfs.filter(pdf_type=PDFSnapshot.PDFType.FINAL).count(), 1)
+        self.assertEqual(html_to_pdf.call_count, 1)
+        self.assertIn("1 final PDF(s) up to date.", stdout.getvalue())
+
+
+# =============================================================================
+# GRANT EFFORT ANALYTICS
+# =============================================================================
+
+@override_settings(TIMEEFFORT_FISCAL_YEAR_START_MONTH=7)
+class GrantEffortTests(TimeEffortTestCase):
+    def setUp(self):
+        super().setUp()
+        self.periods = [
+            make_period(date(2026, 1, 11) + timedelta(days=14 * index), period_index=index)
+            for index in range(3)
+        ]
+        self.profile = make_profile()
+        research = make_activity("Research", default_grant_code="NSF-1")
+        admin = make_activity("Admin", classification=Activity.Classification.INDIRECT)
+        for week in ReportingWeek.objects.order_by("start_date"):
+            timesheet = make_timesheet(self.profile, week)
+            add_line(timesheet, research, Decimal("6"))
+            add_line(timesheet, admin, Decimal("2"))
+
+    def effort(self, rows):
+        return {
+            (row.month_id, row.grant_code): (row.hours, row.percentage, row.fiscal_ytd_hours)
+            for row in rows
+        }
+
+    def test_timesheet_effort_by_salary_month(self):
+        calendar_index()
+
+        with self.assertNumQueries(2):
+            rows = grant_effort_rows(2026)
+
+        first, second = self.periods[0].pk, self.periods[2].pk
+        self.assertEqual(self.effort(rows), {
+            (first, "NSF-1"): (Decimal("120"), Decimal("75.00"), Decimal("120")),
+            (first, ""): (Decimal("40"), Decimal("25.00"), Decimal("40")),
+            (second, "NSF-1"): (Decimal("60"), Decimal("75.00"), Decimal("180")),
+            (second, ""): (Decimal("20"), Decimal("25.00"), Decimal("60")),
+        })
+        self.assertEqual(grant_effort_rows(2027), [])
+
+    def test_director_effort_from_reports(self):
+        director = make_profile("director", staff_type=StaffTimesheetProfile.StaffType.DIRECTOR)
+        report = PeriodReport.objects.create(
+            staff=director,
+            period=self.periods[0],
+            submission_type=PeriodReport.SubmissionType.PCT,
+            status=PeriodReport.Status.SUBMITTED,
+        )
+        for grant_code, percentage in (("NSF-1", "60"), ("DOE-2", "40")):
+            PeriodReportLine.objects.create(
+                period_report=report,
+                activity_name_snapshot="Research",
+                grant_code_snapshot=grant_code,
+                classification_snapshot=Activity.Classification.DIRECT,
+                percentage=Decimal(percentage),
+            )
+
+        rows = [row for row in grant_effort_rows(2026, [director.pk])]
+
+        self.assertEqual(
+            {(row.grant_code, row.percentage, row.hours) for row in rows},
+            {("NSF-1", Decimal("60"), None), ("DOE-2", Decimal("40"), None)},
+        )
+        self.assertEqual({row.source for row in rows}, {GrantEffortMonth.Source.REPORT})
+
+    def test_submit_refreshes_summary(self):
+        refresh_grant_effort(2026)
+        timesheet = self.profile.timesheets.get(week__period=self.periods[2], week__week_number=2)
+        timesheet.status = WeeklyTimesheet.Status.DRAFT
+        timesheet.save(update_fields=["status"])
+
+        stored = GrantEffortMonth.objects.get(month=self.periods[2], grant_code="NSF-1")
+        self.assertEqual(stored.hours, Decimal("30"))
+
+        timesheet.submit()
+        stored = GrantEffortMonth.objects.get(month=self.periods[2], grant_code="NSF-1")
+        self.assertEqual((stored.hours, stored.fiscal_ytd_hours), (Decimal("60"), Decimal("180")))
+
+    def test_csv_export_streams_fiscal_year(self):
+        refresh_grant_effort(2026)
+        self.client.force_login(User.objects.create_superuser(username="admin", password="pass"))
+
+        response = self.client.get(reverse("timeeffort:grant_effort_export"), {"fy": 2026})
+
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ["Fiscal Year", "Month Start", "Month End"])
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[1][4:9], ["Salary", "", "Timesheets", "40.00", "25.00"])
@@ -10,6 +10,11 @@ urlpatterns = [
     path("period/<int:period_id>/describe/", views.final_report_describe, name="final_report_describe"),
     path("download/weekly/<int:timesheet_id>/", views.download_weekly_pdf, name="download_weekly_pdf"),
     path("download/final/<int:report_id>/", views.download_final_pdf, name="download_final_pdf"),
+    # Supervisor
+    path("supervisor/", views.supervisor_queue, name="supervisor_queue"),
+    # Payroll processor
+    path("processor/rollup/", views.org_rollup, name="org_rollup"),
+    path("processor/grant-effort/", views.grant_effort_export, name="grant_effort_export"),
     # Salary
     path("salary/copy/<int:period_id>/", views.copy_previous_period, name="copy_previous_period"),
     # Director
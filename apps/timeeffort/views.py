@@ -1,10 +1,12 @@
+import csv
 from datetime import timedelta
 from decimal import Decimal
 
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.forms import modelformset_factory
-from django.http import Http404, HttpResponse
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 from django.views.decorators.http import require_POST
@@ -16,9 +18,11 @@ from .forms import (
     WeeklyTimesheetLineFormSet,
     ZeroWeekConfirmForm,
 )
+from apps.pdfjobs.models import PDFRenderJob
+from apps.pdfjobs.services import request_pdf_render
+
 from .models import (
     Activity,
-    AIMHoliday,
     DirectorDefaultAllocation,
     PDFSnapshot,
     PeriodReport,
@@ -28,12 +32,30 @@ from .models import (
     StaffTimesheetProfile,
     WeeklyTimesheet,
     WeeklyTimesheetLine,
+    DAY_HOURS_FIELDS,
+    FINAL_PDF_JOB,
+    WEEKLY_PDF_JOB,
+    activity_catalog,
+    calendar_index,
+    holiday_calendar,
 )
 from .services import (
+    DashboardYear,
+    attach_salary_month_labels,
     count_holidays_in_period,
-    generate_weekly_pdf,
+    director_period_summaries,
+    fiscal_year_for,
+    get_org_rollup,
+    get_supervisor_queue,
+    hourly_period_summaries,
     initialize_director_period_report,
     initialize_period_report,
+    iter_grant_effort_csv,
+    recent_activity,
+    recent_week_lines,
+    salary_period_summaries,
+    save_timesheet_lines,
+    supervisor_approve,
     validate_period_percentages,
 )
 
@@ -99,32 +121,7 @@ def dashboard(request):
         return _salary_dashboard(request, profile)
 
     available_years, selected_year = _get_year_filter(request)
-
-    periods = (
-        ReportingPeriod.objects.filter(start_date__year=selected_year)
-        .order_by("-start_date")
-        .prefetch_related("weeks")
-    )
-
-    period_summaries = []
-    for period in periods:
-        weeks = period.weeks.all()
-        submitted_ids = WeeklyTimesheet.objects.filter(
-            staff=profile,
-            week__in=weeks,
-            status=WeeklyTimesheet.Status.SUBMITTED,
-        ).values_list("week_id", flat=True)
-
-        outstanding = weeks.exclude(id__in=submitted_ids)
-
-        period_summaries.append(
-            {
-                "period": period,
-                "total_weeks": weeks.count(),
-                "submitted_count": len(submitted_ids),
-                "outstanding_weeks": outstanding,
-            }
-        )
+    period_summaries = hourly_period_summaries(DashboardYear(profile, selected_year))
 
     recent_reports = (
         PeriodReport.objects.filter(
@@ -216,26 +213,20 @@ def weekly_entry(request, week_id):
 
         formset = WeeklyTimesheetLineFormSet(request.POST, prefix="lines")
         if formset.is_valid():
-            timesheet.lines.all().delete()
+            rows = []
             for form in formset:
                 if form.cleaned_data.get("DELETE"):
                     continue
                 activity = form.cleaned_data.get("activity")
                 if not activity:
                     continue
-                WeeklyTimesheetLine.objects.create(
-                    timesheet=timesheet,
-                    activity=activity,
-                    grant_code=form.cleaned_data.get("grant_code", ""),
-                    hours_sun=form.cleaned_data.get("hours_sun") or Decimal("0"),
-                    hours_mon=form.cleaned_data.get("hours_mon") or Decimal("0"),
-                    hours_tue=form.cleaned_data.get("hours_tue") or Decimal("0"),
-                    hours_wed=form.cleaned_data.get("hours_wed") or Decimal("0"),
-                    hours_thu=form.cleaned_data.get("hours_thu") or Decimal("0"),
-                    hours_fri=form.cleaned_data.get("hours_fri") or Decimal("0"),
-                    hours_sat=form.cleaned_data.get("hours_sat") or Decimal("0"),
-                    description=form.cleaned_data.get("description", ""),
-                )
+                rows.append({
+                    **{field: form.cleaned_data.get(field) for field in DAY_HOURS_FIELDS},
+                    "activity_id": activity.pk,
+                    "grant_code": form.cleaned_data.get("grant_code", ""),
+                    "description": form.cleaned_data.get("description", ""),
+                })
+            save_timesheet_lines(timesheet, rows)
 
             if action == "submit":
                 total = timesheet.total_hours
@@ -343,40 +334,34 @@ def _build_initial_for_week(profile, week):
     2. Non-preset activities carried forward from earlier weeks in this period
     3. Any non-preset lines already saved to this specific week (e.g. added mid-period)
 
+    Reads this week's lines and the staff member's recent-activity snapshot
+    (two queries); activities and earlier weeks come from in-process caches.
+
     Returns (initial_list, num_preset_rows) so the template knows which rows are locked.
     """
-    from .models import Activity
-
-    preset_activities = list(
-        Activity.objects.filter(is_preset=True, is_active=True).order_by(
-            "sort_order", "name"
-        )
-    )
+    catalog = activity_catalog()
+    preset_activities = [a for a in catalog.valid_for(week.start_date, week.end_date) if a.is_preset]
 
     # Existing lines for this week: keyed by (activity_id, grant_code)
     existing_lines = {}
-    try:
-        ts = WeeklyTimesheet.objects.get(staff=profile, week=week)
-        for line in ts.lines.select_related("activity").all():
-            existing_lines[(line.activity_id, line.grant_code)] = line
-    except WeeklyTimesheet.DoesNotExist:
-        pass
+    for line in WeeklyTimesheetLine.objects.filter(timesheet__staff=profile, timesheet__week=week):
+        existing_lines[(line.activity_id, line.grant_code)] = line
 
     # Non-preset activities used in earlier weeks of this period (carry-forward)
-    earlier_weeks = week.period.weeks.filter(week_number__lt=week.week_number)
+    index = calendar_index()
+    earlier_weeks = [index.week(week.period_id, number) for number in range(1, week.week_number)]
+    earlier_weeks = [w for w in earlier_weeks if w]
     carried_keys = []
-    if earlier_weeks.exists():
-        carried = (
-            WeeklyTimesheetLine.objects.filter(
-                timesheet__staff=profile,
-                timesheet__week__in=earlier_weeks,
-                activity__is_preset=False,
-            )
-            .values("activity_id", "grant_code")
-            .distinct()
-            .order_by("activity__sort_order", "activity__name")
-        )
-        carried_keys = [(c["activity_id"], c["grant_code"]) for c in carried]
+    if earlier_weeks:
+        snapshot = recent_activity(profile)
+        carried = set()
+        for earlier in earlier_weeks:
+            for line in recent_week_lines(snapshot, earlier.id):
+                activity = catalog.get(line.activity_id)
+                if activity and not activity.is_preset:
+                    carried.add((line.activity_id, line.grant_code))
+        rank = {a.pk: i for i, a in enumerate(catalog.activities)}
+        carried_keys = sorted(carried, key=lambda key: (rank[key[0]], key[1]))
 
     initial = []
     seen_keys = set()
@@ -440,19 +425,12 @@ def _find_carry_forward_week(profile, week):
     - week_number > 1: previous week in same period
     - week_number == 1: week 2 of previous period (works across 28-day boundary too)
     """
+    index = calendar_index()
     if week.week_number > 1:
-        return ReportingWeek.objects.filter(
-            period=week.period, week_number=week.week_number - 1
-        ).first()
+        return index.week(week.period_id, week.week_number - 1)
     # week_number == 1 → go to previous period's week 2
-    try:
-        prev_period = ReportingPeriod.objects.get(
-            calendar=week.period.calendar,
-            period_index=week.period.period_index - 1,
-        )
-        return ReportingWeek.objects.filter(period=prev_period, week_number=2).first()
-    except ReportingPeriod.DoesNotExist:
-        return None
+    prev_period = index.offset(week.period, -1)
+    return index.week(prev_period.id, 2) if prev_period else None
 
 
 def _build_salary_rows(profile, week):
@@ -464,32 +442,24 @@ def _build_salary_rows(profile, week):
 
     Returns (direct_rows, indirect_rows, custom_rows).
     """
-    holiday_activity_ids = set(
-        Activity.objects.filter(is_holiday_activity=True).values_list("id", flat=True)
-    )
-    holiday_dates = set(
-        AIMHoliday.objects.filter(
-            date__range=[week.start_date, week.end_date]
-        ).values_list("date", flat=True)
-    )
+    catalog = activity_catalog()
+    holiday_activity_ids = set(catalog.holiday_ids)
+    holiday_dates = set(holiday_calendar().dates_between(week.start_date, week.end_date))
     day_dates = {
         d: week.start_date + timedelta(days=i)
         for i, d in enumerate(SALARY_DAY_KEYS)
     }
 
     # Existing timesheet lines for this week (if any)
-    existing_ts = WeeklyTimesheet.objects.filter(staff=profile, week=week).first()
     existing_by_act = {}
     existing_custom = []
-    has_existing_lines = False
-    if existing_ts:
-        lines_qs = list(existing_ts.lines.select_related("activity").all())
-        has_existing_lines = bool(lines_qs)
-        for line in lines_qs:
-            if line.activity_id:
-                existing_by_act[line.activity_id] = line
-            else:
-                existing_custom.append(line)
+    lines_qs = list(WeeklyTimesheetLine.objects.filter(timesheet__staff=profile, timesheet__week=week))
+    has_existing_lines = bool(lines_qs)
+    for line in lines_qs:
+        if line.activity_id:
+            existing_by_act[line.activity_id] = line
+        else:
+            existing_custom.append(line)
 
     # Carry-forward source: only used when no lines have been saved yet for this week
     cf_by_act = {}
@@ -497,18 +467,16 @@ def _build_salary_rows(profile, week):
     if not has_existing_lines:
         cf_week = _find_carry_forward_week(profile, week)
         if cf_week:
-            cf_ts = WeeklyTimesheet.objects.filter(staff=profile, week=cf_week).first()
-            if cf_ts:
-                for line in cf_ts.lines.select_related("activity").all():
-                    if line.activity_id in holiday_activity_ids:
+            for line in recent_week_lines(recent_activity(profile), cf_week.id):
+                if line.activity_id in holiday_activity_ids:
+                    continue
+                if line.activity_id:
+                    act = catalog.get(line.activity_id)
+                    if act is None or (act.valid_to and act.valid_to < week.start_date):
                         continue
-                    if line.activity_id:
-                        act = line.activity
-                        if act.valid_to and act.valid_to < week.start_date:
-                            continue
-                        cf_by_act[line.activity_id] = line
-                    else:
-                        cf_custom.append(line)
+                    cf_by_act[line.activity_id] = line
+                else:
+                    cf_custom.append(line)
 
     try:
         salary_indirect = profile.salary_indirect
@@ -532,16 +500,12 @@ def _build_salary_rows(profile, week):
         return [(d, h[d]) for d in SALARY_DAY_KEYS]
 
     # --- Direct activity rows ---
-    direct_activities = list(
-        Activity.objects.filter(
-            is_active=True,
-            classification=Activity.Classification.DIRECT,
-        ).exclude(id__in=holiday_activity_ids).order_by("sort_order", "name")
-    )
+    direct_activities = [
+        a for a in catalog.valid_for(week.start_date, week.end_date)
+        if a.classification == Activity.Classification.DIRECT and a.id not in holiday_activity_ids
+    ]
     direct_rows = []
     for act in direct_activities:
-        if not act.is_valid_for_week(week.start_date, week.end_date):
-            continue
         if act.id in existing_by_act:
             line = existing_by_act[act.id]
             hours = _get_hours(line)
@@ -561,34 +525,26 @@ def _build_salary_rows(profile, week):
         name: field for name, _cls, field in SALARY_INDIRECT_SLOTS
     }
 
-    indirect_activities = list(
-        Activity.objects.filter(
-            is_active=True,
-            classification__in=[
-                Activity.Classification.INDIRECT,
-                Activity.Classification.LEAVE,
-                Activity.Classification.UNALLOWABLE,
-            ],
-        ).order_by("sort_order", "name")
+    indirect_activities = catalog.active_in(
+        Activity.Classification.INDIRECT,
+        Activity.Classification.LEAVE,
+        Activity.Classification.UNALLOWABLE,
     )
 
     indirect_rows = []
 
     # Holiday activity: shown first in indirect section, auto-filled with 8h per holiday day
-    if holiday_dates:
-        try:
-            holiday_act = Activity.objects.get(is_holiday_activity=True, is_active=True)
-            if holiday_act.id in existing_by_act:
-                hours = _get_hours(existing_by_act[holiday_act.id])
-            else:
-                hours = _zero_hours()
-                for d in SALARY_DAY_KEYS:
-                    if day_dates[d] in holiday_dates:
-                        hours[d] = Decimal("8")
-            indirect_rows.append({"activity": holiday_act, "hours_pairs": _pairs(hours)})
-            holiday_activity_ids.add(holiday_act.id)  # exclude from regular loop below
-        except Activity.DoesNotExist:
-            pass
+    holiday_act = catalog.holiday_activity
+    if holiday_dates and holiday_act:
+        if holiday_act.id in existing_by_act:
+            hours = _get_hours(existing_by_act[holiday_act.id])
+        else:
+            hours = _zero_hours()
+            for d in SALARY_DAY_KEYS:
+                if day_dates[d] in holiday_dates:
+                    hours[d] = Decimal("8")
+        indirect_rows.append({"activity": holiday_act, "hours_pairs": _pairs(hours)})
+        holiday_activity_ids.add(holiday_act.id)  # exclude from regular loop below
 
     for act in indirect_activities:
         if act.id in holiday_activity_ids:
@@ -646,16 +602,20 @@ def _build_salary_rows(profile, week):
 def _save_salary_lines_from_post(post_data, timesheet):
     """
     Parse POST data from the salary weekly entry form and persist lines.
-    Replaces all existing lines. Resets status to DRAFT.
+    Lines not on the form are removed. Resets status to DRAFT.
     """
-    timesheet.lines.all().delete()
-
-    all_activities = Activity.objects.filter(is_active=True)
-
-    for act in all_activities:
+    rows = []
+    # Read the posted activities from the DB, not the per-process catalog: a
+    # stale catalog missing one would drop its row and delete the saved line.
+    posted_ids = set()
+    for key in post_data:
+        parts = key.split("_")
+        if len(parts) == 3 and parts[0] == "act" and parts[1].isdigit() and parts[2] in SALARY_DAY_KEYS:
+            posted_ids.add(int(parts[1]))
+    posted_activities = Activity.objects.filter(is_active=True, pk__in=posted_ids).order_by("sort_order", "name")
+
+    for act in posted_activities:
         prefix = f"act_{act.id}_"
-        if not any(f"{prefix}{d}" in post_data for d in SALARY_DAY_KEYS):
-            continue  # activity wasn't on this form
         grant_code = post_data.get(f"{prefix}grant", act.default_grant_code or "")
         hours = {}
         for d in SALARY_DAY_KEYS:
@@ -664,12 +624,7 @@ def _save_salary_lines_from_post(post_data, timesheet):
                 hours[f"hours_{d}"] = Decimal(val) if val else Decimal("0")
             except Exception:
                 hours[f"hours_{d}"] = Decimal("0")
-        WeeklyTimesheetLine.objects.create(
-            timesheet=timesheet,
-            activity=act,
-            grant_code=grant_code,
-            **hours,
-        )
+        rows.append({"activity_id": act.id, "grant_code": grant_code, **hours})
 
     for slot in [1, 2]:
         name = post_data.get(f"custom_{slot}_name", "").strip()
@@ -686,13 +641,9 @@ def _save_salary_lines_from_post(post_data, timesheet):
             if h > 0:
                 has_hours = True
         if name or has_hours:
-            WeeklyTimesheetLine.objects.create(
-                timesheet=timesheet,
-                activity=None,
-                custom_activity_name=name,
-                grant_code=grant_code,
-                **hours,
-            )
+            rows.append({"activity_id": None, "custom_activity_name": name, "grant_code": grant_code, **hours})
+
+    save_timesheet_lines(timesheet, rows)
 
     if timesheet.status == WeeklyTimesheet.Status.SUBMITTED:
         timesheet.status = WeeklyTimesheet.Status.DRAFT
@@ -706,11 +657,7 @@ def _salary_weekly_entry(request, profile, week):
         week=week,
         defaults={"status": WeeklyTimesheet.Status.DRAFT},
     )
-    holiday_dates = set(
-        AIMHoliday.objects.filter(
-            date__range=[week.start_date, week.end_date]
-        ).values_list("date", flat=True)
-    )
+    holiday_dates = set(holiday_calendar().dates_between(week.start_date, week.end_date))
 
     if request.method == "POST":
         action = request.POST.get("action", "save")
@@ -809,22 +756,15 @@ def copy_previous_period(request, period_id):
         raise Http404
 
     period = get_object_or_404(ReportingPeriod, pk=period_id)
+    index = calendar_index()
     # Ensure we have the anchor (even period_index)
-    if not period.is_salary_month_start:
-        try:
-            period = ReportingPeriod.objects.get(
-                calendar=period.calendar, period_index=period.period_index - 1
-            )
-        except ReportingPeriod.DoesNotExist:
-            messages.error(request, "Could not find anchor period.")
-            return redirect("timeeffort:dashboard")
+    anchor = index.salary_anchor(period)
+    if anchor is None:
+        messages.error(request, "Could not find anchor period.")
+        return redirect("timeeffort:dashboard")
 
-    prev_anchor_idx = period.period_index - 2
-    try:
-        prev_anchor = ReportingPeriod.objects.get(
-            calendar=period.calendar, period_index=prev_anchor_idx
-        )
-    except ReportingPeriod.DoesNotExist:
+    prev_anchor = index.offset(anchor, -2)
+    if prev_anchor is None:
         messages.error(request, "No previous period found to copy from.")
         return redirect("timeeffort:dashboard")
 
@@ -832,16 +772,14 @@ def copy_previous_period(request, period_id):
         ReportingWeek.objects.filter(period__in=_get_salary_periods(prev_anchor)).order_by("start_date")
     )
     curr_weeks = list(
-        ReportingWeek.objects.filter(period__in=_get_salary_periods(period)).order_by("start_date")
+        ReportingWeek.objects.filter(period__in=_get_salary_periods(anchor)).order_by("start_date")
     )
 
     if len(prev_weeks) != len(curr_weeks):
         messages.error(request, "Week count mismatch between periods.")
         return redirect("timeeffort:dashboard")
 
-    holiday_activity_ids = set(
-        Activity.objects.filter(is_holiday_activity=True).values_list("id", flat=True)
-    )
+    holiday_activity_ids = activity_catalog().holiday_ids
 
     copied = 0
     for prev_week, curr_week in zip(prev_weeks, curr_weeks):
@@ -855,17 +793,13 @@ def copy_previous_period(request, period_id):
             defaults={"status": WeeklyTimesheet.Status.DRAFT},
         )
 
-        holiday_dates_curr = set(
-            AIMHoliday.objects.filter(
-                date__range=[curr_week.start_date, curr_week.end_date]
-            ).values_list("date", flat=True)
-        )
+        holiday_dates_curr = set(holiday_calendar().dates_between(curr_week.start_date, curr_week.end_date))
         day_dates = {
             d: curr_week.start_date + timedelta(days=i)
             for i, d in enumerate(SALARY_DAY_KEYS)
         }
 
-        curr_ts.lines.all().delete()
+        rows = []
         for line in prev_ts.lines.select_related("activity").all():
             if line.activity_id and line.activity_id in holiday_activity_ids:
                 continue
@@ -877,13 +811,13 @@ def copy_previous_period(request, period_id):
                 if day_dates[d] in holiday_dates_curr:
                     val = Decimal("0")
                 hours[f"hours_{d}"] = val
-            WeeklyTimesheetLine.objects.create(
-                timesheet=curr_ts,
-                activity_id=line.activity_id,
-                custom_activity_name=line.custom_activity_name,
-                grant_code=line.grant_code,
+            rows.append({
+                "activity_id": line.activity_id,
+                "custom_activity_name": line.custom_activity_name,
+                "grant_code": line.grant_code,
                 **hours,
-            )
+            })
+        save_timesheet_lines(curr_ts, rows)
 
         if curr_ts.status == WeeklyTimesheet.Status.SUBMITTED:
             curr_ts.status = WeeklyTimesheet.Status.DRAFT
@@ -913,9 +847,11 @@ def period_summary(request, period_id):
         all_periods = _get_salary_periods(period)
         weeks = ReportingWeek.objects.filter(period__in=all_periods).order_by("start_date")
         # Ensure we always use the anchor (salary-month-start) period for the report lookup
-        anchor_period = all_periods.filter(
-            period_index=period.period_index if period.period_index % 2 == 0 else period.period_index - 1
-        ).first() or period
+        anchor = calendar_index().salary_anchor(period)
+        if anchor is None or anchor.id == period.pk:
+            anchor_period = period
+        else:
+            anchor_period = ReportingPeriod.objects.get(pk=anchor.id)
         period_end = _get_28day_end(anchor_period)
         period_label = anchor_period.salary_month_label
     else:
@@ -924,10 +860,11 @@ def period_summary(request, period_id):
         period_end = period.end_date
         period_label = period.label
 
-    week_statuses = []
-    for week in weeks:
-        ts = WeeklyTimesheet.objects.filter(staff=profile, week=week).first()
-        week_statuses.append({"week": week, "timesheet": ts})
+    timesheets = {
+        ts.week_id: ts
+        for ts in WeeklyTimesheet.objects.with_totals().filter(staff=profile, week__in=weeks)
+    }
+    week_statuses = [{"week": week, "timesheet": timesheets.get(week.pk)} for week in weeks]
 
     all_submitted = bool(week_statuses) and all(
         ws["timesheet"] and ws["timesheet"].status == WeeklyTimesheet.Status.SUBMITTED
@@ -1030,12 +967,13 @@ def final_report_describe(request, period_id):
                 )
                 return redirect("timeeffort:final_report_describe", period_id=period_id)
 
-            from .services import generate_final_pdf
-
-            generate_final_pdf(report, generated_by=request.user)
-            messages.success(
-                request, "Final report generated. You can now download your PDF."
-            )
+            job = request_pdf_render(FINAL_PDF_JOB, report, requested_by=request.user)
+            if job.status == PDFRenderJob.Status.DONE:
+                messages.success(
+                    request, "Final report generated. You can now download your PDF."
+                )
+            else:
+                _pdf_not_ready_message(request, job)
             return redirect("timeeffort:period_summary", period_id=period_id)
     else:
         formset = DescribeFormSet(queryset=report.lines.order_by("sort_order"))
@@ -1077,7 +1015,11 @@ def download_weekly_pdf(request, timesheet_id):
         .first()
     )
     if not snapshot:
-        snapshot = generate_weekly_pdf(timesheet, generated_by=request.user)
+        job = request_pdf_render(WEEKLY_PDF_JOB, timesheet, requested_by=request.user)
+        snapshot = job.snapshots.order_by("-version").first()
+        if not snapshot:
+            _pdf_not_ready_message(request, job)
+            return redirect("timeeffort:period_summary", period_id=timesheet.week.period_id)
 
     return _serve_pdf(snapshot, f"weekly_report_{timesheet.week.start_date}.pdf")
 
@@ -1096,13 +1038,24 @@ def download_final_pdf(request, report_id):
     )
 
     if not snapshot:
-        messages.error(request, "No PDF has been generated yet.")
+        job = report.pdf_render_job
+        if job and job.status != PDFRenderJob.Status.DONE:
+            _pdf_not_ready_message(request, job)
+        else:
+            messages.error(request, "No PDF has been generated yet.")
         return redirect("timeeffort:period_summary", period_id=report.period_id)
 
     filename = f"effort_report_{report.period.start_date}_{report.period.end_date}.pdf"
     return _serve_pdf(snapshot, filename)
 
 
+def _pdf_not_ready_message(request, job):
+    if job.is_pending:
+        messages.info(request, "Your PDF is being generated. Please try again in a minute.")
+    else:
+        messages.error(request, "PDF generation failed. Please contact an admin.")
+
+
 def _serve_pdf(snapshot, filename):
     try:
         snapshot.file.open("rb")
@@ -1116,6 +1069,153 @@ def _serve_pdf(snapshot, filename):
     return response
 
 
+# =============================================================================
+# SUPERVISOR APPROVAL QUEUE
+# =============================================================================
+
+
+@login_required
+def supervisor_queue(request):
+    """
+    Submitted timesheets and period reports from the user's supervised staff
+    that still need sign-off. POST approves the ticked ones in one go.
+    """
+    if request.method == "POST":
+        supervised = {"staff__supervisor": request.user}
+        timesheets, reports = supervisor_approve(
+            request.user,
+            timesheets=WeeklyTimesheet.objects.filter(pk__in=request.POST.getlist("timesheet"), **supervised),
+            reports=PeriodReport.objects.filter(pk__in=request.POST.getlist("report"), **supervised),
+        )
+        if timesheets or reports:
+            messages.success(request, f"Approved {timesheets} timesheet(s) and {reports} period report(s).")
+        else:
+            messages.warning(request, "Nothing was selected for approval.")
+        return redirect("timeeffort:supervisor_queue")
+
+    return render(request, "timeeffort/supervisor_queue.html", get_supervisor_queue(request.user))
+
+
+# =============================================================================
+# PAYROLL PROCESSOR — ORG-WIDE ROLLUP
+# =============================================================================
+
+
+@staff_member_required
+def org_rollup(request):
+    """
+    All-staff hours matrix for a range of periods, flagging outstanding weeks,
+    zero weeks and weeks awaiting supervisor approval. ?format=csv exports it.
+
+    Defaults to the 28-day salary window containing the most recent period
+    that has started.
+    """
+    available_years, selected_year = _get_year_filter(request)
+    year_periods = list(
+        ReportingPeriod.objects.filter(start_date__year=selected_year).order_by("start_date")
+    )
+    start, end = _org_rollup_range(request, year_periods)
+    periods = [
+        p for p in year_periods
+        if start and start.start_date <= p.start_date <= end.start_date
+    ]
+    rollup = get_org_rollup(periods)
+
+    if request.GET.get("format") == "csv":
+        return _org_rollup_csv(rollup, start, end)
+
+    return render(
+        request,
+        "timeeffort/org_rollup.html",
+        {
+            "rollup": rollup,
+            "year_periods": year_periods,
+            "start": start,
+            "end": end,
+            "available_years": available_years,
+            "selected_year": selected_year,
+        },
+    )
+
+
+@staff_member_required
+def grant_effort_export(request):
+    """
+    Streamed CSV of grant effort by grant code, employee and salary month
+    for one fiscal year (?fy=, default: the current one), read from the
+    GrantEffortMonth summary table.
+    """
+    try:
+        fiscal_year = int(request.GET.get("fy", ""))
+    except ValueError:
+        fiscal_year = fiscal_year_for(timezone.localdate())
+
+    response = StreamingHttpResponse(iter_grant_effort_csv(fiscal_year), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="grant_effort_FY{fiscal_year}.csv"'
+    return response
+
+
+def _org_rollup_range(request, year_periods):
+    """Resolve the ?start= / ?end= period ids to (start, end) ReportingPeriods."""
+    if not year_periods:
+        return None, None
+    by_id = {str(p.id): p for p in year_periods}
+    start = by_id.get(request.GET.get("start"))
+    end = by_id.get(request.GET.get("end"))
+
+    if start is None:
+        today = timezone.now().date()
+        started = [p for p in year_periods if p.start_date <= today] or year_periods
+        current = started[-1]
+        anchor_idx = current.period_index if current.is_salary_month_start else current.period_index - 1
+        start = next(
+            (p for p in year_periods
+             if p.calendar_id == current.calendar_id and p.period_index == anchor_idx),
+            current,
+        )
+    if end is None or end.start_date < start.start_date:
+        end = next(
+            (p for p in year_periods
+             if p.calendar_id == start.calendar_id and p.period_index == start.period_index + 1),
+            start,
+        )
+    return start, end
+
+
+def _org_rollup_csv(rollup, start, end):
+    response = HttpResponse(content_type="text/csv")
+    filename = f"effort_rollup_{start.start_date}_{end.end_date}.csv" if start else "effort_rollup.csv"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    writer = csv.writer(response)
+    writer.writerow(
+        ["Employee", "Staff Type", "Supervisor"]
+        + [
+            f"{col['activity_name']} [{col['grant_code']}]" if col["grant_code"] else col["activity_name"]
+            for col in rollup["columns"]
+        ]
+        + ["Total Hours", "Outstanding Weeks", "Zero Weeks", "Unapproved Weeks", "Report Status"]
+    )
+    for row in rollup["rows"]:
+        profile = row["profile"]
+        writer.writerow(
+            [
+                profile.user.get_full_name() or profile.user.username,
+                profile.get_staff_type_display(),
+                profile.supervisor_name,
+            ]
+            + [hours if hours is not None else "" for hours in row["cells"]]
+            + [
+                row["total_hours"],
+                "; ".join(str(w.start_date) for w in row["outstanding_weeks"]),
+                "; ".join(str(w.start_date) for w in row["zero_weeks"]),
+                "; ".join(str(w.start_date) for w in row["unapproved_weeks"]),
+                "; ".join(r.get_status_display() for r in row["reports"]),
+            ]
+        )
+    return response
+
+
 # =============================================================================
 # DIRECTOR VIEWS
 # =============================================================================
@@ -1123,22 +1223,14 @@ def _serve_pdf(snapshot, filename):
 
 def _get_28day_end(period):
     """Return the end date of the 28-day window starting at period (even period_index)."""
-    try:
-        next_p = ReportingPeriod.objects.get(
-            calendar=period.calendar,
-            period_index=period.period_index + 1,
-        )
-        return next_p.end_date
-    except ReportingPeriod.DoesNotExist:
-        return period.end_date
+    next_p = calendar_index().offset(period, 1)
+    return next_p.end_date if next_p else period.end_date
 
 
 def _get_salary_periods(period):
     """Return the two ReportingPeriods that form the 28-day salary window containing period."""
-    anchor_idx = period.period_index if period.period_index % 2 == 0 else period.period_index - 1
     return ReportingPeriod.objects.filter(
-        calendar=period.calendar,
-        period_index__in=[anchor_idx, anchor_idx + 1],
+        pk__in=[p.id for p in calendar_index().salary_window(period)]
     ).order_by("period_index")
 
 
@@ -1175,51 +1267,7 @@ def _salary_dashboard(request, profile):
     """Salary dashboard: groups periods into 28-day windows, shows all 4 weekly slots each."""
     available_years, selected_year = _get_year_filter(request)
 
-    candidates = list(
-        ReportingPeriod.objects.filter(start_date__year=selected_year).order_by("-start_date")
-    )
-    active_pairs = [p for p in candidates if p.is_salary_month_start]
-
-    period_summaries = []
-    for period in active_pairs:
-        end_date = _get_28day_end(period)
-        all_periods = _get_salary_periods(period)
-        all_weeks = ReportingWeek.objects.filter(period__in=all_periods).order_by("start_date")
-
-        submitted_ids = set(
-            WeeklyTimesheet.objects.filter(
-                staff=profile,
-                week__in=all_weeks,
-                status=WeeklyTimesheet.Status.SUBMITTED,
-            ).values_list("week_id", flat=True)
-        )
-        outstanding = all_weeks.exclude(id__in=submitted_ids)
-        report = PeriodReport.objects.filter(staff=profile, period=period).first()
-
-        week_statuses = []
-        for week in all_weeks:
-            ts = WeeklyTimesheet.objects.filter(staff=profile, week=week).first()
-            week_statuses.append({"week": week, "timesheet": ts})
-
-        has_prev = ReportingPeriod.objects.filter(
-            calendar=period.calendar,
-            period_index=period.period_index - 2,
-        ).exists()
-        holiday_count = AIMHoliday.objects.filter(
-            date__range=[period.start_date, end_date]
-        ).count()
-        period_summaries.append({
-            "period": period,
-            "period_label": period.salary_month_label,
-            "period_end": end_date,
-            "total_weeks": all_weeks.count(),
-            "submitted_count": len(submitted_ids),
-            "outstanding_weeks": outstanding,
-            "week_statuses": week_statuses,
-            "report": report,
-            "has_prev": has_prev,
-            "holiday_count": holiday_count,
-        })
+    period_summaries = salary_period_summaries(DashboardYear(profile, selected_year))
 
     # Sort: upcoming deadline first, past-unsubmitted second, fully-submitted last
     today = timezone.now().date()
@@ -1236,7 +1284,7 @@ def _salary_dashboard(request, profile):
 
     period_summaries.sort(key=_sort_key)
 
-    recent_reports = (
+    recent_reports = attach_salary_month_labels(
         PeriodReport.objects.filter(
             staff=profile,
             status__in=[
@@ -1270,17 +1318,13 @@ def _invalidate_period_report_pdf(profile, period):
     a fresh rollup and PDF regeneration.
     """
     if not profile.is_hourly:
-        anchor_idx = period.period_index if period.period_index % 2 == 0 else period.period_index - 1
-        try:
-            anchor_period = ReportingPeriod.objects.get(
-                calendar=period.calendar, period_index=anchor_idx
-            )
-        except ReportingPeriod.DoesNotExist:
+        anchor_period = calendar_index().salary_anchor(period)
+        if anchor_period is None:
             return
     else:
         anchor_period = period
 
-    report = PeriodReport.objects.filter(staff=profile, period=anchor_period).first()
+    report = PeriodReport.objects.filter(staff=profile, period_id=anchor_period.id).first()
     if report and report.generated_at is not None:
         report.pdfs.filter(pdf_type=PDFSnapshot.PDFType.FINAL).delete()
         report.generated_at = None
@@ -1291,34 +1335,12 @@ def _director_dashboard(request, profile):
     """Director dashboard: shows 28-day period pairs only (no weekly timesheets)."""
     available_years, selected_year = _get_year_filter(request)
 
-    candidates = list(
-        ReportingPeriod.objects.filter(start_date__year=selected_year).order_by(
-            "-start_date"
-        )
+    period_summaries = director_period_summaries(
+        DashboardYear(profile, selected_year, include_timesheets=False)
     )
-    # Only even period_index periods (start of 28-day salary month)
-    active_pairs = [p for p in candidates if p.is_salary_month_start]
-
-    period_summaries = []
-    for period in active_pairs:
-        report = PeriodReport.objects.filter(staff=profile, period=period).first()
-        end_date = _get_28day_end(period)
-        holiday_count = AIMHoliday.objects.filter(
-            date__range=[period.start_date, end_date]
-        ).count()
-        period_summaries.append(
-            {
-                "period": period,
-                "period_label": period.salary_month_label,
-                "period_end": end_date,
-                "report": report,
-                "holiday_count": holiday_count,
-                "holiday_pct": holiday_count * 5,
-            }
-        )
 
     has_defaults = DirectorDefaultAllocation.objects.filter(profile=profile).exists()
-    recent_reports = (
+    recent_reports = attach_salary_month_labels(
         PeriodReport.objects.filter(
             staff=profile,
             status__in=[
@@ -1363,11 +1385,9 @@ def director_period_entry(request, period_id):
         return redirect("timeeffort:dashboard")
 
     end_date = _get_28day_end(period)
-    holiday_count = AIMHoliday.objects.filter(
-        date__range=[period.start_date, end_date]
-    ).count()
+    holidays = holiday_calendar().between(period.start_date, end_date)
+    holiday_count = len(holidays)
     holiday_pct = Decimal(str(holiday_count * 5))
-    holidays = AIMHoliday.objects.filter(date__range=[period.start_date, end_date])
 
     from .models import Activity
 
@@ -1455,9 +1475,11 @@ def download_director_pdf(request, submission_id):
         .first()
     )
     if not snapshot:
-        from .services import generate_final_pdf
-
-        snapshot = generate_final_pdf(report, generated_by=request.user)
+        job = request_pdf_render(FINAL_PDF_JOB, report, requested_by=request.user)
+        snapshot = job.snapshots.order_by("-version").first()
+        if not snapshot:
+            _pdf_not_ready_message(request, job)
+            return redirect("timeeffort:director_period_entry", period_id=report.period_id)
 
     filename = (
         f"director_report_{report.period.start_date}_{report.period.end_date}.pdf"
@@ -45,6 +45,26 @@ if not FIELD_ENCRYPTION_KEY:
         "and add it to your .env file."
     )
 
+# Previous encryption keys, still accepted for decryption after rotating
+# FIELD_ENCRYPTION_KEY. Comma-separated, newest first; drop a key once
+# `manage.py reencrypt_fields` has run with the new primary key.
+FIELD_ENCRYPTION_RETIRED_KEYS = env.list("FIELD_ENCRYPTION_RETIRED_KEYS", default=[])
+
+# HMAC key for blind indexes (searchable digests of encrypted fields).
+# Required, and separate from the encryption keys: it is not rotated with
+# FIELD_ENCRYPTION_KEY, so bank/passport lookups keep working through a key
+# rotation. Generate with: python -c 'import secrets; print(secrets.token_urlsafe(32))'
+# Changing it requires `manage.py backfill_blind_indexes`.
+FIELD_BLIND_INDEX_KEY = env("FIELD_BLIND_INDEX_KEY", default=None)
+if not FIELD_BLIND_INDEX_KEY:
+    raise Exception(
+        "FIELD_BLIND_INDEX_KEY environment variable is required in all environments. "
+        "Generate one with: python -c 'import secrets; print(secrets.token_urlsafe(32))' "
+        "and add it to your .env file."
+    )
+if FIELD_BLIND_INDEX_KEY in (FIELD_ENCRYPTION_KEY, *FIELD_ENCRYPTION_RETIRED_KEYS):
+    raise Exception("FIELD_BLIND_INDEX_KEY must differ from FIELD_ENCRYPTION_KEY and the retired keys.")
+
 DEBUG = False  # Overridden in dev/prod
 
 
@@ -60,6 +80,7 @@ INSTALLED_APPS = [
     "apps.preprints.apps.PreprintsConfig",
     "apps.events",
     "apps.checklists.apps.ChecklistsConfig",
+    "apps.pdfjobs.apps.PDFJobsConfig",
     "apps.timeeffort.apps.TimeEffortConfig",
     "accounts",
     "programs",
@@ -473,3 +494,25 @@ SITE_URL = env("SITE_URL", default="http://localhost:8000")
 DONATION_RECEIPT_FROM_EMAIL = env(
     "DONATION_RECEIPT_FROM_EMAIL", default="donations@aimath.org"
 )
+
+# ---------------------------------------------------------------------------
+# PDF rendering
+# ---------------------------------------------------------------------------
+# Set when a `manage.py process_pdf_jobs` worker is running. When unset, PDF
+# render jobs requested from the web (downloads, final reports) run inline.
+PDF_RENDER_WORKER = env.bool("PDF_RENDER_WORKER", default=False)
+PDF_RENDER_WORKER_PROCESSES = env.int("PDF_RENDER_WORKER_PROCESSES", default=2)
+
+# Set when a `manage.py process_receipts` worker is running. When unset,
+# uploaded receipt images are optimized right after the upload commits, i.e.
+# Pillow decodes and resizes them in the web process serving the upload.
+# Either way, run `manage.py process_receipts --once` after deploying
+# reimbursements migration 0015: it marks existing receipts pending, and
+# only the command processes those.
+RECEIPT_IMAGE_WORKER = env.bool("RECEIPT_IMAGE_WORKER", default=False)
+
+# ---------------------------------------------------------------------------
+# Time & effort
+# ---------------------------------------------------------------------------
+# First calendar month of the fiscal year used for grant effort reporting.
+TIMEEFFORT_FISCAL_YEAR_START_MONTH = env.int("TIMEEFFORT_FISCAL_YEAR_START_MONTH", default=7)
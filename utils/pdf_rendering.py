@@ -0,0 +1,104 @@
+"""
+WeasyPrint rendering shared by the web process and the PDF worker pool.
+
+Nothing here touches Django or the database, so html_to_pdf can run inside a
+ProcessPoolExecutor child (see apps.pdfjobs process_pdf_jobs).
+
+Each process keeps one PDFRenderer alive: a single FontConfiguration and the
+parsed CSS of every <style> block it has seen. Our PDF templates inline their
+stylesheet, which is identical for every document rendered from the same
+template, so after the first render only the HTML itself is parsed.
+"""
+
+import hashlib
+import os
+import re
+from collections import OrderedDict
+
+_STYLE_BLOCK = re.compile(r"<style[^>]*>(.*?)</style>", re.IGNORECASE | re.DOTALL)
+
+
+def _import_weasyprint():
+    try:
+        import weasyprint
+        from weasyprint.text.fonts import FontConfiguration
+    except ImportError:
+        raise RuntimeError(
+            "WeasyPrint is required for PDF generation. Install it with: pip install weasyprint"
+        )
+    return weasyprint, FontConfiguration
+
+
+class PDFRenderer:
+    """Long-lived WeasyPrint state for one process."""
+
+    # Stylesheets kept parsed; the templates only produce a handful.
+    max_stylesheets = 32
+
+    def __init__(self):
+        self._weasyprint, font_configuration = _import_weasyprint()
+        self.font_config = font_configuration()
+        self._stylesheets = OrderedDict()
+
+    def stylesheet(self, css_text):
+        """Parsed CSS for css_text, reused across documents."""
+        key = hashlib.sha256(css_text.encode()).hexdigest()
+        css = self._stylesheets.get(key)
+        if css is None:
+            css = self._weasyprint.CSS(string=css_text, font_config=self.font_config)
+            self._stylesheets[key] = css
+            if len(self._stylesheets) > self.max_stylesheets:
+                self._stylesheets.popitem(last=False)
+        else:
+            self._stylesheets.move_to_end(key)
+        return css
+
+    def render(self, html_string, base_url="/"):
+        """Convert an already-rendered HTML string to PDF bytes."""
+        # The <style> blocks are passed in pre-parsed instead; with no other
+        # author CSS in our templates the cascade comes out the same.
+        stylesheets = [self.stylesheet(css_text) for css_text in _STYLE_BLOCK.findall(html_string)]
+        document = self._weasyprint.HTML(string=_STYLE_BLOCK.sub("", html_string), base_url=base_url)
+        return document.write_pdf(stylesheets=stylesheets, font_config=self.font_config)
+
+    def warm_up(self, stylesheets=()):
+        """Parse the given CSS and lay out a one-line page so fonts are loaded before the first real render."""
+        for css_text in stylesheets:
+            self.stylesheet(css_text)
+        self.render("<p>warm-up</p>")
+
+
+_renderer = None
+_renderer_pid = None
+
+
+def get_renderer():
+    """This process's PDFRenderer. Forked children build their own rather than share the parent's."""
+    global _renderer, _renderer_pid
+    if _renderer is None or _renderer_pid != os.getpid():
+        _renderer = PDFRenderer()
+        _renderer_pid = os.getpid()
+    return _renderer
+
+
+def extract_stylesheets(html_string):
+    """The <style> block contents of a template or document, for warm_up()."""
+    return _STYLE_BLOCK.findall(html_string)
+
+
+def warm_up(stylesheets=()):
+    """
+    Build this process's renderer ahead of the first job. Used as the
+    ProcessPoolExecutor initializer for render workers. A missing WeasyPrint
+    is left for html_to_pdf to report per job rather than breaking the pool.
+    """
+    try:
+        renderer = get_renderer()
+    except RuntimeError:
+        return
+    renderer.warm_up(stylesheets)
+
+
+def html_to_pdf(html_string, base_url="/"):
+    """Convert an already-rendered HTML string to PDF bytes."""
+    return get_renderer().render(html_string, base_url)